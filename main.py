@@ -1,24 +1,36 @@
 from src.core.app_controller import AppController
 from src.utils.config_loader import ConfigLoader
 
-def run_app():
-    # 加载配置
-    config = ConfigLoader.load_config()
+def run_app(config, controller=None):
+    """Run the monitoring loop, reusing the controller of a failed run when it can be
+    Returns:
+        tuple: (result of start_monitoring, controller)
+    """
+    if controller is not None and not controller.warm_restart():
+        # Nothing worth keeping, start from the checkpoint instead
+        controller.close()
+        controller = None
 
-    # 初始化控制器
-    controller = AppController(config)
+    if controller is None:
+        # 初始化控制器
+        controller = AppController(config)
 
     # 启动监控
-    return controller.start_monitoring()
+    return controller.start_monitoring(), controller
 
 def main():
+    # 加载配置
+    config = ConfigLoader.load_config()
+
+    controller = None
     run_count = 0
     while run_count <= 9:
-        res = run_app()
+        res, controller = run_app(config, controller)
         if res:
             break
         run_count += 1
         print(f"[main]App restarting... {run_count}")
+    controller.close()
     if run_count > 9:
         print("[main]App error too many times, exit.")
     else:
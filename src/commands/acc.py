@@ -1,5 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, MUSIC_UI
 from appium.webdriver.common.appiumby import AppiumBy
 from datetime import datetime, timedelta
 import time
@@ -12,6 +12,8 @@ def create_command(controller):
 command = None
 
 class AccompanimentCommand(BaseCommand):
+    resources = (MUSIC_UI,)
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.music_handler
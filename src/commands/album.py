@@ -1,5 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SOUL_UI, MUSIC_UI
 from datetime import datetime, timedelta
 import time
 
@@ -14,6 +14,8 @@ command = None
 
 
 class AlbumCommand(BaseCommand):
+    resources = (SOUL_UI, MUSIC_UI)
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.music_handler
@@ -1,6 +1,6 @@
 import traceback
-from ..core.base_command import BaseCommand
-from datetime import datetime, timedelta
+from ..core.base_command import BaseCommand, SOUL_UI
+from datetime import date, datetime, timedelta
 import time
 
 def create_command(controller):
@@ -11,6 +11,9 @@ def create_command(controller):
 command = None
 
 class EndCommand(BaseCommand):
+    resources = (SOUL_UI,)
+    update_interval = 60  # Auto end only checks the hour and room count
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.soul_handler
@@ -21,6 +24,19 @@ class EndCommand(BaseCommand):
         self.init_time = datetime.now()
         self.handler.logger.info(f"EndCommand initialized at {self.init_time}")
 
+    def checkpoint(self):
+        """Start time and last auto end, so a restart does not delay the next auto end"""
+        return {
+            'init_time': self.init_time.isoformat(),
+            'last_auto_end_date': self.last_auto_end_date.isoformat() if self.last_auto_end_date else None,
+        }
+
+    def restore(self, state):
+        if state.get('init_time'):
+            self.init_time = datetime.fromisoformat(state['init_time'])
+        if state.get('last_auto_end_date'):
+            self.last_auto_end_date = date.fromisoformat(state['last_auto_end_date'])
+
     def process(self, message_info, parameters):
         """Process end command to close party"""
         try:
@@ -91,12 +107,11 @@ class EndCommand(BaseCommand):
                 return
                 
             # Get user count
-            user_count_elem = self.handler.try_find_element_plus('user_count', log=False)
-            if not user_count_elem:
+            state = self.handler.room_state()
+            if not state or not state.user_count_text:
                 return
 
-            user_count_text = user_count_elem.text
-            if user_count_text == '1人':
+            if state.user_count_text == '1人':
                 self.handler.logger.info("Only one user in party, auto ending...")
                 self.handler.logger.info(f"Hours since init: {hours_since_init:.2f}, current hour: {current_hour}")
                 result = self.end_party()
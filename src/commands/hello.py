@@ -12,6 +12,8 @@ def create_command(controller):
 command = None
 
 class HelloCommand(BaseCommand):
+    resources = ()  # Only stores the hello in the database
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.soul_handler
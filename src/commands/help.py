@@ -11,6 +11,8 @@ def create_command(controller):
 command = None
 
 class HelpCommand(BaseCommand):
+    resources = ()
+
     def __init__(self, controller):
         super().__init__(controller)
 
@@ -1,5 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, MUSIC_UI
 from datetime import datetime, timedelta
 import time
 
@@ -11,6 +11,8 @@ def create_command(controller):
 command = None
 
 class KtvCommand(BaseCommand):
+    resources = (MUSIC_UI,)
+
     def __init__(self, controller):
         super().__init__(controller)
 
@@ -1,14 +1,14 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SOUL_UI, MUSIC_UI
 from datetime import datetime, timedelta
 import time
-import jieba
-from langdetect import detect_langs
-import langdetect
 from html import unescape
+from ..utils.lyrics_chunker import chunk_lyrics
+from ..utils.lazy_import import lazy_import, seed_langdetect
 
-# 在导入后设置种子
-langdetect.DetectorFactory.seed = 0
+# Heavy dictionaries and language profiles, loaded on first use or by the preload
+jieba = lazy_import('jieba')
+langdetect = lazy_import('langdetect', on_load=seed_langdetect)
 
 def create_command(controller):
     lyrics_command = LyricsCommand(controller)
@@ -18,9 +18,13 @@ def create_command(controller):
 command = None
 
 class LyricsCommand(BaseCommand):
+    resources = (SOUL_UI, MUSIC_UI)
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.soul_handler
+        # Same limit the outbound queue merges posts under
+        self.max_message_length = controller.config['soul'].get('max_message_length', 500)
 
     def select_lyrics_tab(self):
         """Select lyrics tab in music player"""
@@ -83,25 +87,43 @@ class LyricsCommand(BaseCommand):
         Returns:
             dict: Result with lyrics groups or error
         """
-        # Make sure we're in the music app
-        if not self.music_handler.switch_to_app():
-            return {'error': 'Failed to switch to music app'}
-            
-        # If no query provided, construct from current playing info
+        # Song identity, known for the playing song or a query searched before
+        identity = None
         if query == "":
             # Get current playing info
             info = self.music_handler.get_playback_info()
-            if 'error' in info:
+            if not info or 'error' in info:
                 return {'error': 'Failed to get playback info'}
-            
+            identity = (info['song'], info['singer'], info['album'])
+
             # Construct search query from current song
             query = f'{info["song"]} {info["singer"]} {info["album"]}'
             self.handler.logger.info(f"Using current song info as query: {query}")
-        
+        else:
+            cached = self.music_handler.search_cache.get(query)
+            if cached:
+                identity = (cached.song, cached.singer, cached.album)
+
+        if identity:
+            stored = self.lookup_stored(identity, group_num)
+            if stored:
+                return stored
+
+        # Make sure we're in the music app
+        if not self.music_handler.switch_to_app():
+            return {'error': 'Failed to switch to music app'}
+
         # Search for the song
         if not self.music_handler.query_music(query):
             self.handler.logger.error(f"Failed to query music with query {query}")
             return {'error': f'Failed to find song matching "{query}"'}
+
+        if not identity:
+            # First search of this query, the next one is served without the UI
+            identity = self.identify_result(query)
+            stored = self.lookup_stored(identity, group_num) if identity else None
+            if stored:
+                return stored
         
         # Select lyrics tab after finding the song
         if not self.select_lyrics_tab():
@@ -119,77 +141,72 @@ class LyricsCommand(BaseCommand):
         
         # Process lyrics
         lyrics_groups = self.process_lyrics(lyrics_content, force_groups=group_num)
+        if identity:
+            self.music_handler.lyrics_store.put(
+                *identity,
+                lyrics_content,
+                lyrics_groups if group_num == 0 else None
+            )
         return {'groups': lyrics_groups}
 
-    def process_lyrics(self, lyrics_text, max_width=20, force_groups=0):
+    def lookup_stored(self, identity, group_num=0):
+        """Result with the stored lyrics of a song
+        Args:
+            identity: tuple, (song, singer, album)
+            group_num: int, number of groups to force
+        Returns:
+            dict: Result with lyrics groups, None if the song has no stored lyrics
+        """
+        stored = self.music_handler.lyrics_store.get(*identity)
+        if not stored:
+            return None
+        self.handler.logger.info(f"Serving stored lyrics of {identity[0]} by {identity[1]}")
+        return {'groups': self.stored_groups(identity, stored, group_num)}
+
+    def identify_result(self, query):
+        """Song the search results of query lead with, cached for the next request
+        Args:
+            query: str, query just searched
+        Returns:
+            tuple: (song, singer, album), None if the song row cannot be read
+        """
+        self.music_handler.select_song_tab()
+        info = self.music_handler.get_playing_info()
+        if info['song'] == 'Unknown':
+            return None
+        # Same entry :play would cache, so the studio version is remembered too
+        studio = self.music_handler.probe_element_plus('studio_version') is not None
+        self.music_handler.search_cache.put(query, info, 0, studio)
+        return info['song'], info['singer'], info['album']
+
+    def stored_groups(self, identity, stored, group_num=0):
+        """Message groups of stored lyrics
+        Args:
+            identity: tuple, (song, singer, album)
+            stored: StoredLyrics of the song
+            group_num: int, number of groups to force
+        Returns:
+            list: List of lyrics groups
+        """
+        if group_num > 0:
+            return self.process_lyrics(stored.raw_text, force_groups=group_num)
+        if stored.groups is None:
+            # Filled from a KTV sheet, chunk it once
+            groups = self.process_lyrics(stored.raw_text)
+            self.music_handler.lyrics_store.set_groups(*identity, groups)
+            return groups
+        return stored.groups
+
+    def process_lyrics(self, lyrics_text, max_width=40, force_groups=0):
         """Process lyrics text into groups with width control
         Args:
             lyrics_text: str, lyrics text to process
-            max_width: int, maximum width of each line
+            max_width: int, maximum display width of each line
             force_groups: int, force specific number of groups
         Returns:
-            list: List of lyrics groups
+            list: List of lyrics groups, each within the Soul message length
         """
-        # Calculate total length of lyrics
-        total_length = len(lyrics_text)
-
-        # Determine number of groups
-        if force_groups > 0:
-            num_groups = force_groups
-        else:
-            # Default to groups of roughly 500 characters
-            num_groups = (total_length + 499) // 500  # Ceiling division
-
-        # Calculate target size per group
-        target_group_size = total_length / num_groups if num_groups > 0 else 0
-
-        # Split lyrics into lines and remove empty lines
-        lyrics_lines = [line.strip() for line in lyrics_text.split('\n') if line.strip()]
-
-        if not lyrics_lines:
-            return []
-
-        # First pass: combine adjacent lines within max_width
-        combined_lines = []
-        current_line = lyrics_lines[0]
-
-        for next_line in lyrics_lines[1:]:
-            # Try combining with next line (including a space between)
-            combined = current_line + " " + next_line
-            if len(combined) <= max_width:
-                current_line = combined
-            else:
-                combined_lines.append(current_line)
-                current_line = next_line
-
-        # Add the last line
-        combined_lines.append(current_line)
-
-        # Second pass: group lines with balanced length
-        groups = []
-        current_group = []
-        current_length = 0
-
-        for line in combined_lines:
-            line_length = len(line) + 1  # +1 for newline
-            new_length = current_length + line_length
-
-            # Check if adding this line would make the group too far from target size
-            if (current_length > 0 and  # Don't check first line
-                    abs(new_length - target_group_size) > abs(current_length - target_group_size) and
-                    len(groups) < num_groups - 1):  # Don't create new group if we're on last group
-                groups.append('\n'.join(current_group))
-                current_group = [line]
-                current_length = len(line)
-            else:
-                current_group.append(line)
-                current_length = new_length
-
-        # Add the last group
-        if current_group:
-            groups.append('\n'.join(current_group))
-
-        return groups
+        return chunk_lyrics(lyrics_text, max_width, self.max_message_length, force_groups)
 
     def process(self, message_info, parameters):
         # Get lyrics of current song
@@ -217,7 +234,9 @@ class LyricsCommand(BaseCommand):
         l = 0
         for lyr in groups:
             l += len(lyr)
-            self.soul_handler.send_message(lyr)
+            self.soul_handler.queue_message(lyr)
+        # Post all groups in one input dialog session
+        self.soul_handler.flush_messages()
 
         prompt = f' {len(groups)} piece(s) of lyrics sent, {l} characters'
         # Send lyrics back to Soul using command's template
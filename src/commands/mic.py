@@ -1,4 +1,4 @@
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SOUL_UI
 
 def create_command(controller):
     mic_command = MicCommand(controller)
@@ -8,6 +8,8 @@ def create_command(controller):
 command = None
 
 class MicCommand(BaseCommand):
+    resources = (SOUL_UI,)
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = controller.soul_handler
@@ -20,17 +22,21 @@ class MicCommand(BaseCommand):
             dict: Result with success or error
         """
         try:
-            toggle_mic_button = self.handler.wait_for_element_clickable_plus('toggle_mic')
-
-            if not toggle_mic_button:
-                return {'error': 'Microphone button not found'}
-            
-            desc = self.handler.try_get_attribute(toggle_mic_button, 'content-desc')
-            if not desc:
+            # Mic status comes from the room state, the button is only found to click it
+            state = self.handler.room_state()
+            if state is None:
                 self.handler.logger.error('failed to get mic status')
                 return {'error': 'Failed to get mic status'}
+            if state.mic_on is None:
+                return {'error': 'Microphone button not found'}
 
-            is_mic_on = desc == "闭麦按钮"  # If we see "闭麦按钮", mic is currently on
+            is_mic_on = state.mic_on
+            if target_state is not None and is_mic_on == target_state:
+                return {'error': f'Microphone is already {"on" if target_state else "off"}'}
+
+            toggle_mic_button = self.handler.wait_for_element_clickable_plus('toggle_mic')
+            if not toggle_mic_button:
+                return {'error': 'Microphone button not found'}
 
             if target_state is None:
                 # Toggle current state
@@ -39,13 +45,10 @@ class MicCommand(BaseCommand):
                 self.handler.logger.info(f"Toggled mic to {new_state}")
                 return {'state': new_state}
 
-            # Only click if current state doesn't match target state
-            if is_mic_on != target_state:
-                toggle_mic_button.click()
-                self.handler.logger.info(f"Set mic to {1 if target_state else 0}")
-                return {'state': "1" if target_state else "0"}
-            else:
-                return {'error': f'Microphone is already {"on" if target_state else "off"}'}
+            # Current state doesn't match target state
+            toggle_mic_button.click()
+            self.handler.logger.info(f"Set mic to {1 if target_state else 0}")
+            return {'state': "1" if target_state else "0"}
 
         except Exception as e:
             self.handler.log_error(f"Error in mic command: {str(e)}")
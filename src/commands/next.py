@@ -1,5 +1,6 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SOUL_UI, MUSIC_UI
+from ..music.play_queue import PlayQueue
 from datetime import datetime, timedelta
 import time
 
@@ -11,15 +12,106 @@ def create_command(controller):
 command = None
 
 class NextCommand(BaseCommand):
+    # Requests only touch the queue, update() runs searching and pushing on the executor
+    resources = ()
+    update_interval = 2
+
     def __init__(self, controller):
         super().__init__(controller)
+        self.queue = PlayQueue(controller.db_helper)
+        config = controller.config['qq_music'].get('play_queue', {})
+        self.push_after = config.get('push_after', 30)  # Seconds into the song, its length is unknown
+        self.pushed_during = None  # Song the last item was pushed during
+        self.music_handler.playback_watcher.subscribe('song_changed', lambda new, old: self.wake_update())
+
+    def checkpoint(self):
+        """Song the head was pushed during, the queue itself is in the database"""
+        return {'pushed_during': list(self.pushed_during) if self.pushed_during else None}
+
+    def restore(self, state):
+        if state.get('pushed_during'):
+            self.pushed_during = tuple(state['pushed_during'])
 
     def process(self, message_info, parameters):
         query = ' '.join(parameters)
-        self.soul_handler.ensure_mic_active()
-        info = self.play_next(query)
-        return info
+        if not query:
+            return {'error': 'Missing song name'}
+        item, position = self.queue.add(query, message_info.nickname)
+        self.wake_update()
+        return {
+            'song': query,
+            'position': position
+        }
+
+    def update(self):
+        """Resolve queued searches and push the head once the song is well under way"""
+        super().update()
+        # Leave the QQ Music UI to commands waiting for it, including our own last job
+        if self.controller.executor.busy((MUSIC_UI,)):
+            return
+
+        item = self.queue.next_unresolved()
+        if item:
+            self._submit(self.resolve, item, (MUSIC_UI,))
+            return
+
+        head = self.queue.peek()
+        if head and self.push_due(self.music_handler.playback_watcher.current):
+            # Mic is checked before playing, as :play does
+            self._submit(self.push, head, (SOUL_UI, MUSIC_UI))
+
+    def _submit(self, func, item, resources):
+        """Run a QQ Music job for item on the executor, so the monitoring loop keeps reading chat"""
+        self.controller.executor.submit('next', resources, lambda: func(item), lambda result: self.wake_update())
+
+    def resolve(self, item):
+        """Search the queued query once, failing early and filling the search cache for push
+
+        Only looks the song up; skip bookkeeping and the studio version are
+        left to push, which plays it.
+        """
+        playing_info, _ = self.music_handler.find_music(item.query)
+        if 'error' in playing_info:
+            self.queue.drop(item)
+            self.soul_handler.queue_message(f"Cannot find {item.query} @{item.requester}")
+            return
+        self.queue.resolve(item, playing_info)
+        self.music_handler.logger.info(f"Resolved queued {item.query} to {item.song} by {item.singer}")
+
+    def push_due(self, state):
+        """Check if the head of the queue should go to QQ Music now
+        Args:
+            state: PlaybackState from the playback watcher
+        Returns:
+            bool: True if the current song has played push_after seconds or playback stopped
+        """
+        if state is None:
+            return False
+        if not state.playing:
+            # Start playing when stopped, but leave a deliberate pause alone
+            return state.state in ('Stopped', 'None')
+        song_key = (state.song, state.singer, state.album)
+        if song_key == self.pushed_during:
+            return False
+        position = state.position_now()
+        return position is not None and position >= self.push_after * 1000
 
-    def play_next(self, query):
-        info = self.music_handler.play_next(query)
-        return info
+    def push(self, item):
+        """Hand the head item to QQ Music"""
+        state = self.music_handler.playback_watcher.current
+        try:
+            self.soul_handler.ensure_mic_active()
+            if state and state.playing:
+                result = self.music_handler.play_next(item.query)
+                self.pushed_during = (state.song, state.singer, state.album)
+            else:
+                result = self.music_handler.play_music(item.query)
+        except Exception:
+            self.music_handler.logger.error(f"Error pushing queued {item.query}: {traceback.format_exc()}")
+            return
+        if 'error' in result:
+            self.queue.drop(item)
+            self.soul_handler.queue_message(f"Failed to play {item.query} @{item.requester}")
+            return
+        self.queue.pop(item)
+        self.soul_handler.queue_message(f"Up next: {result['song']} by {result['singer']} @{item.requester}")
@@ -1,5 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import CooldownCommand, SOUL_UI
 from datetime import datetime, timedelta
 import time
 
@@ -13,14 +13,14 @@ def create_command(controller):
 command = None
 
 
-class NoticeCommand(BaseCommand):
+class NoticeCommand(CooldownCommand):
+    resources = (SOUL_UI,)
+    cooldown_item = 'notice'
+
     def __init__(self, controller):
         super().__init__(controller)
 
         self.handler = self.soul_handler
-        self.last_update_time = None
-        self.current_notice = None
-        self.next_notice = None
         self.cooldown_minutes = 15  # Same cooldown as topic
 
     def change_notice(self, notice: str):
@@ -29,6 +29,7 @@ class NoticeCommand(BaseCommand):
 
         # Update notice
         self.next_notice = notice
+        self.wake_update()
 
         if not self.last_update_time:
             self.handler.logger.info(f'Notice will be updated to {notice} soon')
@@ -1,5 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SOUL_UI
 
 def create_command(controller):
     pack_command = PackCommand(controller)
@@ -9,6 +9,10 @@ def create_command(controller):
 command = None
 
 class PackCommand(BaseCommand):
+    resources = (SOUL_UI,)
+    update_interval = 30
+    update_events = ('user_enter',)  # Room count grows when users enter
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.soul_handler
@@ -30,23 +34,18 @@ class PackCommand(BaseCommand):
     def update(self):
         """Check room count and auto open pack if needed"""
         try:
-            # Get user count element
-            user_count_elem = self.handler.try_find_element_plus('user_count', log=False)
-            if not user_count_elem:
+            # User count parsed from text like "房间人数: 3"
+            state = self.handler.room_state()
+            if not state or not state.user_count_text:
                 return
 
-            # Extract number from text like "房间人数: 3"
-            count_text = user_count_elem.text
-            if not count_text:
+            count = state.user_count
+            if count is None:
+                self.handler.logger.error(f"Failed to parse user count: {state.user_count_text}")
                 return
-
-            try:
-                count = int(''.join(filter(str.isdigit, count_text)))
-                if count > 5:
-                    self.auto_mode = True  # Auto mode
-                    self.open_luck_pack(user_count=count)  # Pass user count as parameter
-            except ValueError:
-                self.handler.logger.error(f"Failed to parse user count: {count_text}")
+            if count > 5:
+                self.auto_mode = True  # Auto mode
+                self.open_luck_pack(user_count=count)  # Pass user count as parameter
 
         except Exception as e:
             self.handler.log_error(f"Error in pack update: {traceback.format_exc()}")
@@ -58,7 +57,7 @@ class PackCommand(BaseCommand):
         """
         try:
             # Find luck pack button
-            luck_pack = self.handler.try_find_element_plus('luck_pack', log=False)
+            luck_pack = self.handler.probe_element_plus('luck_pack')
             if not luck_pack:
                 return {'error': 'No luck pack available'}
 
@@ -1,5 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SHELL, SOUL_UI
 from datetime import datetime, timedelta
 import time
 
@@ -11,6 +11,8 @@ def create_command(controller):
 command = None
 
 class PauseCommand(BaseCommand):
+    resources = (SHELL, SOUL_UI)  # Turns the mic off/on around the key event
+
     def __init__(self, controller):
         super().__init__(controller)
 
@@ -53,14 +55,8 @@ class PauseCommand(BaseCommand):
                 if 'error' in mic_result:
                     self.logger.warning(f"Failed to turn off mic: {mic_result['error']}")
 
-            # Execute media control command
-            self.music_handler.driver.execute_script(
-                'mobile: shell',
-                {
-                    'command': 'input keyevent KEYCODE_MEDIA_PLAY_PAUSE'
-                }
-            )
-            self.music_handler.logger.info("Sent media play/pause key event")
+            # Fade and toggle playback in one device call
+            self.music_handler.fade_play_pause(should_pause)
 
             if not should_pause:
                 # If resuming, turn on mic after resuming playback
@@ -1,5 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SOUL_UI, MUSIC_UI
 from datetime import datetime, timedelta
 import time
 
@@ -14,6 +14,8 @@ command = None
 
 
 class PlayCommand(BaseCommand):
+    resources = (SOUL_UI, MUSIC_UI)
+
     def __init__(self, controller):
         super().__init__(controller)
 
@@ -49,9 +51,7 @@ class PlayCommand(BaseCommand):
             self.handler.logger.error(f'Failed to play music {music_query}')
             return playing_info
 
-        song_element = self.handler.wait_for_element_clickable_plus('song_name')
-        song_element.click()
-        self.handler.logger.info(f"Select first song")
+        self.handler.select_song_result()
 
         return playing_info
 
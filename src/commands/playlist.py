@@ -1,7 +1,7 @@
 import traceback
 
 from ..utils.playlist_parser import PlaylistParser
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SOUL_UI, MUSIC_UI
 
 
 def create_command(controller):
@@ -14,6 +14,8 @@ command = None
 
 
 class PlaylistCommand(BaseCommand):
+    resources = (SOUL_UI, MUSIC_UI)
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.music_handler
@@ -1,6 +1,5 @@
 import traceback
-import re
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SOUL_UI
 
 def create_command(controller):
     seat_command = SeatCommand(controller)
@@ -10,6 +9,10 @@ def create_command(controller):
 command = None
 
 class SeatCommand(BaseCommand):
+    resources = (SOUL_UI,)
+    update_interval = 10  # Focus count only matters when people move around
+    update_events = ('user_enter',)
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.soul_handler
@@ -20,17 +23,11 @@ class SeatCommand(BaseCommand):
 
     def check_focus_count(self):
         """Check the focus count and execute seating if it changes."""
-        focus_count_element = self.handler.try_find_element_plus('focus_count', log=False)
-        if not focus_count_element:
-            return  # Early return if focus count element is not found
-
-        current_focus_count_text = focus_count_element.text
-        # Extract the number of focused users using regex
-        match = re.search(r'(\d+)人专注中', current_focus_count_text)
-        if not match:
-            return  # Early return if regex does not match
+        state = self.handler.room_state()
+        if not state or state.focus_count is None:
+            return  # Early return if focus count is not on screen
 
-        current_focus_count = int(match.group(1))  # Extract the number
+        current_focus_count = state.focus_count
         if self.previous_focus_count == current_focus_count:
             return  # Early return if focus count has not changed
 
@@ -43,35 +40,31 @@ class SeatCommand(BaseCommand):
             # Expand seats if needed
             self.expand_seats()
 
-            # Find all seat containers
-            seat_containers = self.handler.find_elements_plus('seat_container')
-            if not seat_containers:
+            # Seat layout comes from the room state snapshot
+            state = self.handler.room_state()
+            if not state or not state.seats:
                 self.handler.logger.error("Failed to find seat containers")
                 return {'error': 'Failed to find seat containers'}
 
             # Try to find a seat next to someone
-            for container in seat_containers:
-                # Check both seats in this container
-                left_state = self.handler.find_child_element_plus(container, 'left_state')
-                right_state = self.handler.find_child_element_plus(container, 'right_state')
-                left_label = self.handler.find_child_element_plus(container, 'left_label')
-                right_label = self.handler.find_child_element_plus(container, 'right_label')
-
+            for seat in state.seats:
                 # If left seat is empty and right seat has someone
-                if not left_state and right_state and (not right_label.text == '群主'):
-                    left_seat = self.handler.find_child_element_plus(container, 'left_seat')
-                    if left_seat:
-                        left_seat.click()
-                        self.handler.logger.info("Clicked left seat next to occupied right seat")
-                        return self._confirm_seat()
-
+                if not seat.left_taken and seat.right_taken and seat.right_label != '群主':
+                    side = 'left'
                 # If right seat is empty and left seat has someone
-                if not right_state and left_state and (not left_label.text == '群主'):
-                    right_seat = self.handler.find_child_element_plus(container, 'right_seat')
-                    if right_seat:
-                        right_seat.click()
-                        self.handler.logger.info("Clicked right seat next to occupied left seat")
-                        return self._confirm_seat()
+                elif not seat.right_taken and seat.left_taken and seat.left_label != '群主':
+                    side = 'right'
+                else:
+                    continue
+
+                seat_containers = self.handler.find_elements_plus('seat_container')
+                if not seat_containers or len(seat_containers) <= seat.index:
+                    break
+                seat_element = self.handler.find_child_element_plus(seat_containers[seat.index], f'{side}_seat')
+                if seat_element:
+                    seat_element.click()
+                    self.handler.logger.info(f"Clicked {side} seat next to occupied {'right' if side == 'left' else 'left'} seat")
+                    return self._confirm_seat()
 
             # If no seats next to someone found, try any available seat
             apply_seat = self.handler.wait_for_element_clickable_plus('apply_seat')
@@ -109,14 +102,20 @@ class SeatCommand(BaseCommand):
 
     def collapse_seats(self):
         """Collapse seats if expanded"""
-        expand_seats = self.handler.try_find_element_plus('expand_seats', log=False)
-        if expand_seats and expand_seats.text == '收起座位':
+        state = self.handler.room_state()
+        if not state or not state.seats_expanded:
+            return
+        expand_seats = self.handler.probe_element_plus('expand_seats')
+        if expand_seats:
             expand_seats.click()
             self.handler.logger.info(f'Collapsed seats')
     
     def expand_seats(self):
         """Expand seats if collapsed"""
-        expand_seats = self.handler.try_find_element_plus('expand_seats', log=False)
-        if expand_seats and expand_seats.text == '展开座位':
+        state = self.handler.room_state()
+        if not state or state.seats_expanded is not False:
+            return
+        expand_seats = self.handler.probe_element_plus('expand_seats')
+        if expand_seats:
             expand_seats.click()
             self.handler.logger.info(f'Expanded seats')
\ No newline at end of file
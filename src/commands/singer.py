@@ -1,6 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
-from appium.webdriver.common.appiumby import AppiumBy
+from ..core.base_command import BaseCommand, SOUL_UI, MUSIC_UI
 
 def create_command(controller):
     singer_command = SingerCommand(controller)
@@ -12,6 +11,8 @@ command = None
 
 
 class SingerCommand(BaseCommand):
+    resources = (SOUL_UI, MUSIC_UI)
+
     def __init__(self, controller):
         super().__init__(controller)
         self.handler = self.music_handler
@@ -77,7 +78,7 @@ class SingerCommand(BaseCommand):
                 'error': 'Failed to find singer result',
             }
 
-        singer_text = self.handler.find_child_element(singer_result, AppiumBy.ID, self.handler.config['elements']['singer_text'])
+        singer_text = self.handler.find_child_element(singer_result, *self.handler._get_locator('singer_text'))
         singer_text.click()
         self.handler.logger.info("Selected singer result")
 
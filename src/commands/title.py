@@ -1,6 +1,6 @@
 import traceback
 
-from ..core.base_command import BaseCommand
+from ..core.base_command import CooldownCommand, SOUL_UI
 from datetime import datetime, timedelta
 import time
 
@@ -14,14 +14,13 @@ def create_command(controller):
 command = None
 
 
-class TitleCommand(BaseCommand):
+class TitleCommand(CooldownCommand):
+    resources = (SOUL_UI,)
+    cooldown_item = 'title'
 
     def __init__(self, controller):
         super().__init__(controller)
 
-        self.last_update_time = None
-        self.current_title = None
-        self.next_title = None
         self.cooldown_minutes = 15 + 2
         self.handler = controller.soul_handler
 
@@ -42,6 +41,7 @@ class TitleCommand(BaseCommand):
 
         # Update title
         self.next_title = new_title
+        self.wake_update()
 
         if not self.last_update_time:
             self.handler.logger.info(f'Title will be updated to {new_title} soon')
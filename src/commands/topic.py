@@ -2,7 +2,7 @@ import traceback
 
 from trio import current_time
 
-from ..core.base_command import BaseCommand
+from ..core.base_command import CooldownCommand, SOUL_UI
 from datetime import datetime, timedelta
 import time
 
@@ -16,13 +16,13 @@ def create_command(controller):
 command = None
 
 
-class TopicCommand(BaseCommand):
+class TopicCommand(CooldownCommand):
+    resources = (SOUL_UI,)
+    cooldown_item = 'topic'
+
     def __init__(self, controller):
         super().__init__(controller)
 
-        self.last_update_time = None
-        self.current_topic = None
-        self.next_topic = None
         self.cooldown_minutes = 5 + 2
         self.handler = self.soul_handler
 
@@ -37,6 +37,7 @@ class TopicCommand(BaseCommand):
 
         # Update topic
         self.next_topic = new_topic
+        self.wake_update()
 
         if not self.last_update_time:
             self.handler.logger.info(f'Topic will be updated to {new_topic} soon')
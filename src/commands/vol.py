@@ -1,5 +1,5 @@
 import traceback
-from ..core.base_command import BaseCommand
+from ..core.base_command import BaseCommand, SHELL
 from datetime import datetime, timedelta
 import time
 
@@ -11,6 +11,8 @@ def create_command(controller):
 command = None
 
 class VolumeCommand(BaseCommand):
+    resources = (SHELL,)
+
     def __init__(self, controller):
         super().__init__(controller)
 
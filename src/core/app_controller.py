@@ -12,16 +12,64 @@ import sys
 import threading
 import queue
 from ..utils.db_helper import DBHelper
+from ..utils.presence_probe import PresenceProbe
+from ..utils.foreground_tracker import ForegroundTracker
+from ..utils.shell_channel import create_shell_channel
+from ..utils.lazy_import import preload, import_stats
+from .base_command import SOUL_UI, MUSIC_UI
+from .checkpoint import Checkpoint
+from .watchdog import DriverDeadlines, Watchdog
+from .command_executor import CommandExecutor
+from .update_scheduler import UpdateScheduler
+
+
+class AttachedRemote(webdriver.Remote):
+    """Remote driver joining a running Appium session instead of creating one"""
+
+    def __init__(self, session_id, **kwargs):
+        self.attach_session_id = session_id
+        super().__init__(**kwargs)
+
+    def start_session(self, capabilities, browser_profile=None):
+        self.session_id = self.attach_session_id
+        self.caps = capabilities
 
 
 class AppController:
     def __init__(self, config):
         self.config = config
+        # State of the last run, resumed when it is recent enough
+        checkpoint_config = config.get('checkpoint', {})
+        self.checkpoint = Checkpoint(
+            checkpoint_config.get('path', 'data/checkpoint.json'),
+            checkpoint_config.get('interval', 30)
+        )
+        self.restored = self.checkpoint.load(checkpoint_config.get('max_age', 3600))
+        self.warm_restarts = 0
+        self.session_reattached = False
+        # Every driver call gives up after its deadline instead of hanging the loop
+        watchdog_config = config.get('watchdog', {})
+        self.deadlines = DriverDeadlines(
+            watchdog_config.get('default_deadline', 20),
+            watchdog_config.get('deadlines'),
+            http_timeout=watchdog_config.get('http_timeout', 120)
+        )
+        self.session_reset_requested = False  # Set by the watchdog as its last resort
         self.driver = self._init_driver()
         self.input_queue = queue.Queue()
+        self.input_thread = None
         self.is_running = True
         self.in_console_mode = False
-        self.player_name = 'Outlier'
+        self.player_name = self.restored.get('player_name', 'Outlier')
+        self.enabled = self.restored.get('enabled', True)  # Commands on at the start of a run
+        # Device shell shared by handlers and probes, see shell config section
+        self.shell = create_shell_channel(config, self.driver)
+        # Shared page source cache for "is X on screen?" checks
+        self.presence_probe = PresenceProbe(self.driver)
+        # Clicks, swipes and key presses of any caller drop it
+        self.deadlines.on_mutation = self.presence_probe.invalidate
+        # Shared by both handlers to skip redundant activate_app calls
+        self.foreground_tracker = ForegroundTracker(self.shell)
         
         # Get lyrics formatter tags from lyrics command config
         lyrics_tags = next(
@@ -29,10 +77,29 @@ class AppController:
             []
         )
 
+        # Initialize database helper, handlers keep caches in it
+        self.db_helper = DBHelper()
+
         # Initialize handlers
         self.soul_handler = SoulHandler(self.driver, config['soul'], self)
         self.music_handler = QQMusicHandler(self.driver, config['qq_music'], self)
         self.logger = self.soul_handler.logger
+        self._restore_state()
+
+        # Worker pool running commands that don't conflict with each other
+        self.executor = CommandExecutor(
+            self.logger,
+            config.get('command_workers', 4),
+            on_screen_handover=self.presence_probe.invalidate
+        )
+        # Runs command update hooks when they are due
+        self.update_scheduler = UpdateScheduler(self.logger)
+        # Notices a stalled monitoring loop and escalates recovery
+        self.watchdog = Watchdog(
+            self,
+            watchdog_config.get('stall_after', 60),
+            watchdog_config.get('check_interval', 5)
+        )
 
         # Initialize command parser
         self.command_parser = CommandParser(config['commands'])
@@ -40,9 +107,6 @@ class AppController:
         self.commands_path = Path(__file__).parent.parent / 'commands'
         self.command_modules = {}  # Cache for loaded command modules
 
-        # Initialize database helper
-        self.db_helper = DBHelper()
-
     def _init_driver(self):
         options = AppiumOptions()
 
@@ -58,7 +122,130 @@ class AppController:
         options.set_capability('appActivity', self.config['soul']['chat_activity'])
 
         server_url = f"http://{self.config['appium']['host']}:{self.config['appium']['port']}"
-        return webdriver.Remote(command_executor=server_url, options=options)
+        session_id = self.restored.get('session_id')
+        if session_id and self.config['appium'].get('reuse_session', True):
+            driver = self._attach_driver(session_id, server_url, options)
+            if driver:
+                return driver
+        return self.deadlines.attach(webdriver.Remote(command_executor=server_url, options=options))
+
+    def _attach_driver(self, session_id, server_url, options):
+        """Join the Appium session of an earlier run if it is still alive
+        Returns:
+            webdriver.Remote: Driver of the session, None if it is gone
+        """
+        try:
+            driver = self.deadlines.attach(AttachedRemote(session_id, command_executor=server_url, options=options))
+            driver.get_window_size()
+        except WebDriverException:
+            return None
+        self.session_reattached = True
+        print(f"[AppController]Reattached to Appium session {session_id}")
+        return driver
+
+    def _driver_alive(self):
+        """Check if the Appium session still answers"""
+        try:
+            self.driver.get_window_size()
+            return True
+        except WebDriverException:
+            return False
+
+    def _rebind_driver(self, driver):
+        """Hand a new driver to every component holding the old one"""
+        self.driver = driver
+        for component in (self.soul_handler, self.music_handler, self.presence_probe, self.shell):
+            if hasattr(component, 'driver'):
+                component.driver = driver
+        self.presence_probe.invalidate()
+        self.foreground_tracker.mark_uncertain()
+
+    def _restore_state(self):
+        """Apply the restored checkpoint to the controller and handlers"""
+        music = self.restored.get('music', {})
+        self.music_handler.list_mode = music.get('list_mode', self.music_handler.list_mode)
+        self.music_handler.no_skip = music.get('no_skip', self.music_handler.no_skip)
+        self.soul_handler.message_manager.seen.restore(self.restored.get('seen', []))
+
+    def _save_checkpoint(self, enabled):
+        """Write in-memory state for a later cold restart
+        Args:
+            enabled: bool, whether commands are enabled
+        """
+        commands = {}
+        for name, module in self.command_modules.items():
+            try:
+                state = module.command.checkpoint()
+            except Exception:
+                self.logger.error(f"Error checkpointing command {name}: {traceback.format_exc()}")
+                continue
+            if state:
+                commands[name] = state
+        saved = self.checkpoint.save({
+            'session_id': self.driver.session_id,
+            'enabled': enabled,
+            'player_name': self.player_name,
+            'music': {
+                'list_mode': self.music_handler.list_mode,
+                'no_skip': self.music_handler.no_skip,
+            },
+            'seen': self.soul_handler.message_manager.seen.dump(),
+            'commands': commands,
+        })
+        if not saved:
+            self.logger.error(f"Failed to save checkpoint to {self.checkpoint.path}")
+
+    def _stop(self, enabled):
+        """Stop background work when start_monitoring returns, the shell stays open"""
+        self.enabled = enabled
+        self.watchdog.stop()
+        self.executor.shutdown()
+        self.music_handler.playback_watcher.stop()
+        self._save_checkpoint(enabled)
+
+    def warm_restart(self):
+        """Get ready to monitor again after start_monitoring gave up
+
+        Keeps the loaded commands, database, caches and, while it answers,
+        the Appium session; only the session and the stopped workers are
+        rebuilt.
+        Returns:
+            bool: False if a cold restart is needed
+        """
+        # Let commands of the failed run finish before their driver may be replaced
+        stuck = self.executor.restart()
+        if stuck:
+            self.logger.warning(f"Commands still running across the restart: {stuck}")
+        # Driver calls hung in the failed run must not hold the workers of the next one
+        hung = self.deadlines.reset()
+        if hung:
+            self.logger.warning(f"Left {hung} hung driver call(s) behind")
+        try:
+            if self.session_reset_requested:
+                self.logger.warning("Watchdog asked for a new Appium session")
+                try:
+                    self.driver.quit()
+                except WebDriverException:
+                    pass
+                self.restored = {}
+                self._rebind_driver(self._init_driver())
+                self.session_reset_requested = False
+            elif not self._driver_alive():
+                self.logger.warning("Appium session is gone, starting a new one")
+                self.restored = {}
+                self._rebind_driver(self._init_driver())
+        except Exception:
+            self.logger.error(f"Warm restart failed: {traceback.format_exc()}")
+            return False
+        self.soul_handler.error_count = 0
+        self.is_running = True
+        self.warm_restarts += 1
+        return True
+
+    def close(self):
+        """Release what outlives start_monitoring, before exit or a cold restart"""
+        self.shell.close()
+        self.deadlines.shutdown()
 
     def _load_command_module(self, command):
         """Load command module dynamically"""
@@ -91,6 +278,10 @@ class AppController:
                 return None
 
             module.command = module.create_command(self)
+            state = self.restored.get('commands', {}).get(command)
+            if state:
+                module.command.restore(state)
+            self.update_scheduler.register(command, module.command)
             self.command_modules[command] = module
             return module
             
@@ -99,13 +290,40 @@ class AppController:
             return None
 
     def _update_commands(self):
-        """Update all loaded commands"""
-        for module in self.command_modules.values():
-            try:
-                if hasattr(module, 'command'):
-                    module.command.update()
-            except Exception as e:
-                self.soul_handler.log_error(f"Error updating command {module.__name__}: {str(e)}")
+        """Update loaded commands whose update is due"""
+        self.update_scheduler.run_due()
+
+    def _print_stats(self):
+        """Print runtime stats of all components to the console"""
+        components = {
+            'updates': self.update_scheduler,
+            'executor': self.executor,
+            'shell': self.shell,
+            'presence_probe': self.presence_probe,
+            'foreground': self.foreground_tracker,
+            'outbound': self.soul_handler.outbound,
+            'soul_locators': self.soul_handler.locators,
+            'music_locators': self.music_handler.locators,
+            'music_navigator': self.music_handler.navigator,
+            'search_cache': self.music_handler.search_cache,
+            'ktv': self.music_handler.ktv,
+            'lyrics_store': self.music_handler.lyrics_store,
+            'playback': self.music_handler.playback_watcher,
+            'shell_queries': self.music_handler.shell_queries,
+            'seen_messages': self.soul_handler.message_manager.seen,
+            'imports': import_stats,
+            'checkpoint': self.checkpoint,
+            'watchdog': self.watchdog,
+            'driver_calls': self.deadlines,
+        }
+        if hasattr(self, 'next_command'):
+            components['play_queue'] = self.next_command.queue
+        if self.soul_handler.message_manager.ingestion:
+            components['ingestion'] = self.soul_handler.message_manager.ingestion
+        for name, component in components.items():
+            print(f'[{name}]')
+            for key, value in component.stats().items():
+                print(f'  {key}: {value}')
 
     def _check_command(self, command):
         # Try to load command module
@@ -116,24 +334,40 @@ class AppController:
         """Process command using module if available
         Args:
             message_info: MessageInfo object
-            command_info: dict containing command details
+            command_info: ParsedCommand from the command parser
         Returns:
             str: Response message
         """
         try:
-            # self.soul_handler.send_message(f"Processing command :{command_info['prefix']}\n@{message_info.nickname}")
-            result = command.process(message_info, command_info['parameters'])
+            # self.soul_handler.send_message(f"Processing command :{command_info.prefix}\n@{message_info.nickname}")
+            result = command.process(message_info, command_info.parameters)
             if 'error' in result:
-                res =  command_info['error_template'].format(
+                res =  command_info.error_template.format(
                     error=result['error'],
                     user=message_info.nickname,
                 )
             else:
-                res = f'{command_info['response_template'].format(**result)} @{message_info.nickname}'
+                res = f'{command_info.response_template.format(**result)} @{message_info.nickname}'
             return res
         except Exception as e:
             self.soul_handler.log_error(f"Error processing command {command_info}: {traceback.format_exc()}")
-            return f"Error processing command {command_info}"
+            return f"Error processing command :{command_info.prefix}"
+
+    def _submit_command(self, command, message_info, command_info):
+        """Run command on the executor, its response goes out through the outbound queue
+        Args:
+            command: BaseCommand instance
+            message_info: MessageInfo object
+            command_info: ParsedCommand from the command parser
+        Returns:
+            Future: Future of the command run
+        """
+        return self.executor.submit(
+            command_info.prefix,
+            command.resources,
+            lambda: self._process_command(command, message_info, command_info),
+            self.soul_handler.queue_message
+        )
 
     def _toggle_console_mode(self):
         """Toggle console mode on Ctrl+P"""
@@ -188,129 +422,170 @@ class AppController:
             self.logger.error(f"Error loading commands: {traceback.format_exc()}")
 
     def start_monitoring(self):
-        enabled = True
+        enabled = self.enabled
         response = None
         lyrics = None
         last_info = None
         error_count = 0
+        preloaded = False
         
         # Load all command modules
         self._load_all_commands()
         self.logger.info("All command modules loaded")
+
+        # Playback state is read in the background from here on
+        self.music_handler.playback_watcher.start()
+        self.watchdog.start()
         
-        # Start console input thread
-        input_thread = threading.Thread(target=self._console_input)
-        input_thread.daemon = True
-        input_thread.start()
+        # Start console input thread, still running after a warm restart
+        if not (self.input_thread and self.input_thread.is_alive()):
+            self.input_thread = threading.Thread(target=self._console_input)
+            self.input_thread.daemon = True
+            self.input_thread.start()
 
         while self.is_running:
             try:
-                # Check for console input
-                try:
-                    while not self.input_queue.empty():
-                        message = self.input_queue.get_nowait()
-                        # Only send non-empty messages
-                        if message.strip():
-                            self.soul_handler.send_message(message)
-                except queue.Empty:
-                    pass
+                self.watchdog.beat()
+                if self.session_reset_requested:
+                    self.logger.error("[start_monitoring]stalled until the watchdog reset the session, rerun")
+                    self._stop(enabled)
+                    return False
+
+                # Hold the screen for this tick, commands get it while the loop sleeps.
+                # A command owning the screen is bounded by its own driver deadlines,
+                # so waiting for it is not a stall of the loop
+                with self.executor.hold((SOUL_UI, MUSIC_UI), on_wait=self.watchdog.beat):
+                    # Screen may have changed since last tick
+                    self.presence_probe.invalidate()
 
-                # Update all commands
-                self._update_commands()
+                    # Check for console input
+                    try:
+                        while not self.input_queue.empty():
+                            message = self.input_queue.get_nowait()
+                            if message.strip() == '/stats':
+                                self._print_stats()
+                            # Only send non-empty messages
+                            elif message.strip():
+                                self.soul_handler.queue_message(message)
+                    except queue.Empty:
+                        pass
+
+                    # Update all commands
+                    self._update_commands()
                 
-                info = self.music_handler.get_playback_info()
-                # ignore state
-                info['state'] = None
-                if info != last_info:
-                    last_info = info
-                    if self.music_handler.list_mode == 'singer':
-                        if info['song'].endswith('(Live)'):
-                            if self.music_handler.no_skip > 0:
-                                self.music_handler.no_skip -= 1
-                            else:
-                                self.music_handler.skip_song()
-                    if 'DJ' in info['song'] or 'Remix' in info['song']:
-                        self.music_handler.skip_song()
-
-                    self.soul_handler.send_message(f"Playing {info['song']} by {info['singer']} in {info['album']}")
-
-                # Monitor Soul messages
-                messages = self.soul_handler.get_latest_message(enabled)
-                # get messages in advance to avoid being floored by responses
-                if lyrics:
-                    self.soul_handler.send_message(lyrics)
-                    lyrics = None
-                if response:
-                    self.soul_handler.send_message(response)
-                    response = None
-                if messages:
-                    # Iterate through message info objects
-                    for msg_id, message_info in messages.items():
-                        if self.command_parser.is_valid_command(message_info.content):
-                            command_info = self.command_parser.parse_command(message_info.content)
-                            if command_info:
-                                # Handle different commands using match-case
-                                cmd = command_info['prefix']
-                                if cmd == 'enable':
-                                    enabled = ''.join(command_info['parameters']) == "1"
-                                    self.soul_handler.logger.info(f"start_monitoring enabled: {enabled}")
-                                    response = command_info['response_template'].format(
-                                        enabled=enabled
-                                    )
-                                    self.soul_handler.send_message(response)
-
-                                if not enabled:
-                                    continue
-
-                                self.soul_handler.send_message(
-                                    f'Processing :{cmd} command @{message_info.nickname}')
-
-                                match command_info['prefix']:
-                                    case 'invite':
-                                        # Get party ID parameter
-                                        if len(command_info['parameters']) > 0:
-                                            party_id = command_info['parameters'][0]
-                                            # Try to join party
-                                            result = self.soul_handler.invite_user(message_info, party_id)
-
-                                            if 'error' in result:
-                                                # Use error template if invitation failed
-                                                response = command_info['error_template'].format(
-                                                    party_id=result['party_id'],
-                                                    error=result['error']
-                                                )
+                    info = self.music_handler.get_playback_info()
+                    if info:
+                        # ignore state
+                        info['state'] = None
+                    if info and info != last_info:
+                        last_info = info
+                        if self.music_handler.list_mode == 'singer':
+                            if info['song'].endswith('(Live)'):
+                                if self.music_handler.no_skip > 0:
+                                    self.music_handler.no_skip -= 1
+                                else:
+                                    self.music_handler.skip_song()
+                        if 'DJ' in info['song'] or 'Remix' in info['song']:
+                            self.music_handler.skip_song()
+
+                        self.soul_handler.queue_message(f"Playing {info['song']} by {info['singer']} in {info['album']}")
+
+                    # Monitor Soul messages
+                    messages = self.soul_handler.get_latest_message(enabled)
+                    # get messages in advance to avoid being floored by responses
+                    if lyrics:
+                        self.soul_handler.queue_message(lyrics)
+                        lyrics = None
+                    if response:
+                        self.soul_handler.queue_message(response)
+                        response = None
+                    if messages:
+                        # Iterate through message info objects
+                        for msg_id, message_info in messages.items():
+                            if message_info.content:
+                                command_info = self.command_parser.parse_command(message_info.content)
+                                if command_info:
+                                    # Handle different commands using match-case
+                                    cmd = command_info.prefix
+                                    if cmd == 'enable':
+                                        enabled = ''.join(command_info.parameters) == "1"
+                                        self.soul_handler.logger.info(f"start_monitoring enabled: {enabled}")
+                                        response = command_info.response_template.format(
+                                            enabled=enabled
+                                        )
+                                        self.soul_handler.queue_message(response)
+                                        response = None
+
+                                    if not enabled:
+                                        continue
+
+                                    # Post pending responses before a possibly long command
+                                    self.soul_handler.queue_message(
+                                        f'Processing :{cmd} command @{message_info.nickname}')
+                                    self.soul_handler.flush_messages()
+
+                                    match command_info.prefix:
+                                        case 'invite':
+                                            # Get party ID parameter
+                                            if len(command_info.parameters) > 0:
+                                                party_id = command_info.parameters[0]
+                                                # Try to join party
+                                                result = self.soul_handler.invite_user(message_info, party_id)
+
+                                                if 'error' in result:
+                                                    # Use error template if invitation failed
+                                                    response = command_info.error_template.format(
+                                                        party_id=result['party_id'],
+                                                        error=result['error']
+                                                    )
+                                                else:
+                                                    # Use success template if invitation succeeded
+                                                    response = command_info.response_template.format(
+                                                        party_id=result['party_id'],
+                                                        user=message_info.nickname
+                                                    )
                                             else:
-                                                # Use success template if invitation succeeded
-                                                response = command_info['response_template'].format(
-                                                    party_id=result['party_id'],
-                                                    user=message_info.nickname
+                                                response = command_info.error_template.format(
+                                                    party_id='unknown',
+                                                    error='Missing party ID parameter'
                                                 )
-                                        else:
-                                            response = command_info['error_template'].format(
-                                                party_id='unknown',
-                                                error='Missing party ID parameter'
-                                            )
-                                    case _:
-                                        command = self._check_command(cmd)
-                                        if command:
-                                            response = self._process_command(command, message_info, command_info)
-                                        else:
-                                            self.soul_handler.log_error(f"Unknown command: {cmd}")
-                # Check KTV lyrics if mode is enabled
-                if self.music_handler.ktv_mode:
-                    res = self.music_handler.check_ktv_lyrics()
-                    if 'error' in res:
-                        lyrics = f'stopped KTV mode for {res["error"]}'
-                    else:
-                        lyrics = res['lyrics']
-                else:
+                                        case _:
+                                            command = self._check_command(cmd)
+                                            if command:
+                                                self._submit_command(command, message_info, command_info)
+                                            else:
+                                                self.soul_handler.log_error(f"Unknown command: {cmd}")
+                    # Check KTV lyrics if mode is enabled
+                    if self.music_handler.ktv_mode:
+                        res = self.music_handler.check_ktv_lyrics()
+                        if res and 'error' in res:
+                            lyrics = f'stopped KTV mode for {res["error"]}'
+                        elif res:
+                            lyrics = res['lyrics']
+
+                    # Post everything queued during this tick in one go
+                    self.soul_handler.flush_messages()
+
+                if self.checkpoint.due():
+                    self._save_checkpoint(enabled)
+
+                if not preloaded:
+                    # Heavy optional modules load in the background once the first tick is out
+                    preload(self.logger)
+                    preloaded = True
+
+                if not self.music_handler.ktv_mode:
                     time.sleep(1)
+                else:
+                    # Lyrics follow the playback position, waiting commands get a faster tick
+                    time.sleep(0.1 if self.executor.busy() else 0.5)
 
                 # clear error once back to normal
                 error_count = 0
                 if self.soul_handler.error_count > 9:
                     self.soul_handler.log_error(
                         f'[start_monitoring]too many errors, try to rerun, traceback: {traceback.format_exc()}')
+                    self._stop(enabled)
                     return False
             except KeyboardInterrupt:
                 if not self.in_console_mode:
@@ -319,6 +594,7 @@ class AppController:
                 else:
                     print("\nStopping the monitoring...")
                     self.is_running = False
+                    self._stop(enabled)
                     return True
             except StaleElementReferenceException as e:
                 self.soul_handler.log_error(f'[start_monitoring]stale element, traceback: {traceback.format_exc()}')
@@ -327,4 +603,5 @@ class AppController:
                 error_count += 1
                 if error_count > 9:
                     self.is_running = False
+                    self._stop(enabled)
                     return False
@@ -1,8 +1,24 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
 import time
 import re
 
+# Enter notifications such as "Tom进来陪你聊天啦"
+USER_ENTER_PATTERN = re.compile(r"^(.+)(?:进来陪你聊天啦|坐着.+来啦).*?$")
+
+# Resources a command can touch, see CommandExecutor
+SHELL = 'shell'  # Device shell commands and key events
+SOUL_UI = 'soul_ui'
+MUSIC_UI = 'music_ui'
+
 class BaseCommand(ABC):
+    # Resources used by process(), commands sharing none run concurrently
+    resources = (SOUL_UI, MUSIC_UI, SHELL)
+    # Seconds between update() calls, None to call it every tick
+    update_interval = None
+    # Events that make update() due right away, see UpdateScheduler.notify
+    update_events = ()
+
     def __init__(self, controller):
         self.controller = controller
         self.soul_handler = controller.soul_handler
@@ -34,6 +50,37 @@ class BaseCommand(ABC):
         # Override this method in commands that need updates
         pass
 
+    def next_update_due(self, now):
+        """Time update() should run next, asked after every run
+        Args:
+            now: float, current timestamp
+        Returns:
+            float: Timestamp, None to wait for wake_update() or an event
+        """
+        return now + (self.update_interval or 0)
+
+    def wake_update(self):
+        """Ask the scheduler to run update() on the next tick"""
+        scheduler = getattr(self.controller, 'update_scheduler', None)
+        if scheduler:
+            scheduler.wake(self)
+
+    def checkpoint(self):
+        """State to keep across restarts, saved by the controller from time to time
+        Returns:
+            dict: JSON serializable state, empty for commands without any
+        """
+        return {}
+
+    def restore(self, state):
+        """Take back state returned by checkpoint() in an earlier run
+        Args:
+            state: dict, as returned by checkpoint()
+        Returns:
+            None
+        """
+        pass
+
     def user_enter(self, username: str):
         """Called when a user enters the party
         Args:
@@ -52,8 +99,52 @@ class BaseCommand(ABC):
         Returns:
             tuple[bool, str]: (is_enter_message, username)
         """
-        pattern = r"^(.+)(?:进来陪你聊天啦|坐着.+来啦).*?$"
-        match = re.match(pattern, message)
+        match = USER_ENTER_PATTERN.match(message)
         if match:
             return True, match.group(1)
-        return False, "" 
\ No newline at end of file
+        return False, "" 
+
+class CooldownCommand(BaseCommand):
+    """Command applying one pending value at a time, at most once per cooldown
+
+    Subclasses keep the value in current_<cooldown_item> and
+    next_<cooldown_item>, the time it was last applied in last_update_time
+    and the cooldown in cooldown_minutes.
+    """
+    # Name of the value, e.g. 'title' for current_title and next_title
+    cooldown_item = None
+    cooldown_minutes = 15
+
+    def __init__(self, controller):
+        super().__init__(controller)
+        self.last_update_time = None
+        setattr(self, f'current_{self.cooldown_item}', None)
+        setattr(self, f'next_{self.cooldown_item}', None)
+
+    def pending_value(self):
+        """Value waiting for the cooldown, None if there is none"""
+        return getattr(self, f'next_{self.cooldown_item}')
+
+    def next_update_due(self, now):
+        """Due once the cooldown has passed, idle while nothing is pending"""
+        if not self.pending_value():
+            return None
+        if not self.last_update_time:
+            return now
+        return self.last_update_time.timestamp() + self.cooldown_minutes * 60
+
+    def checkpoint(self):
+        """Cooldown and pending value, so a restart does not reset the cooldown"""
+        return {
+            'last_update_time': self.last_update_time.isoformat() if self.last_update_time else None,
+            'current': getattr(self, f'current_{self.cooldown_item}'),
+            'next': self.pending_value(),
+        }
+
+    def restore(self, state):
+        if state.get('last_update_time'):
+            self.last_update_time = datetime.fromisoformat(state['last_update_time'])
+        setattr(self, f'current_{self.cooldown_item}', state.get('current'))
+        setattr(self, f'next_{self.cooldown_item}', state.get('next'))
+        if self.pending_value():
+            self.wake_update()
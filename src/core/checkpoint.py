@@ -0,0 +1,72 @@
+import json
+import os
+import time
+
+
+class Checkpoint:
+    """In-memory state of the controller saved as JSON, so a cold restart resumes it
+
+    Holds the Appium session id, cooldown timers of commands and the keys of
+    seen messages; everything else is either rebuilt cheaply or already in
+    the database.
+    """
+
+    def __init__(self, path='data/checkpoint.json', interval=30):
+        self.path = path
+        self.interval = interval
+        self.last_save = 0.0
+        self.saves = 0
+        self.failures = 0
+        self.restored_age = None  # Seconds the loaded checkpoint was old
+
+    def load(self, max_age=None):
+        """Read the last checkpoint
+        Args:
+            max_age: float, seconds after which a checkpoint is too old to resume
+        Returns:
+            dict: Saved state, empty if there is none or it cannot be read
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        age = time.time() - state.get('saved_at', 0)
+        if max_age is not None and age > max_age:
+            return {}
+        self.restored_age = round(age)
+        return state
+
+    def due(self, now=None):
+        """Whether the periodic save should run"""
+        return (now or time.time()) - self.last_save >= self.interval
+
+    def save(self, state):
+        """Write state atomically, a crash mid-write keeps the previous checkpoint
+        Args:
+            state: dict, JSON serializable
+        Returns:
+            bool: True on success
+        """
+        state = dict(state, saved_at=time.time())
+        temp_path = f'{self.path}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except (OSError, TypeError, ValueError):
+            self.failures += 1
+            return False
+        self.last_save = state['saved_at']
+        self.saves += 1
+        return True
+
+    def stats(self):
+        """Save counters and age of the restored checkpoint"""
+        return {
+            'saves': self.saves,
+            'failures': self.failures,
+            'last_save_age': round(time.time() - self.last_save) if self.last_save else None,
+            'restored_age': self.restored_age,
+        }
@@ -0,0 +1,174 @@
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from .base_command import SHELL, SOUL_UI, MUSIC_UI
+
+# Lock guarding each command resource. Soul and QQ Music share the single
+# device screen, so their UI work can never overlap, while shell commands
+# only contend with each other.
+RESOURCE_LOCKS = {
+    SHELL: 'shell',
+    SOUL_UI: 'screen',
+    MUSIC_UI: 'screen',
+}
+
+
+class CommandExecutor:
+    """Runs commands on a worker pool, serializing only those sharing a resource
+
+    Commands declare the resources they touch in BaseCommand.resources. A
+    command waits for the locks of its resources, so e.g. :vol runs while
+    :playlist is still searching, and the monitoring loop keeps reading chat
+    whenever no command holds the screen.
+    """
+
+    def __init__(self, logger, max_workers=4, on_screen_handover=None):
+        self.logger = logger
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='command')
+        self.locks = {name: threading.RLock() for name in set(RESOURCE_LOCKS.values())}
+        self.lock = threading.Lock()
+        # Called when another thread takes the screen, whose actions are unknown to this one
+        self.on_screen_handover = on_screen_handover
+        self.screen_owner = None  # Thread that took the screen lock last
+        self.handovers = 0
+        self.running = {}  # future -> (command prefix, its resources)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    def lock_names(self, resources):
+        """Lock names for resources, in a fixed order to avoid deadlocks"""
+        return sorted({RESOURCE_LOCKS[resource] for resource in resources})
+
+    @contextmanager
+    def hold(self, resources, on_wait=None, poll=1.0):
+        """Hold the locks of resources for the duration of the block
+        Args:
+            resources: iterable of SHELL, SOUL_UI, MUSIC_UI
+            on_wait: callable, run every poll seconds while a command holds a lock
+            poll: float, seconds between on_wait calls
+        """
+        names = self.lock_names(resources)
+        for name in names:
+            lock = self.locks[name]
+            if on_wait is None:
+                lock.acquire()
+                continue
+            while not lock.acquire(timeout=poll):
+                on_wait()
+        if 'screen' in names:
+            self._took_screen()
+        try:
+            yield
+        finally:
+            for name in reversed(names):
+                self.locks[name].release()
+
+    def _took_screen(self):
+        owner = threading.get_ident()
+        if owner == self.screen_owner:
+            return
+        self.screen_owner = owner
+        self.handovers += 1
+        if self.on_screen_handover:
+            self.on_screen_handover()
+
+    def submit(self, prefix, resources, func, on_done):
+        """Run func on a worker once its resources are free
+        Args:
+            prefix: str, command prefix for logs and stats
+            resources: iterable of resources func touches
+            func: callable returning the command response
+            on_done: callable receiving the response
+        Returns:
+            Future: Future of the worker run
+        """
+        queued_at = time.time()
+
+        def run():
+            with self.hold(resources):
+                started_at = time.time()
+                try:
+                    result = func()
+                finally:
+                    with self.lock:
+                        self.total_wait += started_at - queued_at
+                        self.total_run += time.time() - started_at
+            on_done(result)
+            return result
+
+        with self.lock:
+            self.submitted += 1
+            future = self.pool.submit(run)
+            self.running[future] = (prefix, frozenset(resources))
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self.lock:
+            prefix, _ = self.running.pop(future, (None, None))
+            if future.cancelled():
+                # Dropped by shutdown(cancel_futures=True) before it ran
+                self.cancelled += 1
+                return
+            if future.exception():
+                self.failed += 1
+            else:
+                self.completed += 1
+        if future.exception():
+            self.logger.error(f"Command :{prefix} failed in worker: "
+                              f"{''.join(traceback.format_exception(future.exception()))}")
+
+    def busy(self, resources=None):
+        """Prefixes of commands queued or running
+        Args:
+            resources: iterable of resources, only count commands touching one of them
+        Returns:
+            list: Command prefixes
+        """
+        with self.lock:
+            return [prefix for prefix, claimed in self.running.values()
+                    if resources is None or claimed.intersection(resources)]
+
+    def shutdown(self, wait=False):
+        self.pool.shutdown(wait=wait, cancel_futures=True)
+
+    def restart(self, timeout=60):
+        """Take commands again after shutdown()
+
+        Commands still running from before keep their resource locks, which
+        stay the same objects, so they never overlap new ones on the screen.
+        Args:
+            timeout: float, seconds to wait for them to finish first
+        Returns:
+            list: Prefixes of commands still running after the wait
+        """
+        self.shutdown()
+        with self.lock:
+            leftovers = list(self.running)
+        if leftovers:
+            wait(leftovers, timeout=timeout)
+        with self.lock:
+            self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='command')
+        return self.busy()
+
+    def stats(self):
+        """Worker counters and average wait/run time per command"""
+        done = self.completed + self.failed
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'screen_handovers': self.handovers,
+            'in_flight': self.busy(),
+            'avg_wait': round(self.total_wait / done, 3) if done else 0,
+            'avg_run': round(self.total_run / done, 3) if done else 0,
+        }
@@ -0,0 +1,137 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from collections import defaultdict
+
+from .base_command import BaseCommand
+
+
+class HookStats:
+    """Runtime counters of one update hook"""
+    __slots__ = ('runs', 'errors', 'total_time', 'max_time', 'last_run')
+
+    def __init__(self):
+        self.runs = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_run = None
+
+    def as_dict(self):
+        return {
+            'runs': self.runs,
+            'errors': self.errors,
+            'avg_time': round(self.total_time / self.runs, 4) if self.runs else 0,
+            'max_time': round(self.max_time, 4),
+            'last_run': time.strftime('%H:%M:%S', time.localtime(self.last_run)) if self.last_run else None,
+        }
+
+
+class UpdateScheduler:
+    """Runs BaseCommand.update hooks only when they are due
+
+    Each command says when its update should run next through
+    next_update_due (an interval by default) or asks to run on an event.
+    Due times sit in a heap, so a tick where nothing is due costs one peek.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.heap = []  # (due, seq, command)
+        self.due = {}  # command -> due time of its live heap entry, None while idle
+        self.names = {}  # command -> module name
+        self.hook_stats = {}  # module name -> HookStats
+        self.listeners = defaultdict(list)  # event -> commands
+        self.seq = itertools.count()
+        self.lock = threading.Lock()
+
+    def register(self, name, command):
+        """Schedule update hook of command
+        Args:
+            name: str, command module name
+            command: BaseCommand instance
+        Returns:
+            bool: False if the command does not override update
+        """
+        if type(command).update is BaseCommand.update:
+            return False
+        self.names[command] = name
+        self.hook_stats[name] = HookStats()
+        for event in command.update_events:
+            self.listeners[event].append(command)
+        # First run on the next tick, like before scheduling existed
+        self._schedule(command, time.time())
+        return True
+
+    def _schedule(self, command, due):
+        with self.lock:
+            self.due[command] = due
+            if due is not None:
+                heapq.heappush(self.heap, (due, next(self.seq), command))
+
+    def wake(self, command):
+        """Make update of command due on the next tick"""
+        if command in self.names:
+            self._schedule(command, time.time())
+
+    def notify(self, event):
+        """Make updates listening to event due on the next tick"""
+        for command in self.listeners.get(event, ()):
+            self._schedule(command, time.time())
+
+    def _pop_due(self, now):
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                due, _, command = heapq.heappop(self.heap)
+                # Skip entries superseded by a later wake or reschedule
+                if self.due.get(command) == due:
+                    self.due[command] = None
+                    return command
+        return None
+
+    def run_due(self):
+        """Run every update hook that is due
+        Returns:
+            int: Number of hooks run
+        """
+        now = time.time()
+        count = 0
+        while True:
+            command = self._pop_due(now)
+            if command is None:
+                return count
+
+            name = self.names[command]
+            stats = self.hook_stats[name]
+            start = time.perf_counter()
+            try:
+                command.update()
+            except Exception:
+                stats.errors += 1
+                self.logger.error(f"Error updating command {name}: {traceback.format_exc()}")
+            elapsed = time.perf_counter() - start
+            stats.runs += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.last_run = time.time()
+            count += 1
+
+            # A wake during update keeps its earlier due time
+            if self.due.get(command) is None:
+                self._schedule(command, command.next_update_due(time.time()))
+
+    def next_due(self, command):
+        """Due time of command update, None while waiting for a wake or event"""
+        return self.due.get(command)
+
+    def stats(self):
+        """Per hook runtime stats and next due time"""
+        report = {}
+        for command, name in self.names.items():
+            entry = self.hook_stats[name].as_dict()
+            due = self.due.get(command)
+            entry['next_due'] = round(due - time.time(), 1) if due is not None else None
+            report[name] = entry
+        return report
@@ -0,0 +1,284 @@
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from selenium.common import WebDriverException
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+# Seconds one WebDriver call may take, by selenium command name
+DEFAULT_DEADLINES = {
+    'getPageSource': 30,
+    'executeScript': 30,  # mobile: shell
+    'quit': 10,
+}
+
+# Selenium and Appium commands that change what is on screen
+UI_MUTATIONS = {
+    'clickElement',
+    'sendKeysToElement',
+    'clearElement',
+    'goBack',
+    'actions',  # swipe, tap and other W3C actions
+    'touchAction',
+    'multiTouchAction',
+    'pressKeyCode',
+    'longPressKeyCode',
+    'hideKeyboard',
+    'activateApp',
+    'terminateApp',
+}
+
+
+class DeadlineExceeded(WebDriverException):
+    """A WebDriver call did not answer within its deadline
+
+    A WebDriverException, so the monitoring loop counts it like any other
+    driver error.
+    """
+
+
+class DriverDeadlines:
+    """Per-call deadlines on driver.execute, which every WebDriver call goes through
+
+    Calls run on a small worker pool while the caller waits with a timeout.
+    A call that misses its deadline is abandoned on its worker; the caller
+    gets DeadlineExceeded right away instead of hanging the polling thread.
+    The socket timeout of the HTTP connection ends an abandoned call later
+    on, and the pool is replaced when abandoned calls take all its workers.
+
+    Session creation runs inside the driver constructor, before attach(), so
+    only the HTTP timeout bounds it.
+
+    Every call in UI_MUTATIONS runs on_mutation afterwards, whether it was
+    issued by a handler, a command or an element, so caches of the screen
+    never outlive a change to it.
+    """
+
+    def __init__(self, default=20, deadlines=None, workers=8, http_timeout=120):
+        self.default = default
+        self.deadlines = dict(DEFAULT_DEADLINES, **(deadlines or {}))
+        self.workers = workers
+        # Class wide, applies to every connection created from now on, so to the
+        # connection of each session the controller opens
+        RemoteConnection.set_timeout(http_timeout)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='driver')
+        self.lock = threading.Lock()
+        self.pending = {}  # Future of each call in flight -> its abort future
+        self.abandoned = set()  # Futures of calls past their deadline still on a worker
+        self.calls = 0
+        self.exceeded = Counter()  # command -> missed deadlines
+        self.aborted = 0
+        self.pool_resets = 0
+        self.on_mutation = None  # Called after each UI mutation
+
+    def attach(self, driver):
+        """Route calls of a driver through the deadlines
+        Returns:
+            webdriver.Remote: The same driver
+        """
+        execute = driver.execute
+
+        def execute_with_deadline(driver_command, params=None):
+            try:
+                return self.call(driver_command, execute, driver_command, params)
+            finally:
+                # Also after a failed or timed out call, which may have gone through
+                if driver_command in UI_MUTATIONS and self.on_mutation:
+                    self.on_mutation()
+
+        driver.execute = execute_with_deadline
+        return driver
+
+    def call(self, name, func, *args):
+        """Run func(*args) within the deadline of name
+        Raises:
+            DeadlineExceeded: when the deadline passes or the watchdog aborts the call
+        """
+        deadline = self.deadlines.get(name, self.default)
+        with self.lock:
+            future = self.pool.submit(func, *args)
+            abort = Future()  # Completed by abort_pending
+            self.calls += 1
+            self.pending[future] = abort
+        try:
+            done, _ = wait((future, abort), timeout=deadline, return_when=FIRST_COMPLETED)
+            if future in done:
+                return future.result()
+            # Drop the call if it never got a worker, otherwise leave it to finish on its own
+            if not future.cancel():
+                self._abandon(future)
+            if abort in done:
+                raise DeadlineExceeded(f'{name} aborted by the watchdog')
+            with self.lock:
+                self.exceeded[name] += 1
+            raise DeadlineExceeded(f'{name} took longer than {deadline}s')
+        finally:
+            with self.lock:
+                self.pending.pop(future, None)
+
+    def _abandon(self, future):
+        """Keep track of a call left running, replacing the pool once they fill it"""
+        with self.lock:
+            self.abandoned.add(future)
+            full = len(self.abandoned) >= self.workers
+        future.add_done_callback(self._release)
+        if full:
+            self.reset()
+
+    def _release(self, future):
+        with self.lock:
+            self.abandoned.discard(future)
+
+    def reset(self):
+        """Move new calls to a fresh pool, leaving hung calls on the old one
+
+        Called when the pool is full of abandoned calls and before a new
+        session is created.
+        Returns:
+            int: Number of abandoned calls left behind
+        """
+        with self.lock:
+            old_pool = self.pool
+            self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='driver')
+            left = len(self.abandoned)
+            # The old workers end with their socket timeouts
+            self.abandoned = set()
+            self.pool_resets += 1
+        old_pool.shutdown(wait=False, cancel_futures=True)
+        return left
+
+    def abort_pending(self):
+        """Make every caller waiting on a driver call give up now
+        Returns:
+            int: Number of calls aborted
+        """
+        with self.lock:
+            aborts = list(self.pending.values())
+        aborted = 0
+        for abort in aborts:
+            if not abort.done():
+                abort.set_result(None)
+                aborted += 1
+        with self.lock:
+            self.aborted += aborted
+        return aborted
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Call counters and missed deadlines per command"""
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'in_flight': len(self.pending),
+                'exceeded': dict(self.exceeded),
+                'aborted': self.aborted,
+                'abandoned': len(self.abandoned),
+                'pool_resets': self.pool_resets,
+            }
+
+
+class Watchdog:
+    """Detects stalled iterations of the monitoring loop and recovers step by step
+
+    The loop calls beat() once per tick, and while it waits for a command to
+    release the screen. When no beat comes for stall_after
+    seconds, the next recovery action runs; every further stall_after
+    seconds without a beat escalates to the next one:
+        abort_calls: fail the driver calls the loop is waiting on
+        relaunch_app: bring the Soul chat activity back through the shell
+        reset_session: ask the controller for a new Appium session
+    """
+
+    ACTIONS = ('abort_calls', 'relaunch_app', 'reset_session')
+
+    def __init__(self, controller, stall_after=60, check_interval=5):
+        self.controller = controller
+        self.stall_after = stall_after
+        self.check_interval = check_interval
+        self.last_beat = time.time()
+        self.level = 0  # Recovery actions taken in the current stall
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+
+        self.stalls = 0
+        self.total_stall = 0.0
+        self.max_stall = 0.0
+        self.recoveries = Counter()  # action -> times taken
+
+    def start(self):
+        self.last_beat = time.time()
+        self.level = 0
+        self.running = True
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name='watchdog', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def beat(self):
+        """Mark the loop as alive, ending a stall if there was one"""
+        now = time.time()
+        with self.lock:
+            if self.level:
+                # Stall lasted from the last beat until now
+                duration = now - self.last_beat
+                self.stalls += 1
+                self.total_stall += duration
+                self.max_stall = max(self.max_stall, duration)
+                self.controller.logger.warning(
+                    f"Monitoring loop recovered after {duration:.1f}s, {self.level} recovery action(s)")
+                self.level = 0
+            self.last_beat = now
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.check_interval)
+            if self.running:
+                self.check()
+
+    def check(self):
+        """Run the next recovery action if the loop has stalled long enough"""
+        with self.lock:
+            stalled = time.time() - self.last_beat
+            if stalled < self.stall_after * (self.level + 1) or self.level >= len(self.ACTIONS):
+                return
+            action = self.ACTIONS[self.level]
+            self.level += 1
+        self.controller.logger.error(f"Monitoring loop stalled for {stalled:.0f}s, trying {action}")
+        self.recoveries[action] += 1
+        try:
+            getattr(self, action)()
+        except Exception:
+            self.controller.logger.error(f"Recovery {action} failed: {traceback.format_exc()}")
+
+    def abort_calls(self):
+        self.controller.deadlines.abort_pending()
+
+    def relaunch_app(self):
+        soul = self.controller.config['soul']
+        self.controller.shell.run(f"am start -n {soul['package_name']}/{soul['chat_activity']}")
+        self.controller.foreground_tracker.mark_uncertain()
+        self.controller.presence_probe.invalidate()
+        self.controller.deadlines.abort_pending()
+
+    def reset_session(self):
+        # The loop returns on its next check, main then warm restarts with a new session
+        self.controller.session_reset_requested = True
+        self.controller.deadlines.abort_pending()
+
+    def stats(self):
+        """Stall durations and recovery counters"""
+        return {
+            'stalls': self.stalls,
+            'total_stall': round(self.total_stall, 1),
+            'max_stall': round(self.max_stall, 1),
+            'stalled_for': round(time.time() - self.last_beat, 1) if self.level else 0,
+            'recoveries': dict(self.recoveries),
+        }
@@ -0,0 +1,272 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from selenium.common.exceptions import WebDriverException
+
+
+@dataclass(frozen=True)
+class LyricSheet:
+    """Lyric lines of one song with a timing estimate
+
+    The poster view has no timestamps, so line times are spread evenly from
+    one anchor: the line that was current when the sheet was captured.
+    """
+    lines: tuple
+    anchor_index: int  # Line highlighted at capture
+    anchor_position: int  # Playback position in milliseconds at capture
+    ms_per_line: float
+
+    @classmethod
+    def estimate(cls, lines, anchor_index, anchor_position, default_ms_per_line=4000):
+        """Build a sheet, estimating the line rate from the anchor
+        Args:
+            lines: list of lyric lines
+            anchor_index: int, index of the current line at capture
+            anchor_position: int, playback position at capture in milliseconds
+            default_ms_per_line: float, rate used when the anchor tells nothing
+        Returns:
+            LyricSheet: Sheet with timing estimate
+        """
+        # The media session has no song length, so the rate comes from the lines sung so far
+        if anchor_index > 0 and anchor_position > 0:
+            ms_per_line = anchor_position / anchor_index
+        else:
+            ms_per_line = default_ms_per_line
+        return cls(tuple(lines), anchor_index, anchor_position, ms_per_line)
+
+    def line_at(self, position):
+        """Index of the line sung at a playback position"""
+        index = self.anchor_index + int((position - self.anchor_position) / self.ms_per_line)
+        return max(0, min(index, len(self.lines) - 1))
+
+
+def merge_lines(collected, page):
+    """Append the lines of a page that overlap the end of collected
+    Args:
+        collected: list of lines read so far, extended in place
+        page: list of lines visible after a scroll
+    Returns:
+        int: Number of new lines
+    """
+    for overlap in range(min(len(collected), len(page)), 0, -1):
+        if collected[-overlap:] == page[:overlap]:
+            new_lines = page[overlap:]
+            break
+    else:
+        new_lines = page
+    collected.extend(new_lines)
+    return len(new_lines)
+
+
+class KtvEngine:
+    """Lyrics for KTV mode from one capture per song
+
+    The lyric poster is opened once when a song starts, the whole sheet is
+    read by scrolling with one page source per screen, and from then on the
+    current line follows the playback position from the playback watcher.
+    """
+
+    def __init__(self, handler, lookahead=4, max_scrolls=30, cache_size=16):
+        self.handler = handler
+        self.lookahead = lookahead
+        self.max_scrolls = max_scrolls
+        self.cache_size = cache_size
+        self.sheets = OrderedDict()  # (song, singer, album) -> LyricSheet
+        self.song_key = None
+        self.sheet = None
+        self.emitted_until = 0  # Lines before this index were sent
+
+        self.captures = 0
+        self.capture_time = 0.0
+        self.cache_hits = 0
+        self.emits = 0
+
+    def reset(self):
+        """Start over on the next tick, e.g. when KTV mode is turned on"""
+        self.song_key = None
+        self.sheet = None
+
+    def _nodes(self, snapshot, element_key, parent=None):
+        locator_type, value = self.handler._get_locator(element_key)
+        return snapshot.find_all(locator_type, value, parent) or []
+
+    def _box_lines(self, snapshot):
+        """Read (lines, index of current line or None) from the poster on screen"""
+        lines = []
+        current = None
+        for box in self._nodes(snapshot, 'lyrics_box'):
+            highlighted = self._nodes(snapshot, 'current_lyrics', box)
+            line = highlighted or self._nodes(snapshot, 'lyrics_line', box)
+            if not line:
+                continue
+            if highlighted:
+                current = len(lines)
+            lines.append(line[0].get('text', ''))
+        return lines, current
+
+    def _swipe(self, up):
+        size = self.handler.driver.get_window_size()
+        start, end = (0.60, 0.35) if up else (0.35, 0.60)
+        self.handler.driver.swipe(
+            size['width'] // 2,
+            int(size['height'] * start),
+            size['width'] // 2,
+            int(size['height'] * end),
+            400
+        )
+        self.handler.ui_changed()
+
+    def _open_poster(self):
+        """Open the lyric poster of the playing song
+        Returns:
+            dict: Error if the poster cannot be opened, None on success
+        """
+        handler = self.handler
+        if not handler.switch_to_app():
+            handler.ktv_mode = False
+            return {'error': 'Failed to switch to app'}
+
+        close_poster = handler.probe_element_plus('close_poster')
+        if close_poster:
+            close_poster.click()
+
+        lyrics_tool = handler.wait_for_element_clickable_plus('lyrics_tool')
+        if not lyrics_tool:
+            handler.ktv_mode = False
+            return {'error': 'Cannot find lyrics tool'}
+        lyrics_tool.click()
+
+        lyrics_poster = handler.wait_for_element_clickable_plus('lyrics_poster')
+        if not lyrics_poster:
+            info = handler.skip_song()
+            return {'error': f'Skip {info['song']} by {info['singer']} due to no lyrics poster option'}
+        lyrics_poster.click()
+
+        if not handler.wait_for_element_clickable_plus('close_poster'):
+            handler.ktv_mode = False
+            return {'error': 'No close poster'}
+        return None
+
+    def capture(self, state):
+        """Read the whole lyric sheet of the playing song
+        Args:
+            state: PlaybackState of the song
+        Returns:
+            tuple: (LyricSheet or None, error dict or None)
+        """
+        start = time.time()
+        error = self._open_poster()
+        if error:
+            return None, error
+        handler = self.handler
+        try:
+            # Back to the first line, then read the sheet downwards
+            first_line = None
+            for _ in range(self.max_scrolls):
+                lines, _ = self._box_lines(handler.snapshot())
+                if not lines or lines[0] == first_line:
+                    break
+                first_line = lines[0]
+                self._swipe(up=False)
+
+            collected = []
+            anchor_index = None
+            position = None
+            for _ in range(self.max_scrolls):
+                lines, current = self._box_lines(handler.snapshot())
+                added = merge_lines(collected, lines)
+                if current is not None and anchor_index is None:
+                    # Collected ends with the page, position is read when the highlight is seen
+                    anchor_index = len(collected) - len(lines) + current
+                    # Nothing parsed from the media session yet leaves the anchor to the fallback below
+                    latest = handler.playback_watcher.current
+                    position = latest.position_now() if latest else None
+                elif not added:
+                    break
+                self._swipe(up=True)
+
+            close_poster = handler.probe_element_plus('close_poster')
+            if close_poster:
+                close_poster.click()
+        except WebDriverException as e:
+            handler.logger.error(f"Failed to read lyric sheet: {str(e)}")
+            handler.ktv_mode = False
+            return None, {'error': 'Cannot read lyrics'}
+
+        self.captures += 1
+        self.capture_time += time.time() - start
+        if not collected:
+            handler.ktv_mode = False
+            return None, {'error': 'lyrics is unavailable'}
+
+        if anchor_index is None or position is None:
+            anchor_index, position = 0, state.position_now() or 0
+        sheet = LyricSheet.estimate(collected, anchor_index, position)
+        handler.logger.info(f"Captured {len(collected)} lyric lines of {state.song}, "
+                            f"line {anchor_index} at {position}ms, {sheet.ms_per_line:.0f}ms per line")
+        return sheet, None
+
+    def _load(self, state, song_key):
+        """Get the sheet of a song from the cache or the poster"""
+        sheet = self.sheets.get(song_key)
+        if sheet is not None:
+            self.cache_hits += 1
+            self.sheets.move_to_end(song_key)
+            return sheet, None
+        sheet, error = self.capture(state)
+        if sheet is not None:
+            # The sheet is open anyway, keep it for :lyrics
+            self.handler.lyrics_store.fill(*song_key, '\n'.join(sheet.lines))
+            self.sheets[song_key] = sheet
+            if len(self.sheets) > self.cache_size:
+                self.sheets.popitem(last=False)
+        return sheet, error
+
+    def tick(self):
+        """Lines to post now
+        Returns:
+            dict: {'lyrics': text} when lines are due, {'error': ...} on failure, None otherwise
+        """
+        state = self.handler.playback_watcher.current
+        if state is None or state.song == 'Unknown':
+            return None
+
+        song_key = (state.song, state.singer, state.album)
+        if song_key != self.song_key:
+            sheet, error = self._load(state, song_key)
+            # A failed song is not captured again on every tick
+            self.song_key = song_key
+            self.sheet = sheet
+            if error:
+                return error
+            self.emitted_until = sheet.line_at(state.position_now() or 0) + 1
+            return self._emit(self.emitted_until)
+
+        if self.sheet is None or not state.playing:
+            return None
+        index = self.sheet.line_at(state.position_now() or 0)
+        # Send the next lines once the last sent one is being sung
+        if index + 1 >= self.emitted_until and self.emitted_until < len(self.sheet.lines):
+            return self._emit(index + 1)
+        return None
+
+    def _emit(self, start):
+        lines = self.sheet.lines[start:start + self.lookahead]
+        if not lines:
+            return None
+        self.emitted_until = start + len(lines)
+        self.emits += 1
+        return {'lyrics': '\n'.join(lines)}
+
+    def stats(self):
+        """Capture and emit counters"""
+        return {
+            'captures': self.captures,
+            'avg_capture_time': round(self.capture_time / self.captures, 2) if self.captures else 0,
+            'cache_hits': self.cache_hits,
+            'cached_sheets': len(self.sheets),
+            'emits': self.emits,
+            'song': self.song_key[0] if self.song_key else None,
+            'ms_per_line': round(self.sheet.ms_per_line) if self.sheet else None,
+        }
@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+from typing import NamedTuple
+
+from .search_cache import normalize_query
+
+
+class StoredLyrics(NamedTuple):
+    """Lyrics of one song as stored"""
+    raw_text: str
+    groups: list  # Default process_lyrics groups, None until first chunked
+    fetched_at: float
+
+
+def song_key(song, singer, album):
+    """Normalized song identity, e.g. ('晴天', '周杰伦', '叶惠美') -> '晴天\\x1f周杰伦\\x1f叶惠美'"""
+    return '\x1f'.join(normalize_query(part or '') for part in (song, singer, album))
+
+
+class LyricsStore:
+    """Lyrics in the lyrics table of DBHelper, keyed by song identity
+
+    Filled by :lyrics searches and by KTV sheet captures, so the lyrics of a
+    song are read from the UI at most once.
+    """
+
+    def __init__(self, db_helper):
+        self.db_helper = db_helper
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fills = 0
+
+    def get(self, song, singer, album):
+        """Look up lyrics of a song
+        Returns:
+            StoredLyrics or None if not stored
+        """
+        row = self.db_helper.get_lyrics(song_key(song, singer, album))
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        raw_text, groups, fetched_at = row
+        return StoredLyrics(raw_text, json.loads(groups) if groups else None, fetched_at)
+
+    def put(self, song, singer, album, raw_text, groups=None):
+        """Store lyrics of a song
+        Args:
+            song, singer, album: str, song identity
+            raw_text: str, lyrics with one line per row
+            groups: list of default message groups if already chunked
+        """
+        self.db_helper.put_lyrics(
+            song_key(song, singer, album),
+            song,
+            singer,
+            album,
+            raw_text,
+            json.dumps(groups, ensure_ascii=False) if groups is not None else None,
+            time.time()
+        )
+        with self.lock:
+            self.fills += 1
+
+    def fill(self, song, singer, album, raw_text):
+        """Store lyrics read on the side, unless the song already has some"""
+        if self.db_helper.get_lyrics(song_key(song, singer, album)) is None:
+            self.put(song, singer, album, raw_text)
+
+    def set_groups(self, song, singer, album, groups):
+        """Store the default groups of lyrics stored without them"""
+        self.db_helper.set_lyrics_groups(song_key(song, singer, album), json.dumps(groups, ensure_ascii=False))
+
+    def stats(self):
+        """Hit rate and fill counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': self.db_helper.count_lyrics(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            'fills': self.fills,
+        }
@@ -0,0 +1,118 @@
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass
+class QueueItem:
+    """One :next request"""
+    id: int
+    query: str
+    requester: str
+    song: str = None  # Set once the search is resolved
+    singer: str = None
+    album: str = None
+
+    @property
+    def resolved(self):
+        return self.song is not None
+
+
+class PlayQueue:
+    """Bot side play queue persisted in the play_queue table
+
+    Items are appended instantly and resolved in order, so unresolved items
+    form a suffix of the queue and the next one to resolve is found without
+    a scan. Length, head and next unresolved item are O(1).
+    """
+
+    def __init__(self, db_helper):
+        self.db_helper = db_helper
+        self.lock = threading.Lock()
+        self.items = deque()
+        self.unresolved = deque()
+        for row in db_helper.get_queue_items():
+            item = QueueItem(*row)
+            self.items.append(item)
+            if not item.resolved:
+                self.unresolved.append(item)
+
+        self.added = 0
+        self.resolved_count = 0
+        self.failed = 0
+        self.pushed = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, query, requester):
+        """Append a request
+        Args:
+            query: str, search query
+            requester: str, nickname of the requester
+        Returns:
+            tuple: (QueueItem, position in queue starting at 1)
+        """
+        item_id = self.db_helper.add_queue_item(query, requester)
+        item = QueueItem(item_id, query, requester)
+        with self.lock:
+            self.items.append(item)
+            self.unresolved.append(item)
+            self.added += 1
+            return item, len(self.items)
+
+    def peek(self):
+        """First item in the queue, None if empty"""
+        with self.lock:
+            return self.items[0] if self.items else None
+
+    def next_unresolved(self):
+        """First item whose search is not resolved yet, None if all are"""
+        with self.lock:
+            return self.unresolved[0] if self.unresolved else None
+
+    def resolve(self, item, playing_info):
+        """Record the song a queued search resolved to"""
+        self.db_helper.resolve_queue_item(item.id, playing_info['song'], playing_info['singer'], playing_info['album'])
+        with self.lock:
+            item.song = playing_info['song']
+            item.singer = playing_info['singer']
+            item.album = playing_info['album']
+            if self.unresolved and self.unresolved[0] is item:
+                self.unresolved.popleft()
+            self.resolved_count += 1
+
+    def _remove(self, item):
+        self.db_helper.delete_queue_item(item.id)
+        with self.lock:
+            if self.items and self.items[0] is item:
+                self.items.popleft()
+            else:
+                self.items.remove(item)
+            if self.unresolved and self.unresolved[0] is item:
+                self.unresolved.popleft()
+            elif item in self.unresolved:
+                self.unresolved.remove(item)
+
+    def drop(self, item):
+        """Remove an item whose search failed"""
+        self._remove(item)
+        self.failed += 1
+
+    def pop(self, item):
+        """Remove the head item after it was handed to QQ Music"""
+        self._remove(item)
+        self.pushed += 1
+
+    def stats(self):
+        """Queue length and item counters"""
+        head = self.peek()
+        return {
+            'length': len(self.items),
+            'unresolved': len(self.unresolved),
+            'head': head.query if head else None,
+            'added': self.added,
+            'resolved': self.resolved_count,
+            'failed': self.failed,
+            'pushed': self.pushed,
+        }
@@ -0,0 +1,238 @@
+import re
+import threading
+import time
+import traceback
+from collections import defaultdict
+from dataclasses import dataclass
+
+PLAYBACK_STATES = {
+    0: "None",
+    1: "Stopped",
+    2: "Paused",
+    3: "Playing",
+    4: "Fast Forwarding",
+    5: "Rewinding",
+    6: "Buffering",
+    7: "Error",
+    8: "Connecting",
+    9: "Skipping to Next",
+    10: "Skipping to Previous",
+    11: "Skipping to Queue Item"
+}
+
+# Sessions in dumpsys media_session start with "    <tag> <package>/<tag> (userId=0)"
+SESSION_HEADER_PATTERN = re.compile(r'^ {4}\S.*\(userId=\d+\)\s*$', re.M)
+METADATA_PATTERN = re.compile(r'metadata: size=\d+, description=(.*?)(?=\n|$)')
+STATE_PATTERN = re.compile(
+    r'state=PlaybackState {state=(\d+), position=(-?\d+)'
+    r'(?:, buffered position=-?\d+, speed=([\d.]+), updated=(\d+))?')
+UPTIME_PATTERN = re.compile(r'^([\d.]+) ')
+
+
+@dataclass(frozen=True)
+class PlaybackState:
+    """QQ Music playback state read from its media session"""
+    song: str = 'Unknown'
+    singer: str = 'Unknown'
+    album: str = 'Unknown'
+    state: str = 'Unknown'
+    position: int = None  # Milliseconds into the song at captured_at
+    speed: float = 1.0
+    captured_at: float = 0.0
+
+    @property
+    def playing(self):
+        return self.state == 'Playing'
+
+    def position_now(self):
+        """Position in milliseconds extrapolated to now, None if unknown"""
+        if self.position is None:
+            return None
+        if not self.playing:
+            return self.position
+        return self.position + int((time.time() - self.captured_at) * 1000 * self.speed)
+
+    def as_info(self):
+        """Playback info dict in the format get_playback_info always returned"""
+        return {
+            'song': self.song,
+            'singer': self.singer,
+            'album': self.album,
+            'state': self.state
+        }
+
+
+def find_session_block(dump, package):
+    """Cut the session block of package out of a media_session dump
+    Args:
+        dump: str, dumpsys media_session output
+        package: str, package name of the session owner
+    Returns:
+        str: Session block, the whole dump if no block matches
+    """
+    marker = f'package={package}'
+    position = dump.find(marker)
+    if position < 0:
+        return dump
+    start = 0
+    end = len(dump)
+    for header in SESSION_HEADER_PATTERN.finditer(dump):
+        if header.start() <= position:
+            start = header.start()
+        else:
+            end = header.start()
+            break
+    return dump[start:end]
+
+
+def parse_playback_state(output, package, captured_at=None):
+    """Parse the media_session shell query output into a PlaybackState
+    Args:
+        output: str, uptime line followed by dumpsys media_session
+        package: str, QQ Music package name
+        captured_at: float, host time of the read
+    Returns:
+        PlaybackState: Parsed state
+    """
+    captured_at = captured_at or time.time()
+    uptime_match = UPTIME_PATTERN.match(output)
+    block = find_session_block(output, package)
+
+    fields = {'captured_at': captured_at}
+    meta_match = METADATA_PATTERN.search(block)
+    if meta_match:
+        meta_parts = meta_match.group(1).split(', ')
+        if len(meta_parts) >= 3:
+            fields.update(song=meta_parts[0], singer=meta_parts[1], album=meta_parts[2])
+
+    state_match = STATE_PATTERN.search(block)
+    if state_match:
+        state_code, position, speed, updated = state_match.groups()
+        fields['state'] = PLAYBACK_STATES.get(int(state_code), 'Unknown')
+        speed = float(speed) if speed else 1.0
+        fields['speed'] = speed
+        position = int(position)
+        if position >= 0:
+            # Position is reported as of the last session update, move it to the read
+            if uptime_match and updated and fields['state'] == 'Playing':
+                elapsed = float(uptime_match.group(1)) * 1000 - int(updated)
+                if elapsed > 0:
+                    position += int(elapsed * speed)
+            fields['position'] = position
+    return PlaybackState(**fields)
+
+
+class PlaybackWatcher:
+    """Polls the QQ Music media session on a background thread
+
+    The latest PlaybackState is always available from current without a
+    device round trip, and subscribers get song_changed, state_changed and
+    position events as they are observed.
+    """
+
+    EVENTS = ('song_changed', 'state_changed', 'position')
+
+    def __init__(self, handler, interval=1.0):
+        self.handler = handler
+        self.interval = interval
+        self.package = handler.config['package_name']
+        self.state = None
+        self.subscribers = defaultdict(list)  # event -> callbacks
+        self.thread = None
+        self.running = False
+        self.lock = threading.Lock()
+
+        self.polls = 0
+        self.failures = 0
+        self.poll_time = 0.0
+        self.song_changes = 0
+
+    def subscribe(self, event, callback):
+        """Call callback(new_state, old_state) on event"""
+        if event not in self.EVENTS:
+            raise ValueError(f'Unknown playback event {event}')
+        self.subscribers[event].append(callback)
+
+    def start(self):
+        # A thread stopped moments ago is still sleeping and just carries on
+        self.running = True
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self):
+        while self.running:
+            self.poll()
+            time.sleep(self.interval)
+
+    def read(self):
+        """Read playback state from the device
+        Returns:
+            PlaybackState or None if the shell call failed
+        """
+        # Uptime comes first, so the session position can be moved to the time of the read
+        output, _ = self.handler.shell_queries.run('media_session')
+        if not output:
+            return None
+        return parse_playback_state(output, self.package)
+
+    def poll(self):
+        """Read the state once and publish what changed
+        Returns:
+            PlaybackState: Latest state, None if it could not be read
+        """
+        start = time.time()
+        try:
+            new_state = self.read()
+        except Exception as e:
+            new_state = None
+            self.handler.logger.warning(f'Failed to read playback state: {e}')
+        with self.lock:
+            self.polls += 1
+            self.poll_time += time.time() - start
+            if new_state is None:
+                self.failures += 1
+                return self.state
+            old_state = self.state
+            self.state = new_state
+
+        if old_state is None or (old_state.song, old_state.singer, old_state.album) != \
+                (new_state.song, new_state.singer, new_state.album):
+            self.song_changes += 1
+            self._publish('song_changed', new_state, old_state)
+        if old_state is None or old_state.state != new_state.state:
+            self._publish('state_changed', new_state, old_state)
+        self._publish('position', new_state, old_state)
+        return new_state
+
+    def _publish(self, event, new_state, old_state):
+        for callback in self.subscribers.get(event, ()):
+            try:
+                callback(new_state, old_state)
+            except Exception:
+                self.handler.logger.error(f'Error in playback {event} subscriber: {traceback.format_exc()}')
+
+    @property
+    def current(self):
+        """Latest PlaybackState, read synchronously if the watcher has none yet"""
+        if self.state is None or not self.alive():
+            return self.poll()
+        return self.state
+
+    def stats(self):
+        """Poll counters and the latest state"""
+        return {
+            'alive': self.alive(),
+            'polls': self.polls,
+            'failures': self.failures,
+            'avg_poll_time': round(self.poll_time / self.polls, 3) if self.polls else 0,
+            'song_changes': self.song_changes,
+            'state': self.state.as_info() if self.state else None,
+        }
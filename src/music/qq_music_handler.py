@@ -1,14 +1,41 @@
-from appium.webdriver.common.appiumby import AppiumBy
 from selenium.common import StaleElementReferenceException
 
 from ..utils.app_handler import AppHandler
+from ..utils.shell_query import ShellQueries
+from ..utils.ui_snapshot import LazyElement
+from .playback_watcher import PlaybackState, PlaybackWatcher
+from .screen_navigator import ScreenNavigator
+from .search_cache import SearchCache
+from .ktv_engine import KtvEngine
+from .lyrics_store import LyricsStore
+import math
 import time
-import re
 import traceback
-import langdetect
+from ..utils.lazy_import import lazy_import, seed_langdetect
 
-# 在导入后设置种子
-langdetect.DetectorFactory.seed = 0  # 使用赋值而不是调用
+# Loaded on first use or by the preload after the first tick
+langdetect = lazy_import('langdetect', on_load=seed_langdetect)
+
+VOLUME_SET_COMMAND = 'media volume --stream 3 --set {level}'
+KEYCODE_VOLUME_UP = 24
+KEYCODE_VOLUME_DOWN = 25
+
+
+def fade_levels(start, end, steps):
+    """Volume levels of a cosine fade from start to end, start excluded
+    Args:
+        start: int, volume level before the fade
+        end: int, volume level after the fade
+        steps: int, number of points on the curve
+    Returns:
+        list: Distinct consecutive levels ending with end
+    """
+    levels = []
+    for i in range(1, steps + 1):
+        level = round(start + (end - start) * (1 - math.cos(math.pi * i / steps)) / 2)
+        if level != (levels[-1] if levels else start):
+            levels.append(level)
+    return levels
 
 
 class QQMusicHandler(AppHandler):
@@ -16,10 +43,24 @@ class QQMusicHandler(AppHandler):
         super().__init__(driver, config, controller)
 
         self.ktv_mode = False  # KTV mode state
-        self.last_lyrics = ""  # Store last recognized lyrics
-        self.last_lyrics_lines = []
+        self.lyrics_store = LyricsStore(controller.db_helper)
+        self.ktv = KtvEngine(self, config.get('ktv_lookahead', 4))
         self.no_skip = 0
         self.list_mode = 'unknown'
+        self.max_volume = config.get('max_volume', 15)
+        self.volume_set_supported = None  # Whether media volume --set works, None until tried
+        self.fade_steps = config.get('fade_steps', 6)
+        self.fade_duration = config.get('fade_duration', 1.2)
+        self.shell_queries = ShellQueries(self.shell, self.logger)
+        self.playback_watcher = PlaybackWatcher(self, config.get('playback_poll_interval', 1.0))
+        self.navigator = ScreenNavigator(self)
+        cache_config = config.get('search_cache', {})
+        self.search_cache = SearchCache(
+            controller.db_helper,
+            cache_config.get('ttl', 7 * 24 * 3600),
+            cache_config.get('capacity', 500)
+        )
+        self.song_result = None  # Song row picked by the last find_music
 
         # Optimize driver settings
         self.driver.update_settings({
@@ -35,22 +76,7 @@ class QQMusicHandler(AppHandler):
 
     def navigate_to_home(self):
         """Navigate back to home page"""
-        # Keep clicking back until no more back buttons found
-        n = 0
-        while n < 9:
-            search_entry = self.try_find_element_plus('search_entry')
-            if search_entry:
-                go_back = self.try_find_element_plus('go_back')
-                if go_back:
-                    go_back.click()
-                    self.logger.info(f"Clicked go back button")
-                else:
-                    self.logger.info(f"Found search entry, assume we're at home page")
-                    return True
-            else:
-                self.press_back()
-                n += 1
-        return False
+        return self.navigator.navigate('home')
 
     def get_playing_info(self):
         """Get current playing song and singer info"""
@@ -82,14 +108,8 @@ class QQMusicHandler(AppHandler):
     def get_current_playing(self):
         """Get current playing song and singer info"""
         try:
-            song_element = self.driver.find_element(
-                AppiumBy.ID,
-                self.config['elements']['current_song']
-            )
-            singer_element = self.driver.find_element(
-                AppiumBy.ID,
-                self.config['elements']['current_singer']
-            )
+            song_element = self.driver.find_element(*self._get_locator('current_song'))
+            singer_element = self.driver.find_element(*self._get_locator('current_singer'))
             return {
                 'song': song_element.text,
                 'singer': singer_element.text
@@ -105,81 +125,14 @@ class QQMusicHandler(AppHandler):
             return False
         self.logger.info(f"Switched to QQ Music app")
 
-        # Check if we're already in search mode
-
-        play_all = self.try_find_element_plus('play_all')
-        play_all_mini = self.try_find_element_plus('play_all_mini')
-        play_singer = self.try_find_element_plus('play_singer')
-        play_album = self.try_find_element_plus('play_album')
-        if play_all or play_all_mini or play_singer or play_album:
-            self.logger.info(f"Found play button, go back")
-            self.press_back()
-
-        singer_screen = self.try_find_element_plus('singer_screen', log=False)
-        if singer_screen:
-            self.logger.info(f"Hide singer screen 1")
-            self.press_back()
-        
-        playlist_screen = self.try_find_element_plus('playlist_screen', log=False)
-        if playlist_screen:
-            self.logger.info(f"Hide playlist screen 1")
-            self.press_back()
-
-        search_box = self.try_find_element_plus('search_box', log=False)
-        if not search_box:
-            go_back = self.try_find_element_plus('go_back', log=False)
-            if go_back:
-                self.logger.info(f"Clicked Go Back button")
-                go_back.click()
-            else:
-                self.press_back()
-        else:
-            singer_screen = self.try_find_element_plus('singer_screen', log=False)
-            if singer_screen:
-                self.logger.info(f"Hide singer screen 2")
-                self.press_back()
-            playlist_screen = self.try_find_element_plus('playlist_screen', log=False)
-            if playlist_screen:
-                self.logger.info(f"Hide playlist screen 2")
-                self.press_back()
-
-        go_home = False
-        playlist_entry = self.wait_for_element_clickable_plus('playlist_entry_floating')
-        search_box = None
-        if playlist_entry:
-            singer_screen = self.try_find_element_plus('singer_screen', log=False)
-            if singer_screen:
-                self.logger.info(f"Hide singer screen 3")
-                self.press_back()
-            playlist_screen = self.try_find_element_plus('playlist_screen', log=False)
-            if playlist_screen:
-                self.logger.info(f"Hide playlist screen 3")
-                self.press_back()
-            search_box = self.try_find_element_plus('search_box', log=False)
-            if not search_box:
-                go_home = True
-        else:
-            go_home = True
-
-        if go_home:
-            # Go back to home page
-            self.navigate_to_home()
-            self.logger.info(f"Navigated to home page")
-
-            # Find search entry
-            search_entry = self.wait_for_element_clickable_plus('search_entry')
-            if search_entry:
-                search_entry.click()
-                self.logger.info(f"Clicked search entry")
-            else:
-                self.logger.error(f"failed to find search entry")
-                return False
-
-            # Find and click search box
-            search_box = self.wait_for_element_clickable_plus('search_box')
+        # Identify the screen once and take the shortest way to the search page
+        if not self.navigator.navigate('search'):
+            self.logger.error(f"Cannot find search entry")
+            return False
+        search_box = self.probe_element_plus('search_box')
 
         if search_box:
-            clear_search = self.try_find_element_plus('clear_search', log=False)
+            clear_search = self.probe_element_plus('clear_search')
             if clear_search:
                 clear_search.click()
                 self.logger.info(f"Clear search")
@@ -203,38 +156,105 @@ class QQMusicHandler(AppHandler):
         self.paste_text()
         return True
 
-    def _prepare_music_playback(self, music_query):
+    def find_music(self, music_query):
+        """Search music and pick its song result without acting on it
+
+        Goes through the search cache and fills it; the row is kept in
+        song_result for select_song_result.
+        Args:
+            music_query: str, search query
+        Returns:
+            tuple: (playing info dict or error dict, bool whether a studio version is offered)
+        """
         if not self.query_music(music_query):
             self.logger.error(f"Failed to query music query: {music_query}")
-            playing_info = {
-                'error': f"Failed to query music: {music_query}"
-            }
-            return playing_info
+            return {'error': f"Failed to query music: {music_query}"}, False
 
         self.select_song_tab()
+        self.song_result = None
+
+        cached = self.search_cache.get(music_query)
+        if cached:
+            playing_info = self._use_cached_result(music_query, cached)
+            if playing_info:
+                return playing_info, cached.studio
 
         playing_info = self.get_playing_info()
         if not playing_info:
             self.logger.warning(f"No playing info found for query: {music_query}")
-            playing_info = {
-                'error': f"No playing info found for query: {music_query}"
-            }
-            return playing_info
+            return {'error': f"No playing info found for query: {music_query}"}, False
 
         self.logger.info(f"Found playing info: {playing_info}")
+        studio = self.probe_element_plus('studio_version') is not None
+        if playing_info['song'] != 'Unknown':
+            self.search_cache.put(music_query, playing_info, 0, studio)
+        return playing_info, studio
+
+    def _prepare_music_playback(self, music_query):
+        """Find music and get it ready to be played: skip bookkeeping and studio version"""
+        playing_info, studio = self.find_music(music_query)
+        if 'error' in playing_info:
+            return playing_info
 
         if self.list_mode == 'singer':
             if playing_info['song'].endswith('(Live)') or (
                     playing_info['singer'] and playing_info['singer'] == playing_info['album']):
                 self.no_skip += 1
 
-        studio_version = self.try_find_element_plus('studio_version', log=False)
-        if studio_version:
-            studio_version.click()
-            self.logger.info("Alter to studio version")
-
+        if studio:
+            studio_version = self.probe_element_plus('studio_version')
+            if studio_version:
+                studio_version.click()
+                self.song_result = None  # Row was redrawn
+                self.logger.info("Alter to studio version")
         return playing_info
 
+    def _use_cached_result(self, music_query, cached):
+        """Check a cached result against the results on screen
+        Args:
+            music_query: str, search query
+            cached: CachedResult of the query
+        Returns:
+            dict: Playing info, None if the results no longer match the cache
+        """
+        # A list still loading says nothing about the cache, keep the entry
+        if not self.wait_for_element_plus('song_name'):
+            self.logger.warning(f"Results of {music_query} did not load, cannot check cached result")
+            return None
+        # Results appeared after any snapshot taken while they were loading
+        self.ui_changed()
+
+        # One snapshot read instead of scraping the result with element finds
+        snapshot = self.snapshot()
+        song_rows = snapshot.find_all(*self._get_locator('song_name')) or []
+        singer_rows = snapshot.find_all(*self._get_locator('singer_name')) or []
+        position = cached.position
+        if len(song_rows) <= position or len(singer_rows) <= position:
+            found = None
+        else:
+            # Singer row reads "singer·album", as in get_playing_info
+            singer = (singer_rows[position].get('text') or '').split('·')[0]
+            found = (song_rows[position].get('text'), singer)
+        if found != (cached.song, cached.singer):
+            self.logger.info(f"Cached result of {music_query} no longer matches, search again")
+            self.search_cache.invalidate(music_query)
+            return None
+
+        self.logger.info(f"Found cached result for {music_query}: {cached.song} by {cached.singer}")
+        self.song_result = LazyElement(self, snapshot, song_rows[position])
+        return {
+            'song': cached.song,
+            'singer': cached.singer,
+            'album': cached.album
+        }
+
+    def select_song_result(self):
+        """Click the song row picked by the last find_music"""
+        song_element = self.song_result or self.wait_for_element_clickable_plus('song_name')
+        self.song_result = None
+        song_element.click()
+        self.logger.info(f"Select first song")
+
     def select_song_tab(self):
         """Select the 'Songs' tab in search results"""
         try:
@@ -285,20 +305,14 @@ class QQMusicHandler(AppHandler):
             return {
                 'error': 'Failed to find playlist tab',
             }
-        result = self.wait_for_element_clickable(
-            AppiumBy.ID, self.config['elements']['playlist_result']
-        )
+        result = self.wait_for_element_clickable(*self._get_locator('playlist_result'))
         result.click()
 
-        play_button = self.wait_for_element_clickable(
-            AppiumBy.ID, self.config['elements']['play_playlist']
-        )
+        play_button = self.wait_for_element_clickable(*self._get_locator('play_playlist'))
         if play_button:
             play_button.click()
         else:
-            play_button = self.wait_for_element_clickable(
-                AppiumBy.ID, self.config['elements']['playlist_item']
-            )
+            play_button = self.wait_for_element_clickable(*self._get_locator('playlist_item'))
             if play_button:
                 play_button.click()
             else:
@@ -319,12 +333,7 @@ class QQMusicHandler(AppHandler):
             self.logger.error(f'Failed to play music {music_query}')
             return playing_info
 
-        song_element = self.wait_for_element_clickable(
-            AppiumBy.ID,
-            self.config['elements']['song_name']
-        )
-        song_element.click()
-        self.logger.info(f"Select first song")
+        self.select_song_result()
 
         return playing_info
 
@@ -337,10 +346,7 @@ class QQMusicHandler(AppHandler):
                 return playing_info
 
             # Click next button
-            next_button = self.wait_for_element_clickable(
-                AppiumBy.ID,
-                self.config['elements']['next_button']
-            )
+            next_button = self.wait_for_element_clickable(*self._get_locator('next_button'))
             next_button.click()
             self.logger.info(f"Clicked next button")
 
@@ -360,12 +366,7 @@ class QQMusicHandler(AppHandler):
             current_info = self.get_playback_info()
 
             # Execute shell command to simulate media button press
-            self.driver.execute_script(
-                'mobile: shell',
-                {
-                    'command': 'input keyevent KEYCODE_MEDIA_NEXT'
-                }
-            )
+            self.shell.run('input keyevent KEYCODE_MEDIA_NEXT')
             self.logger.info(f"Skipped {current_info['song']} by {current_info['singer']}")
 
             # Return song info
@@ -384,65 +385,92 @@ class QQMusicHandler(AppHandler):
     def get_volume_level(self):
         """Get current volume level"""
         try:
-            # Execute shell command to get volume
-            result = self.driver.execute_script(
-                'mobile: shell',
-                {
-                    'command': 'dumpsys audio'
-                }
-            )
-
-            # Parse volume level
-            if result:
-                # Split by "- STREAM_MUSIC:" first
-                parts = result.split('- STREAM_MUSIC:')
-                if len(parts) > 1:
-                    # Find first streamVolume in second part
-                    match = re.search(r'streamVolume:(\d+)', parts[1])
-                    if match:
-                        volume = int(match.group(1))
-                        print(f"Current volume: {volume}")
-                        return volume
+            # Only the STREAM_MUSIC lines are pulled when the device can filter them
+            _, match = self.shell_queries.run('music_volume')
+            if match:
+                volume = int(match.group(1) or match.group(2))
+                print(f"Current volume: {volume}")
+                return volume
             return 0
         except Exception as e:
             print(f"Error getting volume level: {str(e)}")
             traceback.print_exc()
             return 0
 
+    def _volume_commands(self, current, level):
+        """Shell commands moving STREAM_MUSIC from current to level
+        Args:
+            current: int, current volume level
+            level: int, target volume level
+        Returns:
+            str: One media volume call, or one chained input keyevent
+        """
+        if self.volume_set_supported is not False:
+            return VOLUME_SET_COMMAND.format(level=level)
+        return self._volume_key_events(current, level)
+
+    @staticmethod
+    def _volume_key_events(current, level):
+        """One chained input keyevent moving the volume from current to level"""
+        if level == current:
+            return ':'
+        keycode = KEYCODE_VOLUME_UP if level > current else KEYCODE_VOLUME_DOWN
+        return 'input keyevent ' + ' '.join([str(keycode)] * abs(level - current))
+
+    def set_volume(self, level, current=None):
+        """Set STREAM_MUSIC volume with one shell call and verify it once
+        Args:
+            level: int, target volume level
+            current: int, current volume level if already known
+        Returns:
+            int: Volume level read back after setting
+        """
+        level = max(0, min(level, self.max_volume))
+        if self.volume_set_supported is not False:
+            if self.volume_set_supported is None and current is None:
+                # Setting the level it already has would prove nothing
+                current = self.get_volume_level()
+            self.shell.run(VOLUME_SET_COMMAND.format(level=level))
+            vol = self.get_volume_level()
+            if vol == level:
+                if self.volume_set_supported is None and current != level:
+                    self.volume_set_supported = True
+                return vol
+            if self.volume_set_supported:
+                self.logger.warning(f"media volume --set left volume at {vol} instead of {level}, using key events")
+            else:
+                # Not available on this device, key events from here on
+                self.logger.info("media volume --set unsupported, falling back to key events")
+                self.volume_set_supported = False
+            current = vol
+
+        if current is None:
+            current = self.get_volume_level()
+        if current != level:
+            self.shell.run(self._volume_key_events(current, level))
+        return self.get_volume_level()
+
     def adjust_volume(self, delta=None):
         """
         Adjust volume level
         Args:
-            delta: int, positive to increase, negative to decrease, None to just get current level
+            delta: int, positive to set the level, negative to decrease, None to just get current level
         Returns:
-            dict: Result with level and times if adjusted, or error
+            dict: Result with level if adjusted, or error
         """
         try:
-            vol = self.get_volume_level()
             if delta is None:
                 # Just get current volume
-                return {'volume': vol}
+                return {'volume': self.get_volume_level()}
 
-            # Adjust volume
+            vol = None
             if delta < 0:
-                times = abs(delta) if vol + delta > 0 else vol
-                for i in range(times):
-                    self.press_volume_down()
-                    self.logger.info(f"Decreased volume ({i + 1}/{times})")
+                vol = self.get_volume_level()
+                target = max(vol + delta, 0)
             else:
-                if vol > delta:
-                    times = vol - delta
-                    for i in range(times):
-                        self.press_volume_down()
-                        self.logger.info(f"Decreased volume ({i + 1}/{times})")
-                else:
-                    times = delta - vol
-                    for i in range(times):
-                        self.press_volume_up()
-                        self.logger.info(f"Increased volume ({i + 1}/{times})")
+                target = delta
 
-            # Get final volume level
-            vol = self.get_volume_level()
+            vol = self.set_volume(target, vol)
             self.logger.info(f"Adjusted volume to {vol}")
             return {
                 'volume': vol,
@@ -451,60 +479,48 @@ class QQMusicHandler(AppHandler):
             print(f"Error adjusting volume: {traceback.format_exc()}")
             return {'error': f'Failed to adjust volume to {delta}'}
 
-    def get_playback_info(self):
-        """Get current playback information including song info and state"""
-        # Get media session info
-        result = self.driver.execute_script(
-            'mobile: shell',
-            {
-                'command': 'dumpsys media_session'
-            }
-        )
+    def fade_play_pause(self, pause):
+        """Toggle play/pause behind a volume fade, run on the device in one call
 
-        # Parse metadata
-        metadata = {}
-        state = "Unknown"
+        Pausing fades out, pauses and puts the volume back. Resuming mutes,
+        plays and fades back in.
+        Args:
+            pause: bool, True to pause, False to resume
+        Returns:
+            int: Volume level the fade returned to
+        """
+        level = self.get_volume_level()
+        delay = self.fade_duration / max(self.fade_steps, 1)
+        start, end = (level, 0) if pause else (0, level)
+
+        ramp = []
+        current = start
+        for step in fade_levels(start, end, self.fade_steps):
+            ramp += [self._volume_commands(current, step), f'sleep {delay:.2f}']
+            current = step
+
+        if pause:
+            script = ramp + ['input keyevent KEYCODE_MEDIA_PLAY_PAUSE', self._volume_commands(0, level)]
+        else:
+            script = [self._volume_commands(level, 0), 'input keyevent KEYCODE_MEDIA_PLAY_PAUSE'] + ramp[:-1]
 
-        if not result:
-            self.logger.error("Failed to get playback information")
-            return None
+        self.shell.run('; '.join(script), timeout=self.fade_duration + 10)
+        self.logger.info(f"{'Paused' if pause else 'Resumed'} with volume fade at level {level}")
+        return level
 
-        # Get metadata
-        meta_match = re.search(r'metadata: size=\d+, description=(.*?)(?=\n)', result)
-        if meta_match:
-            meta_parts = meta_match.group(1).split(', ')
-            if len(meta_parts) >= 3:
-                metadata = {
-                    'song': meta_parts[0],
-                    'singer': meta_parts[1],
-                    'album': meta_parts[2]
-                }
-
-        # Get playback state
-        state_match = re.search(r'state=PlaybackState {state=(\d+)', result)
-        if state_match:
-            state_code = int(state_match.group(1))
-            state = {
-                0: "None",
-                1: "Stopped",
-                2: "Paused",
-                3: "Playing",
-                4: "Fast Forwarding",
-                5: "Rewinding",
-                6: "Buffering",
-                7: "Error",
-                8: "Connecting",
-                9: "Skipping to Next",
-                10: "Skipping to Previous",
-                11: "Skipping to Queue Item"
-            }.get(state_code, "Unknown")
+    def get_playback_info(self):
+        """Get current playback information including song info and state
 
-        return {
-            'song': metadata.get('song', 'Unknown'),
-            'singer': metadata.get('singer', 'Unknown'),
-            'album': metadata.get('album', 'Unknown'),
-            'state': state
-        }
+        Served from the playback watcher, which keeps it fresh in the
+        background; read from the device only while the watcher is not running.
+        Until a state has been read, e.g. before QQ Music opens a media
+        session, all fields are Unknown.
+        """
+        state = self.playback_watcher.current
+        if state is None:
+            self.logger.error("Failed to get playback information")
+            state = PlaybackState()
+        return state.as_info()
 
     def toggle_ktv_mode(self, enable):
         """Toggle KTV mode
@@ -514,181 +530,32 @@ class QQMusicHandler(AppHandler):
         self.ktv_mode = enable
         print(f"KTV mode {'enabled' if enable else 'disabled'}")
 
-        # Check if we need to switch to lyrics page when enabling KTV mode
+        # Lyric sheet of the playing song is captured on the next tick
         if enable:
-            if not self.switch_to_app():
-                return False
-            # Try to find lyrics tool
-            lyrics_tool = self.try_find_element(
-                AppiumBy.ID,
-                self.config['elements']['lyrics_tool']
-            )
-
-            if not lyrics_tool:
-                # If not found, switch to lyrics page
-                print("Not in lyrics page, switching to lyrics page...")
-                result = self.switch_to_lyrics_page()
-                if result and 'error' in result:
-                    print(f"Error switching to lyrics page: {result['error']}")
-                    return {'enabled': 'off'}  # Indicate that KTV mode could not be enabled
+            self.ktv.reset()
 
         return {'enabled': 'on' if enable else 'off'}
 
     def check_ktv_lyrics(self):
-        if not self.switch_to_app():
-            self.logger.error("Failed to switch to app")
-            return {
-                'error': "Failed to switch to app"
-            }
-
-        """Check current lyrics in KTV mode"""
+        """Check current lyrics in KTV mode
+        Returns:
+            dict: {'lyrics': text} when lines are due, {'error': ...} on failure, None otherwise
+        """
         if not self.ktv_mode:
             return None  # 如果KTV模式未开启，则不执行
-
-        close_poster = self.try_find_element_plus('close_poster', log=False)
-        if close_poster:
-            self.logger.info("Closing poster...")
-            close_poster.click()
-
-        lyrics_tool = self.wait_for_element_clickable_plus('lyrics_tool')
-        if not lyrics_tool:
-            self.ktv_mode = False
-            self.logger.error("Failed to find lyrics tool")
-            return {'error': 'Cannot find lyrics tool'}
-
-        lyrics_tool.click()
-        self.logger.info("Clicked lyrics tool")
-
-        # 尝试查找并点击歌词海报
-        lyrics_poster = self.wait_for_element_clickable_plus('lyrics_poster')
-        if not lyrics_poster:
-            # self.ktv_mode = False
-            info = self.skip_song()
-            self.logger.warning(f"Failed to find lyrics poster for {info['song']} by {info['singer']}")
-            return {'error': f'Skip {info['song']} by {info['singer']} due to no lyrics poster option'}
-
-        try:
-            lyrics_poster.click()
-        except StaleElementReferenceException as e:
-            self.ktv_mode = False
-            return {'error': 'Cannot click lyrics poster option'}
-        self.logger.info("Clicked lyrics poster")
-
-        # 找到所有的lyrics_box
-        close_poster = self.wait_for_element_clickable_plus('close_poster')
-        if not close_poster:
-            self.ktv_mode = False
-            self.logger.warning("No close poster")
-            return {'error': 'No close poster'}
-
-        current_lyrics = self.wait_for_element_clickable_plus('current_lyrics')
-        finished = False
-        if current_lyrics:
-            try:
-                y_coordinate = current_lyrics.location['y']
-            except StaleElementReferenceException as e:
-                self.logger.error(f"Error finding y coordinate")
-                self.ktv_mode = False
-                return {'error': 'Cannot get current lyrics coordinate'}
-
-            if y_coordinate < 1000:
-                finished = True
-                self.logger.info("Found first line, song might be finished")
-        if not finished:
-            screen_size = self.driver.get_window_size()
-            screen_height = screen_size['height']
-            # Scroll up half screen
-            self.driver.swipe(
-                screen_size['width'] // 2,
-                screen_height * 0.60,
-                screen_size['width'] // 2,
-                screen_height * 0.35,
-                400
-            )
-
-        lyrics_boxes = self.driver.find_elements(
-            AppiumBy.ID,
-            self.config['elements']['lyrics_box']
-        )
-
-        if len(lyrics_boxes) <= 1:
-            self.ktv_mode = False
-            return {'error': 'Cannot find lyrics box'}
-
-        # last element is a mistake
-        lyrics_boxes.pop()
-
-        found = False
-        text = ""
-        n = 0
-        if not finished:
-            for lyrics_box in lyrics_boxes:
-                # 检查是否包含current_lyrics
-
-                if found:
-                    current_line = self.find_child_element(
-                        lyrics_box,
-                        AppiumBy.ID,
-                        self.config['elements']['lyrics_line']
-                    )
-                    if current_line:
-                        text += current_line.text + '\n'
-                        n += 1
-                else:
-                    current_lyrics = self.find_child_element(
-                        lyrics_box,
-                        AppiumBy.ID,
-                        self.config['elements']['current_lyrics']
-                    )
-                    if current_lyrics:
-                        found = True
-
-        if not found or finished:
-            for lyrics_box in lyrics_boxes:
-                current_line = self.find_child_element(
-                    lyrics_box,
-                    AppiumBy.ID,
-                    self.config['elements']['lyrics_line']
-                )
-                if current_line:
-                    text += current_line.text + '\n'
-
-        if text:
-            if text == self.last_lyrics:
-                return {
-                    'lyrics': 'Playing interlude..'
-                }
-            else:
-                self.last_lyrics = text
-                close_poster.click()
-                # return all_lines
-                return {
-                    'lyrics': text
-                }
-
-        self.logger.error(f"lyrics is unavailable")
-        self.ktv_mode = False
-        return {
-            'error': 'lyrics is unavailable'
-        }
+        return self.ktv.tick()
 
     def switch_to_playing_page(self):
         # Press back to exit most interfaces
         self.press_back()
-        search_entry = self.try_find_element(
-            AppiumBy.ID,
-            self.config['elements']['search_entry']
-        )
+        search_entry = self.try_find_element(*self._get_locator('search_entry'))
         if not search_entry:
             self.press_back()
         print("Pressed back to clean up interface")
 
         time.sleep(0.5)  # Wait for animation
         # Try to find and click playing bar if exists
-        playing_bar = self.try_find_element(
-            AppiumBy.ID,
-            self.config['elements']['playing_bar']
-        )
+        playing_bar = self.try_find_element(*self._get_locator('playing_bar'))
         if playing_bar:
             try:
                 playing_bar.click()
@@ -701,10 +568,7 @@ class QQMusicHandler(AppHandler):
             time.sleep(0.5)  # Wait for animation
 
         # Find more menu in play panel
-        more_menu = self.wait_for_element(
-            AppiumBy.ID,
-            self.config['elements']['more_in_play_panel']
-        )
+        more_menu = self.wait_for_element(*self._get_locator('more_in_play_panel'))
         if not more_menu:
             self.logger.error(f"playing interface is covered by unexpected dialog")
             return {'error': 'Cannot find playing interface, please try again'}
@@ -730,8 +594,7 @@ class QQMusicHandler(AppHandler):
         print("Swiped to lyrics page")
 
         lyrics_tool = self.wait_for_element_clickable(
-            AppiumBy.ID,
-            self.config['elements']['lyrics_tool'])
+            *self._get_locator('lyrics_tool'))
         if not lyrics_tool:
             return {'error': 'Cannot find lyrics tool, please try again'}
         return None
@@ -793,16 +656,16 @@ class QQMusicHandler(AppHandler):
             self.logger.info(f"Scrolled playlist from y={start_y} to y={end_y}")
 
         # Get all songs and singers
-        items = self.driver.find_elements(AppiumBy.ID, self.config['elements']['playlist_item_container'])
+        items = self.driver.find_elements(*self._get_locator('playlist_item_container'))
 
         playlist_info = []
         for item in items:
             try:
-                song = self.find_child_element(item, AppiumBy.ID, self.config['elements']['playlist_song'])
+                song = self.find_child_element(item, *self._get_locator('playlist_song'))
                 if not song:
                     self.logger.warning("Failed to find song in playlist")
                     continue
-                singer = self.find_child_element(item, AppiumBy.ID, self.config['elements']['playlist_singer'])
+                singer = self.find_child_element(item, *self._get_locator('playlist_singer'))
                 info = f'{song.text}{singer.text}' if singer else song.text
                 playlist_info.append(info)
             except StaleElementReferenceException as e:
@@ -0,0 +1,157 @@
+import time
+from collections import Counter, deque
+
+from selenium.common.exceptions import WebDriverException
+
+from ..utils.ui_snapshot import LazyElement
+
+# Screen signatures, first match wins: (screen, element keys all present, element keys all absent)
+SCREEN_SIGNATURES = (
+    ('singer', ('singer_screen',), ()),
+    ('playlist', ('playlist_screen',), ()),
+    ('song_list', ('play_all',), ()),
+    ('song_list', ('play_all_mini',), ()),
+    ('song_list', ('play_singer',), ()),
+    ('song_list', ('play_album',), ()),
+    ('search', ('search_box',), ()),
+    ('home', ('search_entry',), ('go_back',)),
+    ('sub_page', ('go_back',), ()),
+)
+
+# Screen -> ((action, screen it leads to), ...), an action is 'back' or an element key to click
+TRANSITIONS = {
+    'singer': (('back', 'search'),),
+    'playlist': (('back', 'search'),),
+    'song_list': (('back', 'search'),),
+    'search': (('back', 'home'),),
+    'sub_page': (('go_back', 'home'), ('back', 'home')),
+    'home': (('search_entry', 'search'),),
+    'unknown': (('back', 'home'),),
+}
+
+
+def shortest_path(start, target, transitions=TRANSITIONS):
+    """Find the fewest actions leading from start to target
+    Args:
+        start: str, current screen
+        target: str, screen to reach
+        transitions: dict, transition graph
+    Returns:
+        list: Actions to run in order, None if target cannot be reached
+    """
+    if start == target:
+        return []
+    previous = {start: None}
+    pending = deque([start])
+    while pending:
+        screen = pending.popleft()
+        for action, next_screen in transitions.get(screen, ()):
+            if next_screen in previous:
+                continue
+            previous[next_screen] = (screen, action)
+            if next_screen == target:
+                path = []
+                while previous[next_screen]:
+                    next_screen, action = previous[next_screen]
+                    path.append(action)
+                return path[::-1]
+            pending.append(next_screen)
+    return None
+
+
+class ScreenNavigator:
+    """Identifies the QQ Music screen from one snapshot and walks to a target
+
+    Each step reads one snapshot, runs the first action of the shortest path
+    from the identified screen, and checks where it landed.
+    """
+
+    def __init__(self, handler, max_steps=9, settle_timeout=2.0, settle_interval=0.3):
+        self.handler = handler
+        self.max_steps = max_steps
+        self.settle_timeout = settle_timeout
+        self.settle_interval = settle_interval
+        self.screens = Counter()  # Screens identified
+        self.actions = Counter()  # Actions run
+        self.navigations = 0
+        self.failures = 0
+
+    def _present(self, snapshot, element_key):
+        locator_type, value = self.handler._get_locator(element_key)
+        return snapshot.find(locator_type, value) is not None
+
+    def identify(self):
+        """Identify the current screen
+        Returns:
+            tuple: (screen name, snapshot), screen is 'unknown' if no signature matches
+        """
+        snapshot = self.handler.snapshot()
+        for screen, present, absent in SCREEN_SIGNATURES:
+            if all(self._present(snapshot, key) for key in present) and \
+                    not any(self._present(snapshot, key) for key in absent):
+                self.screens[screen] += 1
+                return screen, snapshot
+        self.screens['unknown'] += 1
+        return 'unknown', snapshot
+
+    def _run(self, action, snapshot):
+        """Run one action, False if its element is not on screen"""
+        self.actions[action] += 1
+        if action == 'back':
+            return self.handler.press_back()
+        locator_type, value = self.handler._get_locator(action)
+        node = snapshot.find(locator_type, value)
+        if node is None:
+            return False
+        LazyElement(self.handler, snapshot, node).click()
+        self.handler.logger.info(f"Clicked {action}")
+        return True
+
+    def _settle(self, previous):
+        """Identify the screen an action led to, giving the app time to draw it"""
+        deadline = time.time() + self.settle_timeout
+        while True:
+            screen, snapshot = self.identify()
+            if (screen != previous and screen != 'unknown') or time.time() >= deadline:
+                return screen, snapshot
+            time.sleep(self.settle_interval)
+            self.handler.ui_changed()
+
+    def navigate(self, target):
+        """Walk to the target screen
+        Args:
+            target: str, screen name in TRANSITIONS
+        Returns:
+            bool: True if the target screen is on top
+        """
+        self.navigations += 1
+        screen, snapshot = self.identify()
+        for _ in range(self.max_steps):
+            if screen == target:
+                return True
+            path = shortest_path(screen, target)
+            if not path:
+                break
+            self.handler.logger.info(f"On {screen} screen, {' -> '.join(path)} to {target}")
+            try:
+                if not self._run(path[0], snapshot):
+                    # Expected element is gone, back out instead
+                    self.handler.press_back()
+            except WebDriverException as e:
+                self.handler.logger.warning(f"Failed to run {path[0]} on {screen} screen: {str(e)}")
+                self.handler.press_back()
+            screen, snapshot = self._settle(screen)
+        if screen == target:
+            return True
+        self.failures += 1
+        self.handler.logger.error(f"Failed to navigate to {target} screen")
+        return False
+
+    def stats(self):
+        """Screens seen and actions run while navigating"""
+        return {
+            'navigations': self.navigations,
+            'failures': self.failures,
+            'screens': dict(self.screens),
+            'actions': dict(self.actions),
+        }
@@ -0,0 +1,107 @@
+import threading
+import time
+import unicodedata
+from typing import NamedTuple
+
+
+class CachedResult(NamedTuple):
+    """Song a search query resolved to"""
+    song: str
+    singer: str
+    album: str
+    position: int  # Row of the song in the song tab results
+    studio: bool  # Whether the studio version was picked
+
+
+def normalize_query(query):
+    """Normalize a search query so trivially different requests share a key
+    Args:
+        query: str, e.g. " 晴天  周杰伦" or "ＡＢＣ"
+    Returns:
+        str: NFKC folded, case folded, single spaced query
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+
+class SearchCache:
+    """Persistent query -> song cache with TTL and LRU eviction
+
+    Rows live in the search_results table of DBHelper, so they survive
+    restarts. Expired and least recently used rows are trimmed on insert.
+    """
+
+    def __init__(self, db_helper, ttl=7 * 24 * 3600, capacity=500):
+        self.db_helper = db_helper
+        self.ttl = ttl
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def get(self, query):
+        """Look up a query
+        Args:
+            query: str, raw search query
+        Returns:
+            CachedResult or None if not cached or expired
+        """
+        key = normalize_query(query)
+        row = self.db_helper.get_search_result(key)
+        now = time.time()
+        if row and now - row[5] > self.ttl:
+            self.db_helper.delete_search_result(key)
+            with self.lock:
+                self.expired += 1
+            row = None
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.db_helper.touch_search_result(key, now)
+        song, singer, album, position, studio, _ = row
+        return CachedResult(song, singer, album, position, bool(studio))
+
+    def put(self, query, playing_info, position=0, studio=False):
+        """Cache the song a query resolved to
+        Args:
+            query: str, raw search query
+            playing_info: dict with song, singer and album
+            position: int, row of the song in the results
+            studio: bool, whether the studio version was picked
+        """
+        now = time.time()
+        self.db_helper.put_search_result(
+            normalize_query(query),
+            playing_info['song'],
+            playing_info['singer'],
+            playing_info['album'],
+            position,
+            studio,
+            now
+        )
+        deleted = self.db_helper.trim_search_results(self.capacity, now - self.ttl)
+        with self.lock:
+            self.evicted += deleted
+
+    def invalidate(self, query):
+        """Drop a cached query whose results no longer match"""
+        self.db_helper.delete_search_result(normalize_query(query))
+        with self.lock:
+            self.invalidated += 1
+
+    def stats(self):
+        """Hit rate and eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': self.db_helper.count_search_results(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            'expired': self.expired,
+            'invalidated': self.invalidated,
+            'evicted': self.evicted,
+        }
@@ -0,0 +1,221 @@
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+# Optional "MM-DD HH:MM:SS - " prefix written by the chat logger, so a
+# recorded logs/chat.log can be replayed as an event stream
+LINE_PREFIX_PATTERN = re.compile(r'^\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d+)? - ')
+# Chat line as shown in the message list, e.g. souler[Tom]说：:play 晴天
+CHAT_PATTERN = re.compile(r'^souler\[(.+)\]说：(.*)$', re.S)
+
+
+class ChatEvent(NamedTuple):
+    """One chat line from the event stream"""
+    seq: int
+    text: str  # Raw chat text, same as content-desc of the message in the list
+    nickname: str  # None for system lines such as user enter notifications
+    content: str  # Message body after 说：
+    received_at: float
+
+
+def parse_line(line):
+    """Parse a stream line into (text, nickname, content)
+    Args:
+        line: str, raw line from the event source
+    Returns:
+        tuple: (text, nickname or None, content), None for blank lines
+    """
+    text = LINE_PREFIX_PATTERN.sub('', line.rstrip('\r\n'), count=1)
+    if not text.strip():
+        return None
+    match = CHAT_PATTERN.match(text)
+    if match:
+        return text, match.group(1), match.group(2)
+    return text, None, text
+
+
+class LogcatSource:
+    """Chat lines logged under a logcat tag, e.g. by an accessibility service"""
+
+    def __init__(self, device, tag):
+        self.device = device
+        self.tag = tag
+        self.process = None
+
+    def lines(self):
+        # -T 1 starts at the newest entry instead of replaying the whole buffer
+        self.process = subprocess.Popen(
+            ['adb', '-s', self.device, 'logcat', '-v', 'raw', '-T', '1', '-s', f'{self.tag}:I'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding='utf-8',
+            errors='replace'
+        )
+        for line in self.process.stdout:
+            yield line
+        self.process.wait()
+
+    def close(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+
+class FileEventSource:
+    """Chat lines appended to a file, stand-in for a device stream in tests and benchmarks"""
+
+    def __init__(self, path, follow=True, from_start=False, poll_interval=0.1):
+        self.path = path
+        self.follow = follow  # Keep waiting for new lines like tail -f
+        self.from_start = from_start  # Replay existing lines instead of starting at the end
+        self.poll_interval = poll_interval
+        self.closed = False
+
+    def lines(self):
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            if not self.from_start:
+                f.seek(0, 2)
+            pending = ''
+            while not self.closed:
+                chunk = f.readline()
+                if not chunk:
+                    if not self.follow:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                pending += chunk
+                # Wait for the writer to finish the line
+                if not pending.endswith('\n') and self.follow:
+                    continue
+                yield pending
+                pending = ''
+            if pending:
+                yield pending
+
+    def close(self):
+        self.closed = True
+
+
+class EventIngestion:
+    """Tails a chat event source on a background thread
+
+    Lines are parsed into ChatEvents as they arrive and handed to the
+    monitoring loop through drain(). The message list only needs to be walked
+    for reconciliation, every reconcile_interval seconds.
+    """
+
+    def __init__(self, source, logger, reconcile_interval=30):
+        self.source = source
+        self.logger = logger
+        self.reconcile_interval = reconcile_interval
+        self.events = queue.Queue()
+        self.thread = None
+        self.last_reconcile = 0
+        self.seq = 0
+
+        self.line_count = 0
+        self.event_count = 0
+        self.drained_count = 0
+        self.reconcile_count = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    @classmethod
+    def from_config(cls, config, device, logger):
+        """Create ingestion from the soul.ingestion config section
+        Args:
+            config: dict, ingestion config
+            device: str, adb serial of the device
+            logger: logger for stream errors
+        Returns:
+            EventIngestion: Ingestion for the configured source
+        """
+        if config.get('source', 'logcat') == 'file':
+            source = FileEventSource(config['path'])
+        else:
+            source = LogcatSource(device, config.get('tag', 'SoulChat'))
+        return cls(source, logger, config.get('reconcile_interval', 30))
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for line in self.source.lines():
+                self.line_count += 1
+                parsed = parse_line(line)
+                if not parsed:
+                    continue
+                self.seq += 1
+                self.events.put(ChatEvent(self.seq, *parsed, time.time()))
+                self.event_count += 1
+        except Exception as e:
+            self.logger.error(f'Chat event stream stopped: {e}')
+
+    def alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def drain(self):
+        """Get all events received since the last call
+        Returns:
+            list: ChatEvents in arrival order
+        """
+        events = []
+        now = time.time()
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            events.append(event)
+            lag = now - event.received_at
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+        self.drained_count += len(events)
+        return events
+
+    def reconcile_due(self):
+        """Check if the message list should be walked, always when the stream is down"""
+        return not self.alive() or time.time() - self.last_reconcile >= self.reconcile_interval
+
+    def reconciled(self):
+        self.last_reconcile = time.time()
+        self.reconcile_count += 1
+
+    def close(self):
+        self.source.close()
+
+    def stats(self):
+        """Stream throughput and queue lag"""
+        return {
+            'alive': self.alive(),
+            'lines': self.line_count,
+            'events': self.event_count,
+            'backlog': self.events.qsize(),
+            'reconciles': self.reconcile_count,
+            'avg_lag': round(self.total_lag / self.drained_count, 4) if self.drained_count else 0,
+            'max_lag': round(self.max_lag, 4),
+        }
+
+
+if __name__ == '__main__':
+    # Replay a recorded chat log: python -m src.soul.event_ingestion logs/chat.log
+    import logging
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'logs/chat.log'
+    ingestion = EventIngestion(FileEventSource(path, follow=False, from_start=True), logging.getLogger(__name__))
+    start = time.perf_counter()
+    ingestion.start()
+    ingestion.thread.join()
+    events = ingestion.drain()
+    elapsed = time.perf_counter() - start
+    chats = sum(1 for event in events if event.nickname)
+    print(f'{ingestion.line_count} lines, {len(events)} events ({chats} chat) in {elapsed:.3f}s, '
+          f'{ingestion.line_count / elapsed if elapsed else 0:.0f} lines/s')
+    print(ingestion.stats())
@@ -0,0 +1,191 @@
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict, deque
+
+# "souler[Tom]" as the sender appears in chat text
+SOULER_WRAPPER_PATTERN = re.compile(r'^souler\[(.+)\]$', re.S)
+
+
+def message_key(*parts):
+    """Content hash of a message, stable across RecyclerView rebinds and restarts
+    Args:
+        parts: str or int, e.g. nickname, content and ordinal
+    Returns:
+        str: 16 hex digit key
+    """
+    data = '\0'.join(str(part) for part in parts).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def normalize_nickname(nickname):
+    """Nickname in one form, whether it came from chat text or the UI
+
+    The stream carries the sender as written in the chat line, the message
+    list shows the nickname view; they can differ in wrapping, width forms,
+    invisible characters and spacing.
+    Args:
+        nickname: str, raw nickname
+    Returns:
+        str: Normalized nickname
+    """
+    if not nickname:
+        return ''
+    nickname = unicodedata.normalize('NFKC', nickname).strip()
+    match = SOULER_WRAPPER_PATTERN.match(nickname)
+    if match:
+        nickname = match.group(1)
+    # Drop zero width and other format characters
+    nickname = ''.join(char for char in nickname if unicodedata.category(char) != 'Cf')
+    return ' '.join(nickname.split())
+
+
+def command_key(nickname, content):
+    """Key of a command message, the same for its stream event and its row on screen"""
+    return message_key(normalize_nickname(nickname), content.strip())
+
+
+class SeenSet:
+    """Fixed-size LRU set of message keys
+
+    Messages on screen are keyed by (nickname, content, ordinal among
+    identical messages on screen) once per pass over the message list. A key
+    observed on the previous pass is still the same message; a key that was
+    off screen for a pass and shows up again belongs to a new message with
+    the same content, e.g. someone repeating :skip later on.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # key -> pass it was last observed in
+        self.ordinals = {}  # (parts) -> identical messages so far in this pass
+        self.passes = 0
+        self.new_count = 0
+        self.seen_count = 0
+        self.evictions = 0
+
+    def next_pass(self):
+        """Start a new pass over the message list"""
+        self.passes += 1
+        self.ordinals.clear()
+
+    def key(self, *parts):
+        """Key of the next message with these parts in the current pass"""
+        ordinal = self.ordinals.get(parts, 0)
+        self.ordinals[parts] = ordinal + 1
+        return message_key(*parts, ordinal)
+
+    def observe(self, key):
+        """Record key as on screen in the current pass
+        Returns:
+            bool: True if the message is new
+        """
+        last_pass = self.entries.get(key)
+        self._touch(key, self.passes)
+        if last_pass is not None and last_pass >= self.passes - 1:
+            self.seen_count += 1
+            return False
+        self.new_count += 1
+        return True
+
+    def add(self, key):
+        """Remember key regardless of passes
+        Returns:
+            bool: True if key was not remembered yet
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return False
+        self._touch(key, self.passes)
+        return True
+
+    def _touch(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def dump(self):
+        """Keys from oldest to newest, for the restart checkpoint"""
+        return list(self.entries)
+
+    def restore(self, keys):
+        """Remember keys of an earlier run as seen on the current pass"""
+        for key in keys[-self.capacity:]:
+            self._touch(key, self.passes)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        """Seen-set size and hit counters"""
+        return {
+            'size': len(self.entries),
+            'capacity': self.capacity,
+            'new': self.new_count,
+            'seen': self.seen_count,
+            'evictions': self.evictions,
+        }
+
+
+class StreamClaims:
+    """Streamed events a later poll of the message list may show again
+
+    Every streamed event can cancel exactly one polled message with the same
+    key, if the poll comes within window seconds. A repeated message, e.g. a
+    second :skip, is a separate event and cancels only its own copy on screen.
+    """
+
+    def __init__(self, window=60):
+        self.window = window
+        self.events = OrderedDict()  # key -> deque of times the event was streamed
+        self.claimed = 0
+        self.expired = 0
+
+    def add(self, key, at=None):
+        """Record one streamed event"""
+        self.events.setdefault(key, deque()).append(at or time.time())
+        self.events.move_to_end(key)
+
+    def claim(self, key, now=None):
+        """Match a polled message to an unclaimed streamed event
+        Returns:
+            bool: True if the message was already streamed
+        """
+        now = now or time.time()
+        self._expire(now)
+        times = self.events.get(key)
+        # Older events of a recently repeated key are not reached by _expire
+        while times and now - times[0] > self.window:
+            times.popleft()
+            self.expired += 1
+        if not times:
+            return False
+        times.popleft()
+        if not times:
+            del self.events[key]
+        self.claimed += 1
+        return True
+
+    def _expire(self, now):
+        # Keys are ordered by their newest event, so stop at the first live one
+        while self.events:
+            key, times = next(iter(self.events.items()))
+            while times and now - times[0] > self.window:
+                times.popleft()
+                self.expired += 1
+            if times:
+                break
+            del self.events[key]
+
+    def stats(self):
+        return {
+            'pending': sum(len(times) for times in self.events.values()),
+            'claimed': self.claimed,
+            'expired': self.expired,
+        }
@@ -2,11 +2,12 @@ import traceback
 from dataclasses import dataclass
 from selenium.common.exceptions import StaleElementReferenceException
 from appium.webdriver.common.appiumby import AppiumBy
-import re
-from collections import deque
 import logging
 
-from ..core.base_command import BaseCommand
+from ..utils.ui_snapshot import LazyElement
+from ..utils.message_classifier import COMMAND, USER_ENTER
+from .event_ingestion import EventIngestion
+from .message_identity import SeenSet, StreamClaims, command_key, message_key
 
 DEFAULT_PARTY_ID = "FM15321640"  # Default party ID to join
 DEFAULT_NOTICE = "U Share I Play\n分享音乐 享受快乐"  # Default party ID to join
@@ -30,17 +31,46 @@ class MessageInfo:
 class MessageManager:
     def __init__(self, handler):
         self.handler = handler
-        self.previous_messages = {}
-        self.recent_messages = deque(maxlen=9)  # Keep last 9 messages
+        # Content keys of messages and chat lines on screen, see SeenSet
+        self.seen = SeenSet(handler.config.get('seen_capacity', 4096))
+        # Resolve the message list from one page source read per tick
+        self.snapshot_mode = handler.config.get('snapshot_mode', False)
+        # Read chat from an event stream, polling only to reconcile
+        self.ingestion = None
+        ingestion_config = handler.config.get('ingestion', {})
+        # Streamed commands and chat lines the next reconcile poll will see again
+        window = 2 * ingestion_config.get('reconcile_interval', 30)
+        self.streamed_commands = StreamClaims(window)
+        self.streamed_chats = StreamClaims(window)
+        if ingestion_config.get('mode', 'polling') == 'stream':
+            self.ingestion = EventIngestion.from_config(
+                ingestion_config,
+                handler.controller.config['device']['name'],
+                handler.logger
+            )
+
+    @property
+    def classifier(self):
+        """Chat classifier compiled from the configured command prefixes"""
+        return self.handler.controller.command_parser.classifier
 
     def get_latest_message(self, enabled=True):
         """Get new message contents that weren't seen before"""
+        if self.ingestion:
+            return self.get_latest_message_from_stream(enabled)
+        return self.poll_latest_message(enabled)
+
+    def poll_latest_message(self, enabled=True):
+        """Walk the message list for messages that weren't there last time"""
         if not self.handler.switch_to_app():
             self.handler.logger.error("Failed to switch to Soul app")
             return None
 
+        if self.snapshot_mode:
+            return self.get_latest_message_from_snapshot(enabled)
+
         # Check for QQ Music ANR dialog and handle it
-        anr_close = self.handler.try_find_element_plus('close_app', log=False)
+        anr_close = self.handler.probe_element_plus('close_app')
         if anr_close:
             anr_close.click()
             self.handler.switch_to_app()
@@ -63,26 +93,176 @@ class MessageManager:
             self.handler.logger.error(f'cannot find message_list element, might be in loading')
             return None
 
-        # Process each container and collect message info
-        current_messages = {}  # Dict to store element_id: MessageInfo pairs
+        # Process each container and collect new message info
+        self.seen.next_pass()
+        new_messages = {}  # Dict to store message key: MessageInfo pairs
+
+        for container in containers:
+            message_info = self.process_container_message(container)
+            greeting_info = self.process_container_greeting(container)
+            self.collect_new_message(new_messages, greeting_info or message_info)
+
+        return new_messages if new_messages else None
+
+    def get_latest_message_from_snapshot(self, enabled=True):
+        """Snapshot variant of get_latest_message
+
+        Fetches page source once, resolves every element key against the parsed
+        tree and only touches the driver when something has to be clicked.
+        """
+        try:
+            snapshot = self.handler.snapshot()
+        except Exception:
+            self.handler.logger.error(f'Failed to capture page source: {traceback.format_exc()}')
+            return None
+
+        # Check for QQ Music ANR dialog and handle it
+        anr_close = self.find_snapshot_element(snapshot, 'close_app')
+        if anr_close:
+            anr_close.click()
+            self.handler.switch_to_app()
+            snapshot = self.handler.snapshot()
+
+        message_list = self.find_snapshot_element(snapshot, 'message_list')
+        if not message_list:
+            # Recovery paths need live elements
+            if not self.try_find_message_list(enabled):
+                return None
+            self.handler.ui_changed()
+            snapshot = self.handler.snapshot()
+            message_list = self.find_snapshot_element(snapshot, 'message_list')
+            if not message_list:
+                return None
+
+        new_message_tip = self.find_snapshot_element(snapshot, 'new_message_tip')
+        if new_message_tip and enabled:
+            self.handler.logger.info('Found new message tip')
+            new_message_tip.click()
+            self.handler.logger.info('Clicked new message tip')
+            snapshot = self.handler.snapshot()
+            message_list = self.find_snapshot_element(snapshot, 'message_list')
+            if not message_list:
+                return None
+
+        # Collapse seats if expanded
+        self.handler.controller.seat_command.collapse_seats()
 
+        containers = message_list.find_elements(AppiumBy.CLASS_NAME, "android.view.ViewGroup")
+
+        self.seen.next_pass()
+        new_messages = {}
         for container in containers:
             message_info = self.process_container_message(container)
             greeting_info = self.process_container_greeting(container)
+            self.collect_new_message(new_messages, greeting_info or message_info)
+
+        return new_messages if new_messages else None
+
+    def get_latest_message_from_stream(self, enabled=True):
+        """Event stream variant of get_latest_message
+
+        Chat lines come from the ingestion thread. The message list is walked
+        only when reconciliation is due, to pick up events the stream missed
+        and to recover from dialogs or a minimized party.
+        """
+        self.ingestion.start()
+
+        new_messages = {}
+        for event in self.ingestion.drain():
+            message_info = self.process_event(event)
             if message_info:
-                current_messages[container.id] = message_info
-            if greeting_info:
-                current_messages[container.id] = greeting_info
+                self.streamed_commands.add(command_key(message_info.nickname, message_info.content), event.received_at)
+                new_messages[f'stream#{event.seq}'] = message_info
 
-        # Update previous message IDs and return new messages
-        new_messages = {}  # Changed from list to dict
-        for element_id, message_info in current_messages.items():
-            if element_id not in self.previous_messages:
-                new_messages[element_id] = message_info  # Store as dict
+        if self.ingestion.reconcile_due():
+            polled = self.poll_latest_message(enabled)
+            self.ingestion.reconciled()
+            for key, message_info in (polled or {}).items():
+                # New on screen, but the stream may have returned it already
+                if not self.streamed_commands.claim(command_key(message_info.nickname, message_info.content)):
+                    new_messages[key] = message_info
 
-        self.previous_messages = current_messages
         return new_messages if new_messages else None
 
+    def process_event(self, event):
+        """Handle one streamed chat line the way process_container_message handles a container
+        Args:
+            event: ChatEvent
+        Returns:
+            MessageInfo: Command message, None for anything else
+        """
+        self.streamed_chats.add(message_key(event.text), event.received_at)
+        self.log_chat(event.text)
+        classified = self.classifier.classify(event.text)
+        if classified.kind == USER_ENTER:
+            self.notify_user_enter(classified.nickname)
+
+        if classified.kind != COMMAND:
+            return None
+        message_info = MessageInfo(classified.content, classified.nickname, None)
+        return self.enrich_message(event.text, message_info)
+
+    def enrich_message(self, chat_text, message_info):
+        """Fill in sender details a stream line cannot carry
+        Args:
+            chat_text: str, raw chat text of the message
+            message_info: MessageInfo parsed from the stream
+        Returns:
+            MessageInfo: With avatar and relation tag if the message is on screen
+        """
+        if not self.handler.switch_to_app():
+            return message_info
+        try:
+            snapshot = self.handler.snapshot()
+            message_list = self.find_snapshot_element(snapshot, 'message_list')
+            if not message_list:
+                return message_info
+
+            # Newest messages are at the bottom
+            containers = message_list.find_elements(AppiumBy.CLASS_NAME, "android.view.ViewGroup")
+            for container in reversed(containers):
+                content_element = self.handler.find_child_element_plus(container, 'message_content')
+                if not content_element:
+                    continue
+                if chat_text not in (content_element.get_attribute('content-desc'), content_element.text):
+                    continue
+                sender = self.read_sender(container)
+                if sender:
+                    avatar_element, nickname, relation_tag = sender
+                    return MessageInfo(message_info.content, nickname, avatar_element, relation_tag)
+        except Exception as e:
+            self.handler.logger.warning(f'Failed to read sender of streamed message: {e}')
+        return message_info
+
+    def find_snapshot_element(self, snapshot, element_key):
+        """Resolve config element key against the snapshot
+        Args:
+            snapshot: UiSnapshot
+            element_key: key in config elements section
+        Returns:
+            LazyElement or None if not on screen
+        """
+        locator_type, value = self.handler._get_locator(element_key)
+        node = snapshot.find(locator_type, value)
+        return LazyElement(self.handler, snapshot, node) if node is not None else None
+
+    def collect_new_message(self, new_messages, message_info):
+        """Add message to new_messages unless it was on screen in the previous pass
+        Args:
+            new_messages: dict, message key -> MessageInfo to add to
+            message_info: MessageInfo of a container or None
+        """
+        if not message_info:
+            return
+        key = self.seen.key(message_info.nickname, message_info.content)
+        if self.seen.observe(key):
+            new_messages[key] = message_info
+
+    def is_new_chat(self, chat_text):
+        """Check if chat line appeared since the previous pass and wasn't streamed already"""
+        is_new = self.seen.observe(self.seen.key(chat_text))
+        return is_new and not (self.ingestion and self.streamed_chats.claim(message_key(chat_text)))
+
     def try_find_message_list(self, enabled):
         """Find and return message list container"""
         message_list = self.handler.try_find_element_plus('message_list')
@@ -129,7 +309,7 @@ class MessageManager:
 
     def check_new_message_tip(self, enabled):
         """Check and click new message tip if present"""
-        new_message_tip = self.handler.try_find_element_plus('new_message_tip', log=False)
+        new_message_tip = self.handler.probe_element_plus('new_message_tip')
         if new_message_tip and enabled:
             self.handler.logger.info(f'Found new message tip')
             new_message_tip.click()
@@ -153,51 +333,22 @@ class MessageManager:
             # Check if container has valid sender avatar
             # Get message content from content-desc attribute
 
-            # Check for duplicate message
-            if not chat_text in self.recent_messages:
-                chat_logger.info(chat_text)
-                self.recent_messages.append(chat_text)
-
-            is_enter, username = BaseCommand.is_user_enter_message(chat_text)
-            if is_enter:
-                self.handler.logger.info(f"User entered: {username}")
-                # Notify all commands
-                for module in self.handler.controller.command_modules.values():
-                    try:
-                        module.command.user_enter(username)
-                    except Exception as e:
-                        self.handler.logger.error(f"Error in command user_enter: {traceback.format_exc()}")
-                    continue
+            classified = self.classifier.classify(chat_text)
+            if self.is_new_chat(chat_text):
+                self.log_chat(chat_text)
+                if classified.kind == USER_ENTER:
+                    self.notify_user_enter(classified.nickname)
 
-            # Parse message content using pattern
-            pattern = r'souler\[.+\]说：:(.+)'
-            match = re.match(pattern, chat_text)
-            if not match:
+            if classified.kind != COMMAND:
                 return None
 
             # Extract actual message content
-            message_content = match.group(1).strip()
+            message_content = classified.content
 
-            # Get avatar element
-            avatar_element = self.handler.find_child_element_plus(
-                container,
-                'sender_avatar'
-            )
-            if not avatar_element:
+            sender = self.read_sender(container)
+            if not sender:
                 return None
-
-            # Get nickname
-            nickname_element = self.handler.find_child_element_plus(
-                container,
-                'sender_nickname'
-            )
-            nickname = nickname_element.text if nickname_element else "Unknown"
-
-            # Check for relation tag
-            relation_tag = bool(self.handler.find_child_element_plus(
-                container,
-                'sender_relation'
-            ))
+            avatar_element, nickname, relation_tag = sender
 
             return MessageInfo(message_content, nickname, avatar_element, relation_tag)
 
@@ -208,6 +359,48 @@ class MessageManager:
             self.handler.logger.error(f"Error processing message container: {traceback.format_exc()}")
             return None
 
+    def log_chat(self, chat_text):
+        """Write chat text to the chat log"""
+        chat_logger.info(chat_text)
+
+    def notify_user_enter(self, username):
+        """Call user_enter of all commands"""
+        self.handler.logger.info(f"User entered: {username}")
+        self.handler.controller.update_scheduler.notify('user_enter')
+        # Notify all commands
+        for module in self.handler.controller.command_modules.values():
+            try:
+                module.command.user_enter(username)
+            except Exception as e:
+                self.handler.logger.error(f"Error in command user_enter: {traceback.format_exc()}")
+
+    def read_sender(self, container):
+        """Read sender details of a message container
+        Returns:
+            tuple: (avatar_element, nickname, relation_tag), None if there is no avatar
+        """
+        # Get avatar element
+        avatar_element = self.handler.find_child_element_plus(
+            container,
+            'sender_avatar'
+        )
+        if not avatar_element:
+            return None
+
+        # Get nickname
+        nickname_element = self.handler.find_child_element_plus(
+            container,
+            'sender_nickname'
+        )
+        nickname = nickname_element.text if nickname_element else "Unknown"
+
+        # Check for relation tag
+        relation_tag = bool(self.handler.find_child_element_plus(
+            container,
+            'sender_relation'
+        ))
+        return avatar_element, nickname, relation_tag
+
     def process_container_greeting(self, container):
         """Process greeting for follower entering room"""
         try:
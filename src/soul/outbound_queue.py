@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import deque
+
+
+class OutboundQueue:
+    """Outbound chat queue in front of SoulHandler.send_message
+
+    Messages queued close together are merged into as few chat posts as the
+    length limit allows, and all posts of one flush share a single input
+    dialog session.
+    """
+
+    def __init__(self, handler, window=0.2, max_length=500):
+        self.handler = handler
+        self.window = window  # Seconds to wait for more messages before posting
+        self.max_length = max_length  # Soul message length limit
+        self.pending = deque()  # (message, queued_at)
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.last_put_time = 0
+
+        self.queued_count = 0
+        self.post_count = 0
+        self.flush_count = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def put(self, message):
+        """Queue message for the next flush"""
+        if not message:
+            return
+        with self.lock:
+            now = time.time()
+            self.pending.append((message, now))
+            self.last_put_time = now
+            self.queued_count += 1
+
+    def depth(self):
+        """Number of messages waiting to be posted"""
+        return len(self.pending)
+
+    def merge(self, messages):
+        """Merge messages into posts within max_length
+        Args:
+            messages: list of str
+        Returns:
+            list: Posts, each message kept whole
+        """
+        posts = []
+        current = ''
+        for message in messages:
+            if not current:
+                current = message
+            elif len(current) + 1 + len(message) <= self.max_length:
+                current = f'{current}\n{message}'
+            else:
+                posts.append(current)
+                current = message
+        if current:
+            posts.append(current)
+        return posts
+
+    def flush(self, wait=True):
+        """Post everything queued
+        Args:
+            wait: bool, give messages queued within the window a chance to join
+        Returns:
+            True if posted, dict with error if posting failed, None if queue was empty
+        """
+        with self.flush_lock:
+            if wait:
+                remaining = self.window - (time.time() - self.last_put_time)
+                if remaining > 0 and self.pending:
+                    time.sleep(remaining)
+
+            with self.lock:
+                items = list(self.pending)
+                self.pending.clear()
+            if not items:
+                return None
+
+            posts = self.merge([message for message, _ in items])
+            result = self.handler.post_messages(posts)
+
+            latency = time.time() - items[0][1]
+            self.flush_count += 1
+            self.post_count += len(posts)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            return result
+
+    def stats(self):
+        """Queue depth, merge ratio and flush latency"""
+        return {
+            'depth': self.depth(),
+            'queued': self.queued_count,
+            'posts': self.post_count,
+            'flushes': self.flush_count,
+            'avg_flush_latency': round(self.total_latency / self.flush_count, 3) if self.flush_count else 0,
+            'max_flush_latency': round(self.max_latency, 3),
+        }
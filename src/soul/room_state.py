@@ -0,0 +1,93 @@
+import re
+import time
+from dataclasses import dataclass
+
+# "3人专注中" under the room topic
+FOCUS_COUNT_PATTERN = re.compile(r'(\d+)人专注中')
+DIGITS_PATTERN = re.compile(r'\d+')
+
+MIC_ON_DESC = '闭麦按钮'  # Mic button offers to close the mic while it is on
+SEATS_EXPANDED_TEXT = '收起座位'
+SEATS_COLLAPSED_TEXT = '展开座位'
+
+
+@dataclass(frozen=True)
+class Seat:
+    """One seat container, holding a left and a right seat"""
+    index: int  # Position among seat containers on screen
+    left_taken: bool
+    right_taken: bool
+    left_label: str = None  # e.g. 群主
+    right_label: str = None
+
+
+@dataclass(frozen=True)
+class RoomState:
+    """Party room state parsed from one page source snapshot"""
+    captured_at: float
+    user_count: int = None
+    user_count_text: str = None
+    focus_count: int = None
+    seats_expanded: bool = None  # None if the expand/collapse handle is not on screen
+    seats: tuple = ()
+    mic_on: bool = None
+    luck_pack_text: str = None
+
+    @classmethod
+    def parse(cls, handler, snapshot):
+        """Parse room state from a snapshot of the party screen
+        Args:
+            handler: SoulHandler, for element locators
+            snapshot: UiSnapshot of the Soul app
+        Returns:
+            RoomState: Parsed state, fields are None when not on screen
+        """
+        def find(element_key, parent=None):
+            locator_type, value = handler._get_locator(element_key)
+            return snapshot.find(locator_type, value, parent)
+
+        def text(element_key):
+            node = find(element_key)
+            return node.get('text') if node is not None else None
+
+        user_count_text = text('user_count')
+        user_count = None
+        if user_count_text:
+            digits = ''.join(DIGITS_PATTERN.findall(user_count_text))
+            user_count = int(digits) if digits else None
+
+        focus_count = None
+        focus_text = text('focus_count')
+        match = FOCUS_COUNT_PATTERN.search(focus_text) if focus_text else None
+        if match:
+            focus_count = int(match.group(1))
+
+        expand_text = text('expand_seats')
+        seats_expanded = {SEATS_EXPANDED_TEXT: True, SEATS_COLLAPSED_TEXT: False}.get(expand_text)
+
+        mic = find('toggle_mic')
+        mic_desc = mic.get('content-desc') if mic is not None else None
+
+        locator_type, value = handler._get_locator('seat_container')
+        seats = []
+        for index, container in enumerate(snapshot.find_all(locator_type, value) or []):
+            left_label = find('left_label', container)
+            right_label = find('right_label', container)
+            seats.append(Seat(
+                index,
+                find('left_state', container) is not None,
+                find('right_state', container) is not None,
+                left_label.get('text') if left_label is not None else None,
+                right_label.get('text') if right_label is not None else None,
+            ))
+
+        return cls(
+            captured_at=time.time(),
+            user_count=user_count,
+            user_count_text=user_count_text,
+            focus_count=focus_count,
+            seats_expanded=seats_expanded,
+            seats=tuple(seats),
+            mic_on=mic_desc == MIC_ON_DESC if mic_desc else None,
+            luck_pack_text=text('luck_pack'),
+        )
@@ -2,7 +2,6 @@ import time
 import traceback
 
 from PIL.ImageOps import contain
-from appium.webdriver.common.appiumby import AppiumBy
 from selenium.common import WebDriverException
 
 from ..utils.app_handler import AppHandler
@@ -11,6 +10,8 @@ from dataclasses import dataclass
 from selenium.common.exceptions import StaleElementReferenceException
 from ..core.base_command import BaseCommand
 from .message_manager import MessageManager
+from .outbound_queue import OutboundQueue
+from .room_state import RoomState
 
 # Constants
 @dataclass
@@ -26,8 +27,10 @@ class SoulHandler(AppHandler):
     def __init__(self, driver, config, controller):
         super().__init__(driver, config, controller)
         self.message_manager = MessageManager(self)
+        self.outbound = OutboundQueue(self, max_length=config.get('max_message_length', 500))
         self.previous_message_ids = set()  # Store previous element IDs
         self.party_id = None
+        self.room_state_cache = None  # (snapshot, RoomState parsed from it)
         self.last_content = None  # Last message content
         self.second_last_content = None  # Second last message content
     
@@ -35,38 +38,86 @@ class SoulHandler(AppHandler):
         """Get new message contents that weren't seen before"""
         return self.message_manager.get_latest_message(enabled)
 
+    def room_state(self):
+        """Room state of the current screen, parsed once per page source snapshot
+        Returns:
+            RoomState or None if page source cannot be read
+        """
+        try:
+            snapshot = self.snapshot()
+        except WebDriverException as e:
+            self.logger.warning(f'Failed to capture page source for room state: {e.msg}')
+            return None
+        cache = self.room_state_cache
+        if cache is None or cache[0] is not snapshot:
+            cache = (snapshot, RoomState.parse(self, snapshot))
+            self.room_state_cache = cache
+        return cache[1]
+
     def send_message(self, message):
-        """Send message"""
+        """Send message, together with anything already queued"""
+        self.outbound.put(message)
+        return self.outbound.flush()
+
+    def queue_message(self, message):
+        """Queue message to be sent with the next flush"""
+        self.outbound.put(message)
+
+    def flush_messages(self):
+        """Send all queued messages"""
+        return self.outbound.flush()
+
+    def post_messages(self, posts):
+        """Post messages in one input dialog session
+        Args:
+            posts: list of str, chat posts in order
+        Returns:
+            True if sent, dict with error otherwise
+        """
         self.switch_to_app()
 
         # Click on the input box entry first
         input_box_entry = self.wait_for_element_clickable_plus('input_box_entry')
         if not input_box_entry:
             self.logger.error(f'cannot find input box entry, might be in loading')
-            return
+            return {
+                'error': 'Failed to find input box entry',
+            }
         input_box_entry.click()
         self.logger.info("Clicked input box entry")
 
-        # Now find and interact with the actual input box
-        input_box = self.wait_for_element_clickable_plus('input_box')
-        if not input_box:
-            self.logger.error(f'cannot find input box, might be in chat screen')
-            return {
-                'error': 'Failed to find input box',
-            }
-        input_box.send_keys(message)
-        self.logger.info(f"Entered message: {message}")
+        for i, message in enumerate(posts):
+            if i > 0 and not self.try_find_element_plus('input_box', log=False):
+                # Dialog closed itself after the previous post
+                input_box_entry = self.wait_for_element_clickable_plus('input_box_entry')
+                if not input_box_entry:
+                    self.logger.error('cannot find input box entry to reopen input dialog')
+                    return {
+                        'error': 'Failed to find input box entry',
+                    }
+                input_box_entry.click()
+                self.logger.info("Reopened input dialog")
+
+            # Now find and interact with the actual input box
+            input_box = self.wait_for_element_clickable_plus('input_box')
+            if not input_box:
+                self.logger.error('cannot find input box, might be in chat screen')
+                return {
+                    'error': 'Failed to find input box',
+                }
+            input_box.send_keys(message)
+            self.logger.info(f"Entered message: {message}")
 
-        # click send button
-        send_button = self.wait_for_element_clickable_plus('button_send')
-        if not send_button:
-            self.logger.error(f'cannot find send button')
-            return {
-                'error': 'Failed to find send button',
-            }
+            # click send button
+            send_button = self.wait_for_element_clickable_plus('button_send')
+            if not send_button:
+                self.logger.error('cannot find send button')
+                return {
+                    'error': 'Failed to find send button',
+                }
 
-        send_button.click()
-        self.logger.info("Clicked send button")
+            send_button.click()
+            self.logger.info("Clicked send button")
 
         input_box_entry = self.try_find_element_plus('input_box_entry', log=False)
         if input_box_entry:
@@ -90,13 +141,11 @@ class SoulHandler(AppHandler):
         if not input_box_entry:
             self.press_back()
             self.logger.warning("Failed to hide input dialog, try again")
+        return True
 
     def find_party_to_join(self, party_id):
         # Find and click search entry
-        search_entry = self.wait_for_element_clickable(
-            AppiumBy.ID,
-            self.config['elements']['search_entry']
-        )
+        search_entry = self.wait_for_element_clickable(*self._get_locator('search_entry'))
         if not search_entry:
             print(f"Search entry not found")
             return {
@@ -107,10 +156,7 @@ class SoulHandler(AppHandler):
         self.logger.info("Clicked search entry")
 
         # Find search box and input party ID
-        search_box = self.wait_for_element_clickable(
-            AppiumBy.ID,
-            self.config['elements']['search_box']
-        )
+        search_box = self.wait_for_element_clickable(*self._get_locator('search_box'))
         if not search_box:
             self.logger.error(f"Search box not found")
             return {
@@ -120,10 +166,7 @@ class SoulHandler(AppHandler):
         self.logger.info(f"Entered party ID: {party_id}")
 
         # Click search button
-        search_button = self.wait_for_element_clickable(
-            AppiumBy.ID,
-            self.config['elements']['search_button']
-        )
+        search_button = self.wait_for_element_clickable(*self._get_locator('search_button'))
         if not search_button:
             self.logger.error(f"Search button not found")
             return {
@@ -132,40 +175,39 @@ class SoulHandler(AppHandler):
         search_button.click()
         self.logger.info("Clicked search button")
 
-        party_tab = self.wait_for_element_clickable(AppiumBy.XPATH, self.config['elements']['party_tab'])
+        party_tab = self.wait_for_element_clickable(*self._get_locator('party_tab'))
         if not party_tab:
             self.logger.error(f"Party tab not found")
             return {'error': 'Party tab not found'}
         party_tab.click()
         self.logger.info("Clicked party tab")
 
-        search_result = self.wait_for_element(AppiumBy.ID, self.config['elements']['party_search_result'])
+        search_result = self.wait_for_element(*self._get_locator('party_search_result'))
         if not search_result:
             self.logger.error(f"Party search result not found")
             return {'error': 'Party search result not found'}
         self.logger.info("Found party search result")
 
-        empty_result = self.find_child_element(search_result, AppiumBy.ID,
-                                               self.config['elements']['party_search_empty'])
+        empty_result = self.find_child_element(search_result, *self._get_locator('party_search_empty'))
         if empty_result:
             self.logger.error(f"Party ID: {party_id} not found")
             return {'error': 'Party not found'}
 
-        party_entry = self.find_child_element(search_result, AppiumBy.ID, self.config['elements']['party_search_entry'])
+        party_entry = self.find_child_element(search_result, *self._get_locator('party_search_entry'))
         if not party_entry:
             self.logger.error(f"Party entry: {party_id} not found")
             return {'error': 'Party entry not found'}
 
         # Check party status after finding the message
         # Check if the party has ended
-        party_online = self.find_child_element(party_entry, AppiumBy.ID, self.config['elements']['party_online'])
+        party_online = self.find_child_element(party_entry, *self._get_locator('party_online'))
         if party_online:
             # Party is ongoing, click the party entry
             party_entry.click()
             self.logger.info("Clicked party entry")
 
             time.sleep(1)
-            party_back = self.try_find_element(AppiumBy.ID, self.config['elements']['party_back'], log=False)
+            party_back = self.try_find_element(*self._get_locator('party_back'), log=False)
             if party_back:
                 self.logger.info(f"Found back to party dialog and close")
                 party_back.click()
@@ -174,45 +216,38 @@ class SoulHandler(AppHandler):
             self.logger.info("Party has ended, navigating to create a new party")
             self.press_back()  # Go back to the home screen
 
-            planet_tab = self.wait_for_element_clickable(AppiumBy.ID, self.config['elements']['planet_tab'])
+            planet_tab = self.wait_for_element_clickable(*self._get_locator('planet_tab'))
             if not planet_tab:
                 self.logger.error("Failed to find planet tab")
                 return {'error': 'Failed to find planet tab'}
             planet_tab.click()
             self.logger.info("Clicked planet tab")
 
-            party_hall_entry = self.wait_for_element_clickable(AppiumBy.XPATH,
-                                                               self.config['elements']['party_hall_entry'])
+            party_hall_entry = self.wait_for_element_clickable(*self._get_locator('party_hall_entry'))
             if not party_hall_entry:
                 self.logger.error(f"Party hall entry not found")
                 return {'error': 'Party hall entry not found'}
             party_hall_entry.click()
             self.logger.info("Clicked party hall entry")
 
-            create_party_entry = self.wait_for_element_clickable(AppiumBy.ID,
-                                                                 self.config['elements']['create_party_entry'])
+            create_party_entry = self.wait_for_element_clickable(*self._get_locator('create_party_entry'))
             if not create_party_entry:
                 self.logger.error(f"Party creation entry not found")
                 return {'error': 'Party creation entry not found'}
             create_party_entry.click()
             self.logger.info("Clicked create party entry")
 
-            confirm_party_button = self.wait_for_element_clickable(AppiumBy.ID,
-                                                                   self.config['elements'][
-                                                                       'confirm_party'], timeout=5)
+            confirm_party_button = self.wait_for_element_clickable(*self._get_locator('confirm_party'), timeout=5)
             if confirm_party_button:
                 confirm_party_button.click()
                 self.logger.info("Clicked confirm party button")
-                self.wait_for_element(AppiumBy.ID, self.config['elements']['create_party_screen'])
+                self.wait_for_element(*self._get_locator('create_party_screen'))
             else:
-                restore_party_button = self.wait_for_element_clickable(AppiumBy.ID, self.config['elements'][
-                    'restore_party'])
+                restore_party_button = self.wait_for_element_clickable(*self._get_locator('restore_party'))
                 if restore_party_button:
                     restore_party_button.click()
                     self.logger.info("Clicked restore party button")
-                confirm_party_button = self.wait_for_element_clickable(AppiumBy.ID,
-                                                                       self.config['elements'][
-                                                                           'confirm_party'], timeout=5)
+                confirm_party_button = self.wait_for_element_clickable(*self._get_locator('confirm_party'), timeout=5)
                 if confirm_party_button:
                     confirm_party_button.click()
                     self.logger.info("Clicked confirm party button")
@@ -223,13 +258,13 @@ class SoulHandler(AppHandler):
                 self.logger.info("Clicked create party button")
 
 
-        input_box_entry = self.wait_for_element(AppiumBy.ID, self.config['elements']['input_box_entry'])
+        input_box_entry = self.wait_for_element(*self._get_locator('input_box_entry'))
         if not input_box_entry:
             self.logger.error(f"Input box entry not found")
             return {'error': 'Input box entry not found'}
         self.logger.info(f"Entered party {party_id}")
 
-        claim_reward = self.try_find_element(AppiumBy.ID, self.config['elements']['claim_reward'])
+        claim_reward = self.try_find_element(*self._get_locator('claim_reward'))
         if claim_reward:
             claim_reward.click()
             self.logger.info("Claimed party creation reward")
@@ -252,10 +287,7 @@ class SoulHandler(AppHandler):
                 }
 
             # Click more menu button
-            more_menu = self.wait_for_element_clickable(
-                AppiumBy.ID,
-                self.config['elements']['more_menu']
-            )
+            more_menu = self.wait_for_element_clickable(*self._get_locator('more_menu'))
             if not more_menu:
                 return {
                     'error': 'Failed to find more menu button',
@@ -265,25 +297,19 @@ class SoulHandler(AppHandler):
             more_menu.click()
             print("Clicked more menu button")
 
-            self.wait_for_element(AppiumBy.ID, self.config['elements']['more_menu_container'])
+            self.wait_for_element(*self._get_locator('more_menu_container'))
 
-            end_party = self.try_find_element(
-                AppiumBy.XPATH,
-                self.config['elements']['end_party']
-            )
+            end_party = self.try_find_element(*self._get_locator('end_party'))
 
             if end_party:
                 end_party.click()
-                confirm_end = self.wait_for_element_clickable(AppiumBy.XPATH, self.config['elements']['confirm_end'])
+                confirm_end = self.wait_for_element_clickable(*self._get_locator('confirm_end'))
                 confirm_end.click()
                 self.party_id = party_id
                 return {'party_id': party_id, 'user': message_info.nickname}
 
             # Find and click party hall entry
-            party_hall = self.wait_for_element_clickable(
-                AppiumBy.XPATH,
-                self.config['elements']['party_hall']
-            )
+            party_hall = self.wait_for_element_clickable(*self._get_locator('party_hall'))
             if not party_hall:
                 return {
                     'error': 'Failed to find party hall entry',
@@ -294,10 +320,7 @@ class SoulHandler(AppHandler):
             print("Clicked party hall entry")
 
             # Find and click search entry
-            search_entry = self.wait_for_element_clickable(
-                AppiumBy.ID,
-                self.config['elements']['search_entry']
-            )
+            search_entry = self.wait_for_element_clickable(*self._get_locator('search_entry'))
             if not search_entry:
                 return {
                     'error': 'Failed to find search entry',
@@ -308,10 +331,7 @@ class SoulHandler(AppHandler):
             print("Clicked search entry")
 
             # Find search box and input party ID
-            search_box = self.wait_for_element_clickable(
-                AppiumBy.ID,
-                self.config['elements']['search_box']
-            )
+            search_box = self.wait_for_element_clickable(*self._get_locator('search_box'))
             if not search_box:
                 return {
                     'error': 'Failed to find search box',
@@ -322,10 +342,7 @@ class SoulHandler(AppHandler):
             print(f"Entered party ID: {party_id}")
 
             # Click search button
-            search_button = self.wait_for_element_clickable(
-                AppiumBy.ID,
-                self.config['elements']['search_button']
-            )
+            search_button = self.wait_for_element_clickable(*self._get_locator('search_button'))
             if not search_button:
                 return {
                     'error': 'Failed to find search button',
@@ -336,10 +353,7 @@ class SoulHandler(AppHandler):
             print("Clicked search button")
 
             # Find parties search result
-            parties_search = self.wait_for_element(
-                AppiumBy.ID,
-                self.config['elements']['parties_search']
-            )
+            parties_search = self.wait_for_element(*self._get_locator('parties_search'))
             if not parties_search:
                 return {
                     'error': 'Failed to find parties search',
@@ -353,16 +367,12 @@ class SoulHandler(AppHandler):
             # Look for party ID element
             party_element = self.find_child_element(
                 parties_search,
-                AppiumBy.ID,
-                self.config['elements']['party_id']
+                *self._get_locator('party_id')
             )
 
             if not party_element:
                 print("Party not found, returning to previous party")
-                floating_entry = self.wait_for_element_clickable(
-                    AppiumBy.ID,
-                    self.config['elements']['floating_entry']
-                )
+                floating_entry = self.wait_for_element_clickable(*self._get_locator('floating_entry'))
                 floating_entry.click()
                 return {
                     'error': f'Party {party_id} not found',
@@ -461,18 +471,12 @@ class SoulHandler(AppHandler):
         """Wait for the grab mic button and confirm the action"""
         try:
             # Wait for the grab mic button to be clickable
-            grab_mic_button = self.wait_for_element_clickable(
-                AppiumBy.ID,
-                self.config['elements']['grab_mic']
-            )
+            grab_mic_button = self.wait_for_element_clickable(*self._get_locator('grab_mic'))
             grab_mic_button.click()
             print("Clicked grab mic button")
 
             # Wait for the confirmation dialog to appear
-            confirm_button = self.wait_for_element_clickable(
-                AppiumBy.XPATH,
-                self.config['elements']['confirm_mic']
-            )
+            confirm_button = self.wait_for_element_clickable(*self._get_locator('confirm_mic'))
             confirm_button.click()
             print("Clicked confirm button for mic")
 
@@ -483,26 +487,25 @@ class SoulHandler(AppHandler):
         """Ensure the microphone is active"""
         try:
             # Check if the grab mic button is present
-            grab_mic_button = self.try_find_element(
-                AppiumBy.ID,
-                self.config['elements']['grab_mic']
-            )
+            grab_mic_button = self.try_find_element(*self._get_locator('grab_mic'))
 
             if grab_mic_button:
                 self.logger.info("Grab mic button found, grabbing mic...")
                 self.grab_mic_and_confirm()
             else:
                 self.logger.info("Already on mic, checking toggle mic status...")
-                # Check the toggle mic button
-                toggle_mic_button = self.wait_for_element_clickable_plus('toggle_mic')
-                
-                if not toggle_mic_button:
+                # Mic status comes from the room state of the current snapshot
+                state = self.room_state()
+                if state is None or state.mic_on is None:
                     self.logger.error("Toggle mic button not found")
                     return
 
-                desc = self.try_get_attribute(toggle_mic_button, 'content-desc')
-                if desc == "开麦按钮":  # If we see "开麦按钮", mic is currently off
+                if not state.mic_on:
                     self.logger.info("Mic is off, turning it on...")
+                    toggle_mic_button = self.wait_for_element_clickable_plus('toggle_mic')
+                    if not toggle_mic_button:
+                        self.logger.error("Toggle mic button not found")
+                        return
                     toggle_mic_button.click()
                     self.logger.info("Clicked toggle mic button to turn on mic")
 
@@ -5,7 +5,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.remote.webelement import WebElement
-from appium.webdriver.common.appiumby import AppiumBy
 from selenium.common.exceptions import StaleElementReferenceException, WebDriverException, TimeoutException
 import selenium
 import logging
@@ -15,15 +14,21 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.actions import interaction
 from selenium.webdriver.common.actions.pointer_input import PointerInput
 from selenium.webdriver.common.actions.action_builder import ActionBuilder
+from .locator_registry import LocatorRegistry
+from .ui_snapshot import LazyElement
 
 
 class AppHandler:
     def __init__(self, driver, config, controller):
         self.driver = driver
         self.config = config
+        self.locators = LocatorRegistry(config['elements'])
         self.logger = self._setup_logger()
+        if self.locators.slow_keys:
+            self.logger.info(f"Slow XPath locators: {', '.join(self.locators.slow_keys)}")
         self.error_count = 0
         self.controller = controller
+        self.shell = controller.shell
 
     def _setup_logger(self):
         """Setup logger for the handler
@@ -148,6 +153,8 @@ class AppHandler:
             element = WebDriverWait(self.driver, timeout).until(
                 EC.element_to_be_clickable((locator_type, value))
             )
+            # Element is about to be interacted with
+            self.ui_changed()
             self.logger.debug(f"Found clickable element: {element_key}")
             return element
         except TimeoutException as e:
@@ -175,6 +182,8 @@ class AppHandler:
             element = WebDriverWait(self.driver, timeout).until(
                 EC.element_to_be_clickable((locator_type, locator_value))
             )
+            # Element is about to be interacted with
+            self.ui_changed()
             self.logger.debug(f"Found clickable element: {locator_value}")
             return element
         except TimeoutException as e:
@@ -187,27 +196,70 @@ class AppHandler:
 
     def switch_to_app(self):
         """Switch to specified app"""
+        package_name = self.config['package_name']
+        tracker = self.controller.foreground_tracker
+        if tracker.is_foreground(package_name):
+            tracker.record_skip()
+            # A reminder may pop up while the app stays in front, the probe is memoized
+            self._close_reminder()
+            return True
+
         try:
-            self.driver.activate_app(self.config['package_name'])
+            self.driver.activate_app(package_name)
         except selenium.common.exceptions.WebDriverException as e:
             self.logger.error(f"Failed to switch to app")
+            tracker.mark_uncertain()
             return False
-        reminder_ok = self.try_find_element(AppiumBy.ID, self.config['elements']['reminder_ok'], log=False)
+        tracker.record_switch(package_name)
+
+        self._close_reminder()
+        time.sleep(0.1)
+        return True
+
+    def _close_reminder(self):
+        reminder_ok = self.probe_element_plus('reminder_ok')
         if reminder_ok:
             self.logger.debug(f"Found reminder dialog and close")
             reminder_ok.click()
-        time.sleep(0.1)
-        return True
 
     def close_app(self):
         """关闭应用"""
         self.driver.terminate_app(self.config['package_name'])
+        self.controller.foreground_tracker.mark_uncertain()
     
     def switch_to_activity(self, activity):
         """Switch to the specified activity"""
         package_name = self.config['package_name']
         command = f'am start -n {package_name}/{activity}'
-        self.driver.execute_script('mobile: shell', {'command': command})
+        self.shell.run(command)
+        self.controller.foreground_tracker.observe(package_name)
+        self.ui_changed()
+
+    def ui_changed(self):
+        """Mark cached page source as stale after a UI mutation done through the shell
+
+        Mutations through the driver are caught by DriverDeadlines.on_mutation.
+        """
+        self.controller.presence_probe.invalidate()
+
+    def snapshot(self):
+        """Page source snapshot of this app, shared with presence probes"""
+        return self.controller.presence_probe.snapshot(self.config['package_name'])
+
+    def probe_element_plus(self, element_key: str):
+        """Check if element is on screen without an Appium find
+        Args:
+            element_key: Key in config elements section
+        Returns:
+            LazyElement if present, None if not
+        """
+        locator_type, value = self._get_locator(element_key)
+        try:
+            snapshot, node = self.controller.presence_probe.find(locator_type, value, self.config['package_name'])
+        except (ValueError, WebDriverException):
+            # Locator cannot be matched locally or page source failed, ask the device
+            return self.try_find_element_plus(element_key, log=False)
+        return LazyElement(self, snapshot, node) if node is not None else None
 
     def press_enter(self, element):
         """
@@ -216,12 +268,16 @@ class AppHandler:
             element: The WebElement to send Enter key to
         """
         self.driver.press_keycode(66)
+        self.ui_changed()
         self.logger.debug('Pressed Return Key')
 
     def press_back(self):
         """Press Android back button"""
         try:
             self.driver.press_keycode(4)  # Android back key code
+            self.ui_changed()
+            # Back from a root activity leaves the app
+            self.controller.foreground_tracker.mark_uncertain()
         except WebDriverException as e:
             self.error_count += 1
             self.logger.error(f"Failed to press back button,  times: {self.error_count}, trace:{traceback.format_exc()} error: {str(e)}")
@@ -234,6 +290,7 @@ class AppHandler:
     def press_dpad_down(self):
         """Press Android DPAD down button"""
         self.driver.press_keycode(20)  # KEYCODE_DPAD_DOWN
+        self.ui_changed()
         self.logger.debug("Pressed DPAD down button")
 
     def press_volume_up(self):
@@ -251,14 +308,9 @@ class AppHandler:
         Args:
             times: int, number of times to press the right key
         """
-        for _ in range(times):
-            self.driver.execute_script(
-                'mobile: shell',
-                {
-                    'command': 'input keyevent KEYCODE_DPAD_RIGHT'
-                }
-            )
-            time.sleep(0.1)  # Small delay between key presses
+        # One shell call, with a small delay between key presses
+        self.shell.run('; sleep 0.1; '.join(['input keyevent KEYCODE_DPAD_RIGHT'] * times), timeout=times + 10)
+        self.ui_changed()
 
     def try_find_element_plus(self, element_key: str, log=True, clickable=False) -> WebElement:
         """Enhanced try_find_element using just element key"""
@@ -346,6 +398,7 @@ class AppHandler:
     def paste_text(self):
         """Execute paste operation using Android keycode"""
         self.driver.press_keycode(279)  # KEYCODE_PASTE = 279
+        self.ui_changed()
         self.logger.debug("Pressed paste key")
 
     def find_child_element(self, parent, locator_type, locator_value):
@@ -403,12 +456,7 @@ class AppHandler:
 
     def _get_locator(self, element_key: str) -> tuple:
         """Helper to get locator type and value from element key"""
-        if element_key not in self.config['elements']:
-            raise ValueError(f"Element key '{element_key}' not found in config")
-        
-        value = self.config['elements'][element_key]
-        locator_type = AppiumBy.XPATH if value.startswith('//') else AppiumBy.ID
-        return locator_type, value
+        return self.locators.get(element_key)
 
 
     def find_elements_plus(self, element_key: str) -> list:
@@ -452,6 +500,7 @@ class AppHandler:
             actions.w3c_actions.pointer_action.pause(0.1)
             actions.w3c_actions.pointer_action.pointer_up()
             actions.perform()
+            self.ui_changed()
             
             self.logger.debug(f"Clicked element at position ({click_x}, {click_y})")
             return True
@@ -469,11 +518,8 @@ class AppHandler:
             WebElement or None if not found
         """
         try:
-            element_id = self.config['elements'][element_key]
-            if element_id.startswith('//'):
-                return self.find_child_element(parent, AppiumBy.XPATH, element_id)
-            else:
-                return self.find_child_element(parent, AppiumBy.ID, element_id)
+            locator_type, value = self._get_locator(element_key)
+            return self.find_child_element(parent, locator_type, value)
         except Exception as e:
             self.logger.debug(f"Failed to find child element {element_key}: {str(e)}")
             return None
@@ -1,36 +1,69 @@
+from types import MappingProxyType
+from typing import NamedTuple
+
+from .message_classifier import MessageClassifier
+
+
+class ParsedCommand(NamedTuple):
+    """Result of parsing one command message, never shared between messages"""
+    prefix: str  # Canonical prefix, also when an alias was used
+    parameters: tuple
+    response_template: str
+    error_template: str
+    config: MappingProxyType  # Read-only view of the command config
+
+
 class CommandParser:
+    """Parses command messages through a prefix dict built once
+
+    Parsing only reads the dict, so it is safe to call from several threads.
+    """
+
     def __init__(self, commands, lyrics_tags=None):
         self.commands = commands
         self.lyrics_tags = lyrics_tags
+        # Prefix or alias -> (canonical prefix, read-only command config)
+        self.commands_by_prefix = {}
+        for cmd in commands:
+            entry = (cmd['prefix'], MappingProxyType(cmd))
+            for name in [cmd['prefix'], *cmd.get('aliases', [])]:
+                self.commands_by_prefix[name] = entry
+        self.classifier = MessageClassifier(self.commands_by_prefix)
 
-    def is_valid_command(self, message):
-        """Check if message starts with any valid prefix"""
+    def _split(self, message):
+        """Split message into (command entry, parameters), accepting a leading colon"""
         if not message:
-            return False
-        return any(message.startswith(cmd['prefix']) for cmd in self.commands)
-
-    def parse_command(self, message):
-        """Parse command and get the music query"""
-        if not message:
-            return None
-
-        # Split message into command and parameters
+            return None, ()
         parts = message.split()
+        if parts and parts[0].startswith(':'):
+            parts[0] = parts[0][1:]
+            if not parts[0]:
+                parts = parts[1:]
         if not parts:
-            return None
-
-        command = parts[0]
-        parameters = parts[1:]  # All elements after the command
+            return None, ()
+        return self.commands_by_prefix.get(parts[0]), tuple(parts[1:])
 
-        # Find matching command config
-        matching_cmd = None
-        for cmd in self.commands:
-            if command == cmd['prefix']:
-                matching_cmd = cmd
-                break
+    def is_valid_command(self, message):
+        """Check if message starts with a valid prefix or alias"""
+        entry, _ = self._split(message)
+        return entry is not None
 
-        if not matching_cmd:
+    def parse_command(self, message):
+        """Parse command and get the music query
+        Args:
+            message: str, e.g. "play 晴天" or ":play 晴天"
+        Returns:
+            ParsedCommand: Parsed command, None if message is not a command
+        """
+        entry, parameters = self._split(message)
+        if entry is None:
             return None
 
-        matching_cmd['parameters'] = parameters
-        return matching_cmd
\ No newline at end of file
+        prefix, config = entry
+        return ParsedCommand(
+            prefix,
+            parameters,
+            config.get('response_template', ''),
+            config.get('error_template', ''),
+            config
+        )
@@ -1,8 +1,20 @@
 import sqlite3
+import threading
 from datetime import datetime
 import os
 from pathlib import Path
 from collections import defaultdict
+from functools import wraps
+
+
+def synchronized(method):
+    """Serialize access to the shared connection, commands run on worker threads"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DBHelper:
     def __init__(self):
@@ -11,10 +23,12 @@ class DBHelper:
         db_dir.mkdir(exist_ok=True)
         
         self.db_path = db_dir / 'soul_bot.db'
-        self.conn = sqlite3.connect(str(self.db_path))
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self.cursor = self.conn.cursor()
         self.init_db()
 
+    @synchronized
     def init_db(self):
         # Create tables if they don't exist
         self.cursor.execute('''
@@ -27,8 +41,46 @@ class DBHelper:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_results (
+            query_key TEXT PRIMARY KEY,
+            song TEXT NOT NULL,
+            singer TEXT NOT NULL,
+            album TEXT NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            studio INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_search_results_last_used ON search_results (last_used)
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lyrics (
+            song_key TEXT PRIMARY KEY,
+            song TEXT NOT NULL,
+            singer TEXT NOT NULL,
+            album TEXT NOT NULL,
+            raw_text TEXT NOT NULL,
+            groups TEXT,
+            fetched_at REAL NOT NULL
+        )
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS play_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            query TEXT NOT NULL,
+            requester TEXT NOT NULL,
+            song TEXT,
+            singer TEXT,
+            album TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
         self.conn.commit()
 
+    @synchronized
     def add_pending_hello(self, target_username, sender_name, song_name, message):
         self.cursor.execute('''
         INSERT INTO pending_hellos 
@@ -37,6 +89,7 @@ class DBHelper:
         ''', (target_username, sender_name, song_name, message))
         self.conn.commit()
 
+    @synchronized
     def get_pending_hellos(self):
         """Get all pending hellos and convert to defaultdict format
         Returns:
@@ -55,6 +108,7 @@ class DBHelper:
             
         return pending
 
+    @synchronized
     def delete_hello(self, username):
         """Delete all hellos for given username"""
         self.cursor.execute('''
@@ -63,6 +117,7 @@ class DBHelper:
         ''', (username,))
         self.conn.commit()
 
+    @synchronized
     def delete_one_hello(self, username, sender, song, message):
         """Delete one specific hello for given username"""
         self.cursor.execute('''
@@ -78,5 +133,139 @@ class DBHelper:
         ''', (username, sender, song, message))
         self.conn.commit()
 
+    @synchronized
+    def get_search_result(self, query_key):
+        """Get cached search result
+        Returns:
+            tuple: (song, singer, album, position, studio, created_at) or None
+        """
+        self.cursor.execute('''
+        SELECT song, singer, album, position, studio, created_at
+        FROM search_results
+        WHERE query_key = ?
+        ''', (query_key,))
+        return self.cursor.fetchone()
+
+    @synchronized
+    def touch_search_result(self, query_key, used_at):
+        self.cursor.execute('''
+        UPDATE search_results SET last_used = ? WHERE query_key = ?
+        ''', (used_at, query_key))
+        self.conn.commit()
+
+    @synchronized
+    def put_search_result(self, query_key, song, singer, album, position, studio, created_at):
+        self.cursor.execute('''
+        INSERT OR REPLACE INTO search_results
+        (query_key, song, singer, album, position, studio, created_at, last_used)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (query_key, song, singer, album, position, int(studio), created_at, created_at))
+        self.conn.commit()
+
+    @synchronized
+    def delete_search_result(self, query_key):
+        self.cursor.execute('''
+        DELETE FROM search_results WHERE query_key = ?
+        ''', (query_key,))
+        self.conn.commit()
+
+    @synchronized
+    def trim_search_results(self, capacity, expire_before):
+        """Delete expired results and the least recently used ones beyond capacity
+        Returns:
+            int: Number of rows deleted
+        """
+        self.cursor.execute('''
+        DELETE FROM search_results WHERE created_at < ?
+        ''', (expire_before,))
+        deleted = self.cursor.rowcount
+        self.cursor.execute('''
+        DELETE FROM search_results
+        WHERE query_key IN (
+            SELECT query_key FROM search_results
+            ORDER BY last_used DESC
+            LIMIT -1 OFFSET ?
+        )
+        ''', (capacity,))
+        deleted += self.cursor.rowcount
+        self.conn.commit()
+        return deleted
+
+    @synchronized
+    def count_search_results(self):
+        self.cursor.execute('SELECT COUNT(*) FROM search_results')
+        return self.cursor.fetchone()[0]
+
+    @synchronized
+    def add_queue_item(self, query, requester):
+        """Append a play queue item
+        Returns:
+            int: Item id
+        """
+        self.cursor.execute('''
+        INSERT INTO play_queue (query, requester) VALUES (?, ?)
+        ''', (query, requester))
+        self.conn.commit()
+        return self.cursor.lastrowid
+
+    @synchronized
+    def resolve_queue_item(self, item_id, song, singer, album):
+        self.cursor.execute('''
+        UPDATE play_queue SET song = ?, singer = ?, album = ? WHERE id = ?
+        ''', (song, singer, album, item_id))
+        self.conn.commit()
+
+    @synchronized
+    def delete_queue_item(self, item_id):
+        self.cursor.execute('''
+        DELETE FROM play_queue WHERE id = ?
+        ''', (item_id,))
+        self.conn.commit()
+
+    @synchronized
+    def get_queue_items(self):
+        """Get play queue items in order
+        Returns:
+            list: [(id, query, requester, song, singer, album), ...]
+        """
+        self.cursor.execute('''
+        SELECT id, query, requester, song, singer, album
+        FROM play_queue
+        ORDER BY id
+        ''')
+        return self.cursor.fetchall()
+
+    @synchronized
+    def get_lyrics(self, song_key):
+        """Get stored lyrics
+        Returns:
+            tuple: (raw_text, groups json or None, fetched_at) or None
+        """
+        self.cursor.execute('''
+        SELECT raw_text, groups, fetched_at FROM lyrics WHERE song_key = ?
+        ''', (song_key,))
+        return self.cursor.fetchone()
+
+    @synchronized
+    def put_lyrics(self, song_key, song, singer, album, raw_text, groups, fetched_at):
+        self.cursor.execute('''
+        INSERT OR REPLACE INTO lyrics
+        (song_key, song, singer, album, raw_text, groups, fetched_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (song_key, song, singer, album, raw_text, groups, fetched_at))
+        self.conn.commit()
+
+    @synchronized
+    def set_lyrics_groups(self, song_key, groups):
+        self.cursor.execute('''
+        UPDATE lyrics SET groups = ? WHERE song_key = ?
+        ''', (groups, song_key))
+        self.conn.commit()
+
+    @synchronized
+    def count_lyrics(self):
+        self.cursor.execute('SELECT COUNT(*) FROM lyrics')
+        return self.cursor.fetchone()[0]
+
     def __del__(self):
         self.conn.close() 
\ No newline at end of file
@@ -0,0 +1,79 @@
+import re
+import time
+from collections import Counter
+
+# mCurrentFocus=Window{5b1d0a8 u0 cn.soulapp.android/cn.soulapp.android...SoulHouseActivity}
+FOCUS_PATTERN = re.compile(r'mCurrentFocus=Window\{\S+ \S+ ([^/\s}]+)')
+
+
+class ForegroundTracker:
+    """Tracks which package is on top so same-app switches can be skipped
+
+    The foreground package is known from the last switch, and confirmed with a
+    cheap dumpsys window probe when it may have changed behind our back (back
+    presses, or the last confirmation is older than max_age seconds).
+    """
+
+    def __init__(self, shell, max_age=30):
+        self.shell = shell
+        self.max_age = max_age
+        self.package = None
+        self.certain = False
+        self.verified_at = 0
+        self.switches = Counter()  # package -> activate_app calls
+        self.skipped = 0
+        self.probes = 0
+
+    def observe(self, package):
+        """Record package as being on top right now"""
+        self.package = package
+        self.certain = package is not None
+        self.verified_at = time.time()
+
+    def mark_uncertain(self):
+        """Foreground app may have changed, confirm before trusting it again"""
+        self.certain = False
+
+    def probe(self):
+        """Read focused window package from dumpsys window
+        Returns:
+            str: Package name or None if it cannot be determined
+        """
+        self.probes += 1
+        try:
+            result = self.shell.run('dumpsys window | grep mCurrentFocus')
+        except Exception:
+            self.observe(None)
+            return None
+
+        match = FOCUS_PATTERN.search(result or '')
+        self.observe(match.group(1) if match else None)
+        return self.package
+
+    def current(self):
+        """Get foreground package, probing the device if unsure"""
+        if not self.certain or time.time() - self.verified_at > self.max_age:
+            return self.probe()
+        return self.package
+
+    def is_foreground(self, package):
+        return self.current() == package
+
+    def record_switch(self, package):
+        """Record an activate_app call that brought package to the front"""
+        self.switches[package] += 1
+        self.observe(package)
+
+    def record_skip(self):
+        """Record a switch request that was already satisfied"""
+        self.skipped += 1
+
+    def stats(self):
+        """App switch counters"""
+        return {
+            'foreground': self.package,
+            'switches': dict(self.switches),
+            'total_switches': sum(self.switches.values()),
+            'skipped_switches': self.skipped,
+            'probes': self.probes,
+        }
@@ -0,0 +1,129 @@
+import importlib
+import sys
+import threading
+import time
+
+
+class LazyModule:
+    """Stand-in for a heavy module, imported on first attribute access
+
+    Usage:
+        jieba = lazy_import('jieba')
+        jieba.lcut(text)  # jieba is imported here
+    """
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+        self.load_time = None  # Seconds the import took, None until loaded
+        self.loaded_by = None  # 'use' or 'preload'
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self, reason='use'):
+        """Import the module now if not done yet
+        Args:
+            reason: str, recorded in stats, 'use' or 'preload'
+        Returns:
+            module: The imported module
+        """
+        if self._module is not None:
+            return self._module
+        with self._lock:
+            if self._module is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self._name)
+                if self._on_load:
+                    self._on_load(module)
+                self.load_time = time.perf_counter() - start
+                self.loaded_by = reason
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        # Only called for attributes not set in __init__, i.e. those of the module
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f'<LazyModule {self._name} ({state})>'
+
+
+# Shared by every module asking for the same name, so a dependency loads once
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def lazy_import(name, on_load=None):
+    """Get the lazy stand-in of a module
+    Args:
+        name: str, module name as for import
+        on_load: callable(module), run once right after the import, e.g. to seed it
+    Returns:
+        LazyModule: Stand-in shared by all callers
+    """
+    with _registry_lock:
+        lazy = _registry.get(name)
+        if lazy is None:
+            lazy = LazyModule(name, on_load)
+            if name in sys.modules:
+                # Already imported elsewhere, nothing to defer
+                lazy.load('preload')
+            _registry[name] = lazy
+        elif on_load and lazy._on_load is None:
+            lazy._on_load = on_load
+        return lazy
+
+
+def seed_langdetect(module):
+    """Make langdetect results repeatable, on_load hook for lazy_import('langdetect')"""
+    module.DetectorFactory.seed = 0
+
+
+def preload(logger, names=None):
+    """Import lazy modules on a background thread
+    Args:
+        logger: Logger the import timings are reported to
+        names: list of module names, all registered modules if None
+    Returns:
+        threading.Thread: The loading thread, None if there is nothing to load
+    """
+    with _registry_lock:
+        pending = [lazy for name, lazy in _registry.items()
+                   if not lazy.loaded and (names is None or name in names)]
+    if not pending:
+        return None
+
+    def run():
+        for lazy in pending:
+            try:
+                lazy.load('preload')
+                if lazy.loaded_by == 'preload':
+                    logger.info(f"Preloaded {lazy._name} in {lazy.load_time * 1000:.0f}ms")
+            except Exception as e:
+                # Left for first use, which raises where it can be handled
+                logger.error(f"Failed to preload {lazy._name}: {str(e)}")
+
+    thread = threading.Thread(target=run, name='lazy-preload', daemon=True)
+    thread.start()
+    return thread
+
+
+class ImportStats:
+    """Stats view of the lazy module registry for AppController._print_stats"""
+
+    def stats(self):
+        """Load time in milliseconds per module, None while not loaded"""
+        with _registry_lock:
+            items = list(_registry.items())
+        return {
+            name: f'{round(lazy.load_time * 1000)}ms on {lazy.loaded_by}' if lazy.loaded else None
+            for name, lazy in items
+        }
+
+
+import_stats = ImportStats()
@@ -0,0 +1,92 @@
+from collections import Counter
+from typing import NamedTuple
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+from .ui_snapshot import compile_selector
+
+# UiSelector understands these page source attributes
+UIAUTOMATOR_METHODS = {
+    'resource-id': 'resourceId',
+    'text': 'text',
+    'content-desc': 'description',
+}
+
+
+class Locator(NamedTuple):
+    """Precomputed locator for a config element key"""
+    key: str
+    by: str
+    value: str
+    source: str  # Original value from config.yaml
+    slow: bool  # True if the device has to evaluate an XPath
+
+
+def _quote(value):
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def compile_locator(key, source):
+    """Compile a config element value into the fastest equivalent locator
+    Args:
+        key: str, element key in config
+        source: str, element value in config (resource-id or XPath)
+    Returns:
+        Locator: Precomputed locator
+    """
+    if not source.startswith('//'):
+        return Locator(key, AppiumBy.ID, source, source, False)
+
+    selector = compile_selector(AppiumBy.XPATH, source)
+    if selector is None:
+        # Positional or nested XPath, leave it to the device
+        return Locator(key, AppiumBy.XPATH, source, source, True)
+
+    class_name, attributes = selector
+    if not attributes and class_name:
+        return Locator(key, AppiumBy.CLASS_NAME, class_name, source, False)
+    if not attributes or not set(attributes) <= set(UIAUTOMATOR_METHODS):
+        return Locator(key, AppiumBy.XPATH, source, source, True)
+
+    # Resource ids are unique enough on their own, prefer the native id lookup
+    if set(attributes) == {'resource-id'}:
+        return Locator(key, AppiumBy.ID, attributes['resource-id'], source, False)
+
+    selector_value = 'new UiSelector()'
+    if class_name:
+        selector_value += f'.className({_quote(class_name)})'
+    for name in ('resource-id', 'text', 'content-desc'):
+        if name in attributes:
+            selector_value += f'.{UIAUTOMATOR_METHODS[name]}({_quote(attributes[name])})'
+    return Locator(key, AppiumBy.ANDROID_UIAUTOMATOR, selector_value, source, False)
+
+
+class LocatorRegistry:
+    """Locators for one config elements section, compiled once at startup"""
+
+    def __init__(self, elements):
+        self.locators = {key: compile_locator(key, value) for key, value in elements.items()}
+        self.pairs = {key: (locator.by, locator.value) for key, locator in self.locators.items()}
+        self.slow_keys = sorted(key for key, locator in self.locators.items() if locator.slow)
+        self.slow_lookups = Counter()
+
+    def get(self, element_key: str) -> tuple:
+        """Get (locator_type, value) for element key
+        Raises:
+            ValueError: if element key is not in config
+        """
+        pair = self.pairs.get(element_key)
+        if pair is None:
+            raise ValueError(f"Element key '{element_key}' not found in config")
+        if pair[0] == AppiumBy.XPATH:
+            self.slow_lookups[element_key] += 1
+        return pair
+
+    def stats(self):
+        """Locator counts by strategy and lookups of slow XPath keys"""
+        by_type = Counter(locator.by for locator in self.locators.values())
+        return {
+            'locators': dict(by_type),
+            'slow_xpath_keys': self.slow_keys,
+            'slow_xpath_lookups': dict(self.slow_lookups.most_common()),
+        }
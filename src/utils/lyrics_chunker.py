@@ -0,0 +1,134 @@
+import unicodedata
+from functools import lru_cache
+
+# Zero width joiner and variation selectors take no column of their own
+ZERO_WIDTH = {'\u200b', '\u200c', '\u200d', '\ufe0e', '\ufe0f'}
+
+
+@lru_cache(maxsize=4096)
+def char_width(char):
+    """Display columns of one character: 2 for CJK and emoji, 0 for combining marks"""
+    if char in ZERO_WIDTH or unicodedata.combining(char):
+        return 0
+    if unicodedata.east_asian_width(char) in ('W', 'F'):
+        return 2
+    return 1
+
+
+def display_width(text):
+    """Display columns of a string, e.g. display_width('晴天 ok') == 7"""
+    return sum(char_width(char) for char in text)
+
+
+def combine_lines(lines, max_line_width):
+    """Join adjacent lines with a space while they fit in max_line_width columns
+    Args:
+        lines: list of non-empty lines
+        max_line_width: int, display columns per combined line
+    Returns:
+        list: Combined lines
+    """
+    if not lines:
+        return []
+    combined = []
+    current = lines[0]
+    current_width = display_width(current)
+    for line in lines[1:]:
+        width = display_width(line)
+        if current_width + 1 + width <= max_line_width:
+            current += ' ' + line
+            current_width += 1 + width
+        else:
+            combined.append(current)
+            current = line
+            current_width = width
+    combined.append(current)
+    return combined
+
+
+def min_groups(lengths, limit):
+    """Fewest contiguous groups with at most limit characters each, newlines included
+
+    Greedy packing is optimal for this; a line wider than limit gets a group of its own.
+    """
+    groups = 0
+    used = None
+    for length in lengths:
+        if used is not None and used + 1 + length <= limit:
+            used += 1 + length
+        else:
+            groups += 1
+            used = length
+    return groups
+
+
+def chunk_lyrics(lyrics_text, max_line_width=40, max_message_length=500, force_groups=0):
+    """Split lyrics into as few messages as fit the limit, balanced by length
+
+    Lines are combined by display width, so a combined line looks as wide in
+    CJK as in Latin script; messages are measured in characters, the unit of
+    the Soul message limit.
+    Args:
+        lyrics_text: str, lyrics with one line per row
+        max_line_width: int, display columns of a combined line
+        max_message_length: int, characters of one message
+        force_groups: int, ask for this many messages, raised if they would not fit
+    Returns:
+        list: Message groups in order
+    """
+    lines = combine_lines([line.strip() for line in lyrics_text.split('\n') if line.strip()], max_line_width)
+    if not lines:
+        return []
+    n = len(lines)
+    lengths = [len(line) for line in lines]
+    k = max(force_groups, min_groups(lengths, max_message_length))
+    k = min(k, n)
+
+    # Group of lines[i:e] is prefix[e] - prefix[i] characters plus e - i - 1 newlines
+    prefix = [0]
+    for length in lengths:
+        prefix.append(prefix[-1] + length + 1)
+
+    def group_width(i, e):
+        return prefix[e] - prefix[i] - 1
+
+    # best[j][i]: smallest longest group when lines[i:] go into j groups
+    # The best end e of the first group never decreases as i grows, so each
+    # layer is one two-pointer sweep and the whole table is O(n*k)
+    best = [None, [group_width(i, n) for i in range(n)] + [0]]
+    ends = [None, [n] * (n + 1)]
+    for j in range(2, k + 1):
+        layer = [float('inf')] * (n + 1)
+        layer_ends = [n] * (n + 1)
+        previous = best[j - 1]
+        e = 1
+        for i in range(n - j + 1):
+            e = max(e, i + 1)
+            # Cost of first group [i, e) is max(group_width, rest), unimodal in e
+            while e + 1 <= n - j + 1 and \
+                    max(group_width(i, e + 1), previous[e + 1]) <= max(group_width(i, e), previous[e]):
+                e += 1
+            layer[i] = max(group_width(i, e), previous[e])
+            layer_ends[i] = e
+        best.append(layer)
+        ends.append(layer_ends)
+
+    groups = []
+    i = 0
+    for j in range(k, 0, -1):
+        e = ends[j][i]
+        groups.append('\n'.join(lines[i:e]))
+        i = e
+    return groups
+
+
+if __name__ == '__main__':
+    # Compare with a plain character count: python -m src.utils.lyrics_chunker lyrics.txt
+    import sys
+    import time
+
+    text = open(sys.argv[1], encoding='utf-8').read() if len(sys.argv) > 1 else '晴天的风吹过 我的心\n' * 200
+    start = time.perf_counter()
+    groups = chunk_lyrics(text)
+    elapsed = time.perf_counter() - start
+    print(f'{len(groups)} groups in {elapsed * 1000:.2f}ms, lengths {[len(group) for group in groups]}')
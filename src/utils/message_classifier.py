@@ -0,0 +1,117 @@
+import re
+import sys
+import time
+from typing import NamedTuple
+
+# Message kinds
+COMMAND = 'command'  # souler[Tom]说：:play 晴天
+USER_ENTER = 'user_enter'  # Tom进来陪你聊天啦
+FOLLOWER = 'follower'  # 你关注的Tom进入房间啦，打个招呼吧～
+CHAT = 'chat'  # Anything else
+
+# Optional "MM-DD HH:MM:SS - " prefix of logs/chat.log lines
+CHAT_LOG_PREFIX = re.compile(r'^\d{2}-\d{2} \d{2}:\d{2}:\d{2} - ')
+
+
+class Classified(NamedTuple):
+    """Result of classifying one chat line"""
+    kind: str
+    text: str
+    nickname: str = None  # Sender of chat and commands, user of enter and follower events
+    prefix: str = None  # Command prefix without the colon
+    args: tuple = ()  # Command parameters
+    content: str = None  # Command text after the colon, e.g. "play 晴天"
+
+
+class MessageClassifier:
+    """Classifies raw chat text with one precompiled pattern
+
+    Command prefixes are compiled into the pattern as an alternation, so
+    recognizing a command, its prefix and its arguments is a single match
+    instead of a startswith scan over every prefix.
+    """
+
+    def __init__(self, prefixes):
+        self.prefixes = frozenset(prefixes)
+        # Longest first so that "playlist" wins over "play"
+        alternation = '|'.join(re.escape(prefix) for prefix in sorted(self.prefixes, key=len, reverse=True))
+        body = rf'(?P<content>(?P<prefix>{alternation})(?=\s|$)\s*(?P<args>.*))'
+        self.command_pattern = re.compile(rf'\s*{body}')
+        # Chat lines without a known command still match the souler branch
+        self.pattern = re.compile(
+            rf'souler\[(?P<sender>.+?)\]说：(?::\s*{body})?'
+            r'|你关注的(?P<follower>.+)进入房间啦'
+            r'|(?P<user>.+)(?:进来陪你聊天啦|坐着.+来啦).*?$'
+        )
+
+    def classify(self, text):
+        """Classify raw chat text
+        Args:
+            text: str, content-desc or text of a message in the list
+        Returns:
+            Classified: Kind and parsed fields
+        """
+        match = self.pattern.match(text)
+        if not match:
+            return Classified(CHAT, text)
+
+        sender, prefix, args, content, follower, user = match.group(
+            'sender', 'prefix', 'args', 'content', 'follower', 'user')
+        if sender is not None:
+            if prefix is not None:
+                return Classified(COMMAND, text, sender, prefix, tuple(args.split()), content.strip())
+            return Classified(CHAT, text, sender)
+        if follower is not None:
+            return Classified(FOLLOWER, text, follower)
+        return Classified(USER_ENTER, text, user)
+
+    def parse_command(self, content):
+        """Parse command text such as "play 晴天"
+        Args:
+            content: str, command text after the colon
+        Returns:
+            tuple: (prefix, parameters), None if it is not a known command
+        """
+        match = self.command_pattern.match(content)
+        if not match:
+            return None
+        return match.group('prefix'), match.group('args').split()
+
+
+def legacy_classify(text, prefixes):
+    """Classification the way MessageManager and CommandParser did it before, for the benchmark"""
+    is_enter = re.match(r"^(.+)(?:进来陪你聊天啦|坐着.+来啦).*?$", text)
+    match = re.match(r'souler\[.+\]说：:(.+)', text)
+    if match:
+        content = match.group(1).strip()
+        if any(content.startswith(prefix) for prefix in prefixes):
+            parts = content.split()
+            if parts[0] in prefixes:
+                return COMMAND
+    return USER_ENTER if is_enter else CHAT
+
+
+if __name__ == '__main__':
+    # Micro-benchmark over a recorded chat log: python -m src.utils.message_classifier logs/chat.log
+    from .config_loader import ConfigLoader
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'logs/chat.log'
+    prefixes = [cmd['prefix'] for cmd in ConfigLoader.load_config()['commands']]
+    with open(path, encoding='utf-8') as f:
+        lines = [CHAT_LOG_PREFIX.sub('', line.rstrip('\n'), count=1) for line in f if line.strip()]
+    classifier = MessageClassifier(prefixes)
+
+    start = time.perf_counter()
+    legacy = [legacy_classify(line, prefixes) for line in lines]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [classifier.classify(line) for line in lines]
+    classifier_time = time.perf_counter() - start
+
+    counts = {}
+    for result in results:
+        counts[result.kind] = counts.get(result.kind, 0) + 1
+    print(f'{len(lines)} lines: {counts}')
+    print(f'legacy:     {legacy_time * 1e6 / max(len(lines), 1):.2f} us/line')
+    print(f'classifier: {classifier_time * 1e6 / max(len(lines), 1):.2f} us/line')
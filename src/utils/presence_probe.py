@@ -0,0 +1,80 @@
+import time
+
+from .ui_snapshot import UiSnapshot
+
+
+class PresenceProbe:
+    """Answers "is X on screen?" from one page source read per tick
+
+    The snapshot is shared by every handler and memoized until the next UI
+    mutation (click, key press, app switch), until another thread takes the
+    screen lock, or the start of the next tick. Driver mutations invalidate
+    it through DriverDeadlines.on_mutation; shell input goes through
+    AppHandler.ui_changed.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.current = None  # Cached UiSnapshot
+        self.current_package = None  # Package the snapshot was captured for
+        self.results = {}  # (package, locator_type, value) -> node or None
+        self.captures = 0
+        self.capture_time = 0.0
+        self.lookups = 0
+        self.cached_lookups = 0
+
+    def invalidate(self):
+        """Drop cached snapshot after a UI mutation"""
+        self.current = None
+        self.current_package = None
+        self.results.clear()
+
+    def snapshot(self, package=None):
+        """Get the cached snapshot, capturing a new one if needed
+        Args:
+            package: str, package of the app the caller expects on screen
+        Returns:
+            UiSnapshot: Snapshot of the current screen
+        """
+        if self.current is None or self.current_package != package:
+            start = time.time()
+            self.current = UiSnapshot.capture(self.driver)
+            self.current_package = package
+            self.results.clear()
+            self.captures += 1
+            self.capture_time += time.time() - start
+        return self.current
+
+    def find(self, locator_type, value, package=None):
+        """Find first node matching the locator on the current screen
+        Args:
+            locator_type: AppiumBy locator type
+            value: str, locator value
+            package: str, package of the app the caller expects on screen
+        Returns:
+            tuple: (UiSnapshot, node or None)
+        Raises:
+            ValueError: if the locator cannot be matched against page source
+        """
+        self.lookups += 1
+        snapshot = self.snapshot(package)
+        key = (package, locator_type, value)
+        if key in self.results:
+            self.cached_lookups += 1
+            return snapshot, self.results[key]
+
+        nodes = snapshot.find_all(locator_type, value)
+        if nodes is None:
+            raise ValueError(f"Locator '{value}' cannot be probed from page source")
+        node = nodes[0] if nodes else None
+        self.results[key] = node
+        return snapshot, node
+
+    def stats(self):
+        """Snapshot captures and probe lookups so far"""
+        return {
+            'captures': self.captures,
+            'capture_time': round(self.capture_time, 3),
+            'lookups': self.lookups,
+            'cached_lookups': self.cached_lookups,
+        }
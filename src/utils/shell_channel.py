@@ -0,0 +1,224 @@
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+
+class ShellChannelError(Exception):
+    """Shell channel died or a command did not finish in time"""
+
+
+class AppiumShellChannel:
+    """One Appium mobile: shell request, and one adb shell, per command"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.commands = 0
+        self.total_time = 0.0
+
+    def run(self, command, timeout=None):
+        """Run a shell command on the device
+        Args:
+            command: str, shell command
+            timeout: float, unused, Appium applies its own
+        Returns:
+            str: Command output
+        """
+        start = time.perf_counter()
+        try:
+            return self.driver.execute_script('mobile: shell', {'command': command}) or ''
+        finally:
+            self.commands += 1
+            self.total_time += time.perf_counter() - start
+
+    def run_many(self, commands, timeout=None):
+        return [self.run(command, timeout) for command in commands]
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {
+            'mode': 'appium',
+            'commands': self.commands,
+            'avg_time': round(self.total_time / self.commands, 4) if self.commands else 0,
+        }
+
+
+class PersistentShellChannel:
+    """Commands written to one long-lived shell, outputs cut at sentinel lines
+
+    Each command is followed by a printf of a per-channel sentinel and the
+    exit code, so several commands can be written before reading any output.
+    The shell is restarted on the next command after it dies or times out.
+    """
+
+    def __init__(self, argv, timeout=10):
+        self.argv = argv
+        self.timeout = timeout
+        self.sentinel = f'__SHELL_DONE_{uuid.uuid4().hex}__'
+        self.process = None
+        self.lines = None
+        self.lock = threading.Lock()
+
+        self.commands = 0
+        self.total_time = 0.0
+        self.restarts = 0
+        self.timeouts = 0
+
+    def _start(self):
+        self.process = subprocess.Popen(
+            self.argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1
+        )
+        self.lines = queue.Queue()
+        threading.Thread(target=self._read, args=(self.process, self.lines), daemon=True).start()
+        # Merge stderr of the remote commands, like mobile: shell does
+        self.process.stdin.write('exec 2>&1\n')
+        self.restarts += 1
+
+    @staticmethod
+    def _read(process, lines):
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def _ensure_started(self):
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+
+    def _write(self, command):
+        self.process.stdin.write(f"{command}\nprintf '\\n{self.sentinel} %d\\n' $?\n")
+
+    def _collect(self, deadline):
+        output = []
+        while True:
+            try:
+                line = self.lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                self.timeouts += 1
+                self._kill()
+                raise ShellChannelError('Shell command timed out')
+            if line is None:
+                self._kill()
+                raise ShellChannelError('Shell exited')
+            if line.startswith(self.sentinel):
+                # Drop the newline printf put in front of the sentinel
+                return ''.join(output)[:-1]
+            output.append(line)
+
+    def run(self, command, timeout=None):
+        """Run a shell command on the device
+        Args:
+            command: str, shell command
+            timeout: float, seconds to wait for its output
+        Returns:
+            str: Command output, stderr included
+        """
+        return self.run_many([command], timeout)[0]
+
+    def run_many(self, commands, timeout=None):
+        """Write all commands at once, then read their outputs in order
+        Args:
+            commands: list of shell commands
+            timeout: float, seconds to wait for all outputs
+        Returns:
+            list: Output of each command
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + (timeout or self.timeout)
+        with self.lock:
+            try:
+                self._ensure_started()
+                for command in commands:
+                    self._write(command)
+                self.process.stdin.flush()
+                outputs = [self._collect(deadline) for _ in commands]
+            except (BrokenPipeError, OSError) as e:
+                self._kill()
+                raise ShellChannelError(f'Shell channel broken: {e}')
+            self.commands += len(commands)
+            self.total_time += time.perf_counter() - start
+        return outputs
+
+    def _kill(self):
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+        self.process = None
+
+    def close(self):
+        with self.lock:
+            self._kill()
+
+    def stats(self):
+        return {
+            'mode': ' '.join(self.argv),
+            'commands': self.commands,
+            'avg_time': round(self.total_time / self.commands, 4) if self.commands else 0,
+            'restarts': self.restarts,
+            'timeouts': self.timeouts,
+        }
+
+
+class AdbShellChannel(PersistentShellChannel):
+    """Persistent adb shell on the device"""
+
+    def __init__(self, device, timeout=10):
+        super().__init__(['adb', '-s', device, 'shell'], timeout)
+
+
+class LocalShellChannel(PersistentShellChannel):
+    """Persistent local sh, stand-in for the device in tests and benchmarks"""
+
+    def __init__(self, timeout=10):
+        super().__init__(['sh'], timeout)
+
+
+def create_shell_channel(config, driver):
+    """Create the shell channel selected by the shell config section
+    Args:
+        config: dict, full app config
+        driver: Appium driver for the appium mode
+    Returns:
+        Shell channel with run, run_many, close and stats
+    """
+    shell_config = config.get('shell', {})
+    mode = shell_config.get('mode', 'appium')
+    if mode == 'adb':
+        return AdbShellChannel(config['device']['name'], shell_config.get('timeout', 10))
+    if mode == 'local':
+        return LocalShellChannel(shell_config.get('timeout', 10))
+    return AppiumShellChannel(driver)
+
+
+if __name__ == '__main__':
+    # Per-command latency: python -m src.utils.shell_channel [local | adb <device>] [count]
+    # The one-shot row spawns a shell per command, which is what Appium does for mobile: shell
+    import sys
+
+    count = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 200
+    command = 'echo ok'
+    if len(sys.argv) > 2 and sys.argv[1] == 'adb':
+        argv = ['adb', '-s', sys.argv[2], 'shell']
+        channel = AdbShellChannel(sys.argv[2])
+    else:
+        argv = ['sh', '-c']
+        channel = LocalShellChannel()
+
+    rows = {
+        'one-shot': lambda: [subprocess.run(argv + [command], capture_output=True) for _ in range(count)],
+        'channel': lambda: [channel.run(command) for _ in range(count)],
+        'pipelined': lambda: channel.run_many([command] * count),
+    }
+    for name, run in rows.items():
+        start = time.perf_counter()
+        run()
+        print(f'{name:>10}: {(time.perf_counter() - start) / count * 1000:.3f} ms/command')
+    print(channel.stats())
+    channel.close()
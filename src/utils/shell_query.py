@@ -0,0 +1,110 @@
+import re
+import threading
+from typing import NamedTuple
+
+# Session headers, owners, states and metadata are all get_playback_info needs
+SESSION_LINES = r"'^    [^ ].*\(userId=|package=|state=PlaybackState|metadata:'"
+
+
+class ShellQuery(NamedTuple):
+    """Device shell query with narrowed forms tried before the full dump"""
+    name: str
+    commands: tuple  # Narrowest first, the last one is the full dump
+    pattern: re.Pattern  # An output only counts if this matches
+
+
+QUERIES = (
+    ShellQuery(
+        'media_session',
+        (
+            f'cat /proc/uptime; dumpsys media_session | grep -E {SESSION_LINES}',
+            'cat /proc/uptime; dumpsys media_session',
+        ),
+        re.compile(r'state=PlaybackState|metadata:')
+    ),
+    ShellQuery(
+        'music_volume',
+        (
+            "dumpsys audio | grep -m 1 -A 8 -e '- STREAM_MUSIC:'",
+            'media volume --stream 3 --get',
+            'dumpsys audio',
+        ),
+        # Other streams come first in the full dump, so anchor on STREAM_MUSIC
+        re.compile(r'- STREAM_MUSIC:[\s\S]*?streamVolume:(\d+)|volume is (\d+) in range')
+    ),
+)
+
+
+class QueryStats:
+    """Transfer counters of one shell query"""
+    __slots__ = ('calls', 'bytes', 'fallbacks', 'misses', 'active')
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.fallbacks = 0  # Calls that needed more than one command
+        self.misses = 0  # Calls where no command matched
+        self.active = 0  # Index of the narrowest command known to work
+
+    def as_dict(self, query):
+        return {
+            'calls': self.calls,
+            'bytes': self.bytes,
+            'avg_bytes': self.bytes // self.calls if self.calls else 0,
+            'fallbacks': self.fallbacks,
+            'misses': self.misses,
+            'command': query.commands[self.active],
+        }
+
+
+class ShellQueries:
+    """Runs shell queries through their narrowest working form
+
+    A narrowed command whose output does not match is skipped for good once
+    a wider one matches, so a device without grep -E or media pays the
+    fallback only once.
+    """
+
+    def __init__(self, shell, logger, queries=QUERIES):
+        self.shell = shell
+        self.logger = logger
+        self.queries = {query.name: query for query in queries}
+        self.query_stats = {query.name: QueryStats() for query in queries}
+        self.lock = threading.Lock()
+
+    def run(self, name):
+        """Run a query
+        Args:
+            name: str, query name in QUERIES
+        Returns:
+            tuple: (output, match) of the first matching command, (None, None) if none matched
+        """
+        query = self.queries[name]
+        stats = self.query_stats[name]
+        start = stats.active
+        transferred = 0
+        result = (None, None)
+        for index in range(start, len(query.commands)):
+            output = self.shell.run(query.commands[index]) or ''
+            transferred += len(output.encode('utf-8'))
+            match = query.pattern.search(output)
+            if match:
+                result = (output, match)
+                if index != start:
+                    self.logger.info(f"Shell query {name} falls back to: {query.commands[index]}")
+                    with self.lock:
+                        stats.active = index
+                break
+
+        with self.lock:
+            stats.calls += 1
+            stats.bytes += transferred
+            if result[1] is None:
+                stats.misses += 1
+            elif stats.active != start:
+                stats.fallbacks += 1
+        return result
+
+    def stats(self):
+        """Per query transfer stats"""
+        return {name: stats.as_dict(self.queries[name]) for name, stats in self.query_stats.items()}
@@ -0,0 +1,228 @@
+import re
+import xml.etree.ElementTree as ET
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+
+# Bounds attribute in page source looks like "[0,120][1080,360]"
+BOUNDS_PATTERN = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+# Simple XPaths such as //android.widget.TextView[@resource-id='x' and @text='y']
+SIMPLE_XPATH_PATTERN = re.compile(r'^//([\w.]+|\*)(?:\[(.+)\])?$')
+XPATH_ATTRIBUTE_PATTERN = re.compile(r'''@([\w-]+)\s*=\s*(['"])(.*?)\2''')
+XPATH_CONDITION_PATTERN = re.compile(r'''^@[\w-]+\s*=\s*(['"]).*?\1(?:\s+and\s+@[\w-]+\s*=\s*(['"]).*?\2)*$''')
+# UiSelector chains such as new UiSelector().resourceId("x").text("y")
+UIAUTOMATOR_PATTERN = re.compile(r'^new UiSelector\(\)((?:\.\w+\("(?:[^"\\]|\\.)*"\))+)$')
+UIAUTOMATOR_CALL_PATTERN = re.compile(r'\.(\w+)\("((?:[^"\\]|\\.)*)"\)')
+UIAUTOMATOR_ATTRIBUTES = {
+    'className': 'class',
+    'resourceId': 'resource-id',
+    'text': 'text',
+    'description': 'content-desc',
+}
+
+
+def compile_selector(locator_type, value):
+    """Compile a locator into a (class_name, attributes) selector for snapshot matching
+    Args:
+        locator_type: AppiumBy.ID, AppiumBy.XPATH, AppiumBy.ANDROID_UIAUTOMATOR or AppiumBy.CLASS_NAME
+        value: str, locator value
+    Returns:
+        tuple: (class_name or None, dict of attributes), None if the locator cannot be matched locally
+    """
+    if locator_type == AppiumBy.ID:
+        return None, {'resource-id': value}
+    if locator_type == AppiumBy.CLASS_NAME:
+        return value, {}
+    if locator_type == AppiumBy.ANDROID_UIAUTOMATOR:
+        match = UIAUTOMATOR_PATTERN.match(value)
+        if not match:
+            return None
+        class_name = None
+        attributes = {}
+        for method, argument in UIAUTOMATOR_CALL_PATTERN.findall(match.group(1)):
+            if method not in UIAUTOMATOR_ATTRIBUTES:
+                return None
+            argument = argument.replace('\\"', '"').replace('\\\\', '\\')
+            if method == 'className':
+                class_name = argument
+            else:
+                attributes[UIAUTOMATOR_ATTRIBUTES[method]] = argument
+        return class_name, attributes
+    if locator_type != AppiumBy.XPATH:
+        return None
+
+    match = SIMPLE_XPATH_PATTERN.match(value.strip())
+    if not match:
+        return None
+    class_name = None if match.group(1) == '*' else match.group(1)
+    condition = match.group(2)
+    if not condition:
+        return class_name, {}
+    if not XPATH_CONDITION_PATTERN.match(condition.strip()):
+        return None
+    attributes = {name: attr_value for name, _, attr_value in XPATH_ATTRIBUTE_PATTERN.findall(condition)}
+    return class_name, attributes
+
+
+def node_matches(node, selector):
+    """Check if a page source node matches a compiled selector"""
+    class_name, attributes = selector
+    if class_name and node.get('class', node.tag) != class_name:
+        return False
+    for name, value in attributes.items():
+        if node.get(name) != value:
+            return False
+    return True
+
+
+def node_bounds(node):
+    """Parse node bounds into (x1, y1, x2, y2)"""
+    match = BOUNDS_PATTERN.match(node.get('bounds', ''))
+    if not match:
+        return 0, 0, 0, 0
+    return tuple(int(n) for n in match.groups())
+
+
+class UiSnapshot:
+    """Locally parsed copy of driver.page_source, indexed by resource-id and class"""
+
+    def __init__(self, page_source):
+        self.root = ET.fromstring(page_source)
+        self.by_id = {}
+        self.by_class = {}
+        for node in self.root.iter():
+            resource_id = node.get('resource-id')
+            if resource_id:
+                self.by_id.setdefault(resource_id, []).append(node)
+            self.by_class.setdefault(node.get('class', node.tag), []).append(node)
+
+    @classmethod
+    def capture(cls, driver):
+        """Fetch page source once and build a snapshot"""
+        return cls(driver.page_source)
+
+    @property
+    def package(self):
+        """Package name of the top window in the snapshot"""
+        for node in self.root.iter():
+            package = node.get('package')
+            if package:
+                return package
+        return None
+
+    def find_all(self, locator_type, value, parent=None):
+        """Find all nodes matching the locator
+        Args:
+            locator_type: AppiumBy.ID, AppiumBy.XPATH, AppiumBy.ANDROID_UIAUTOMATOR or AppiumBy.CLASS_NAME
+            value: str, locator value
+            parent: optional node to search within (excluding itself)
+        Returns:
+            list: Matching nodes in document order, None if the locator is not supported locally
+        """
+        selector = compile_selector(locator_type, value)
+        if selector is None:
+            return None
+
+        if parent is None:
+            class_name, attributes = selector
+            if 'resource-id' in attributes:
+                candidates = self.by_id.get(attributes['resource-id'], [])
+            elif class_name:
+                candidates = self.by_class.get(class_name, [])
+            else:
+                candidates = self.root.iter()
+        else:
+            candidates = parent.iter()
+
+        return [node for node in candidates if node is not parent and node_matches(node, selector)]
+
+    def find(self, locator_type, value, parent=None):
+        """Find first node matching the locator, None if absent or unsupported"""
+        nodes = self.find_all(locator_type, value, parent)
+        return nodes[0] if nodes else None
+
+
+class LazyElement:
+    """WebElement stand-in backed by a snapshot node
+
+    Reads (text, attributes, location, size, child lookups) are answered from
+    the snapshot. The real WebElement is only fetched when a command interacts
+    with it, e.g. clicking an avatar.
+    """
+
+    def __init__(self, handler, snapshot, node):
+        self.handler = handler
+        self.snapshot = snapshot
+        self.node = node
+        self._element = None
+
+    @property
+    def id(self):
+        """Content signature of the node subtree, stable across tree refreshes"""
+        parts = []
+        for node in self.node.iter():
+            for name in ('resource-id', 'text', 'content-desc'):
+                value = node.get(name)
+                if value:
+                    parts.append(value)
+        return '|'.join(parts)
+
+    @property
+    def text(self):
+        return self.node.get('text', '')
+
+    @property
+    def location(self):
+        x1, y1, _, _ = node_bounds(self.node)
+        return {'x': x1, 'y': y1}
+
+    @property
+    def size(self):
+        x1, y1, x2, y2 = node_bounds(self.node)
+        return {'width': x2 - x1, 'height': y2 - y1}
+
+    def get_attribute(self, name):
+        return self.node.get(name)
+
+    def find_element(self, by, value):
+        nodes = self.snapshot.find_all(by, value, parent=self.node)
+        if nodes is None:
+            return self.resolve().find_element(by, value)
+        if not nodes:
+            raise NoSuchElementException(f'{value} not found in snapshot')
+        return LazyElement(self.handler, self.snapshot, nodes[0])
+
+    def find_elements(self, by, value):
+        nodes = self.snapshot.find_all(by, value, parent=self.node)
+        if nodes is None:
+            return self.resolve().find_elements(by, value)
+        return [LazyElement(self.handler, self.snapshot, node) for node in nodes]
+
+    def resolve(self):
+        """Fetch the real WebElement for this node
+        Returns:
+            WebElement: Element located by resource-id/class and bounds
+        """
+        if self._element is not None:
+            return self._element
+
+        bounds = self.node.get('bounds')
+        resource_id = self.node.get('resource-id')
+        if resource_id:
+            xpath = f"//*[@resource-id='{resource_id}' and @bounds='{bounds}']"
+        else:
+            xpath = f"//{self.node.get('class', self.node.tag)}[@bounds='{bounds}']"
+
+        element = self.handler.try_find_element(AppiumBy.XPATH, xpath, log=False)
+        if not element:
+            raise StaleElementReferenceException(f'Snapshot node {xpath} is no longer on screen')
+        self._element = element
+        return element
+
+    def click(self):
+        self.resolve().click()
+        self.handler.ui_changed()
+
+    def __getattr__(self, name):
+        # Anything not answerable from the snapshot goes to the real element
+        return getattr(self.resolve(), name)